@@ -0,0 +1,46 @@
+"""
+Compares the file-boundary-aware packer with the old fixed-offset slicer:
+chunk count, files cut across chunks, and packing time.
+
+Usage: python -m benchmarks.bench_chunking [--files N] [--limit TOKENS]
+"""
+import argparse
+import math
+import time
+
+from src.core import SAFE_TOKEN_LIMIT_FAST, estimate_tokens, split_context
+from benchmarks.synthetic import synthetic_records
+
+# The fixed ratio the old slicer assumed
+LEGACY_CHARS_PER_TOKEN = 4
+
+def legacy_split(context: str, limit: int) -> list[str]:
+    chunk_size = limit * LEGACY_CHARS_PER_TOKEN
+    return [context[i:i + chunk_size] for i in range(0, len(context), chunk_size)]
+
+def starts_mid_file(chunk: str) -> bool:
+    first_line = chunk.split("\n", 1)[0]
+    return not first_line.startswith("--- FILE:") or ("(part " in first_line and "(part 1/" not in first_line)
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--limit", type=int, default=SAFE_TOKEN_LIMIT_FAST)
+    args = parser.parse_args()
+
+    records = synthetic_records(args.files)
+    context = "\n".join(r.render() for r in records)
+    print(f"{args.files} files, {len(context) / 1e6:.1f} MB, limit {args.limit} tokens")
+
+    for label, splitter in (("legacy slicer", legacy_split), ("packer", split_context)):
+        start = time.perf_counter()
+        chunks = splitter(context, args.limit)
+        elapsed = time.perf_counter() - start
+        mid_file = sum(1 for chunk in chunks if starts_mid_file(chunk))
+        print(f"{label:14} {len(chunks):6d} chunks  {elapsed * 1000:9.1f} ms  chunks starting mid-file: {mid_file}")
+
+    total_tokens = sum(estimate_tokens(r.render()) for r in records)
+    print(f"lower bound    {math.ceil(total_tokens / args.limit):6d} chunks  (estimated tokens / limit)")
+
+if __name__ == "__main__":
+    main()
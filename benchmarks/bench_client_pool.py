@@ -0,0 +1,72 @@
+"""
+Measures per-request latency of a fresh genai client per call (the old
+behaviour) against the pooled process-wide client, using a local
+keep-alive HTTP server that mimics the generateContent endpoint.
+
+Usage: python -m benchmarks.bench_client_pool [--requests N]
+"""
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google import genai
+
+from src import core
+
+RESPONSE = json.dumps({"candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}}]}).encode()
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self) -> None:
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+def timed(fn, n: int) -> list[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("GEMINI_API_KEY", "bench-key")
+    os.environ["GEMINI_BASE_URL"] = base_url
+
+    def fresh_client_call() -> None:
+        client = genai.Client(api_key="bench-key", http_options={"api_version": "v1alpha", "base_url": base_url})
+        client.models.generate_content(model="bench", contents="hi")
+
+    def pooled_client_call() -> None:
+        core.get_gemini_client().models.generate_content(model="bench", contents="hi")
+
+    fresh = timed(fresh_client_call, args.requests)
+    pooled = timed(pooled_client_call, args.requests)
+    server.shutdown()
+
+    for label, samples in (("fresh client", fresh), ("pooled client", pooled)):
+        print(f"{label:14} mean {statistics.mean(samples):7.2f} ms   p95 {sorted(samples)[int(len(samples) * 0.95) - 1]:7.2f} ms")
+    print(f"speedup        {statistics.mean(fresh) / statistics.mean(pooled):.1f}x")
+
+if __name__ == "__main__":
+    main()
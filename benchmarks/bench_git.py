@@ -0,0 +1,86 @@
+"""
+Subprocess count and wall time of the git queries forge and commit make:
+one run_shell process per question (the old behaviour) versus the
+GitSession API (cat-file readers, branches read from the git directory).
+Builds a throwaway repository with a local "origin" remote.
+
+Usage: python -m benchmarks.bench_git [--rounds N] [--lookups N]
+"""
+import argparse
+import os
+import subprocess
+import tempfile
+import time
+
+from src.git_session import GitSession
+from src.telemetry import get_tracer
+from src.utils import run_shell
+
+def git(root: str, *args: str) -> None:
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+def make_repo(root: str) -> str:
+    origin, work = os.path.join(root, "origin.git"), os.path.join(root, "work")
+    git(root, "init", "-q", "--bare", "-b", "main", origin)
+    git(root, "clone", "-q", origin, work)
+    git(work, "config", "user.email", "bench@example.com")
+    git(work, "config", "user.name", "Bench")
+    for i in range(20):
+        with open(os.path.join(work, f"mod{i}.py"), "w") as f:
+            f.write(f"value = {i}\n")
+        git(work, "add", ".")
+        git(work, "commit", "-q", "-m", f"commit {i}")
+    git(work, "push", "-q", "origin", "main")
+    git(work, "remote", "set-head", "origin", "main")
+    git(work, "checkout", "-q", "-b", "feature")
+    with open(os.path.join(work, "mod0.py"), "a") as f:
+        f.write("extra = True\n")
+    return work
+
+def old_round(lookups: int) -> None:
+    run_shell("git status --porcelain", check=False)
+    base = next(l.split(":")[-1].strip() for l in run_shell("git remote show origin").splitlines() if "HEAD branch" in l)
+    run_shell(f"git diff {base}...HEAD", check=False)
+    run_shell("git rev-parse --abbrev-ref HEAD")
+    for i in range(lookups):
+        run_shell(f"git rev-parse HEAD~{i % 10}")
+
+def session_round(session: GitSession, lookups: int) -> None:
+    session.status()
+    session.diff(f"{session.default_branch()}...HEAD")
+    session.current_branch()
+    for i in range(lookups):
+        session.resolve(f"HEAD~{i % 10}")
+
+def measure(label: str, rounds: int, call) -> None:
+    spawned = []
+    listener = lambda entry: entry["kind"] == "subprocess" and spawned.append(entry)
+    get_tracer().listeners.append(listener)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        call()
+    elapsed = time.perf_counter() - start
+    get_tracer().listeners.remove(listener)
+    print(f"{label:10} {len(spawned) / rounds:6.1f} processes/round  {elapsed / rounds * 1000:8.1f} ms/round")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--lookups", type=int, default=10)
+    args = parser.parse_args()
+
+    os.environ["ALCHEMIST_NO_TRACE"] = "1"
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        work = make_repo(root)
+        os.chdir(work)
+        try:
+            measure("run_shell", args.rounds, lambda: old_round(args.lookups))
+            session = GitSession(work)
+            measure("session", args.rounds, lambda: session_round(session, args.lookups))
+            session.close()
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
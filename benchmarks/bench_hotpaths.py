@@ -0,0 +1,157 @@
+"""
+Benchmarks the context and parsing hot paths on synthetic inputs:
+get_codebase_context (on a generated repo on disk), split_context,
+estimate_tokens and parse_json_response (large answers with nested fences).
+
+Reports best-of-N wall time, peak traced memory and throughput per case,
+and compares them with stored baselines.
+
+Usage: python -m benchmarks.bench_hotpaths [--tiers 1k,10k,100k] [--repeat N]
+                                          [--check] [--update] [--baselines PATH]
+
+--check exits with status 1 if any case regresses past the tolerances;
+--update rewrites the baselines from this run. Baselines are only
+comparable on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable
+
+from src.core import SAFE_TOKEN_LIMIT_FAST, estimate_tokens, split_context
+from src.utils import get_codebase_context, parse_json_response
+from benchmarks.synthetic import synthetic_llm_output, write_repo
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(__file__), "baselines.json")
+TIERS = {"1k": 1000, "10k": 10000, "100k": 100000}
+# Allowed slowdown / memory growth over the baseline before --check fails
+TIME_TOLERANCE = 0.5
+MEMORY_TOLERANCE = 0.25
+# Slowdowns smaller than this are timer noise (estimate_tokens runs in microseconds)
+TIME_FLOOR_SECONDS = 0.001
+
+def measure(fn: Callable[[], Any], input_bytes: int, repeat: int, setup: Callable[[], Any] | None = None) -> dict[str, float]:
+    """
+    Best wall time over `repeat` runs, then one traced run for peak memory.
+    `setup` runs untimed before every run.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "seconds": best,
+        "peak_mb": peak / 1e6,
+        "mb_per_s": input_bytes / 1e6 / best if best > 0 else 0.0,
+    }
+
+def run_tier(tier: str, files: int, repeat: int) -> dict[str, dict[str, float]]:
+    results = {}
+    root = tempfile.mkdtemp(prefix=f"alchemist_bench_{tier}_")
+    snapshots = tempfile.mkdtemp(prefix=f"alchemist_bench_{tier}_snapshots_")
+    cwd = os.getcwd()
+
+    def cold_snapshot() -> None:
+        # A fresh, empty snapshot per run: no file or token count is reused
+        # between runs, and nothing is written under the working directory
+        os.environ["ALCHEMIST_SNAPSHOT_DIR"] = tempfile.mkdtemp(dir=snapshots)
+
+    try:
+        repo_bytes = write_repo(root, files)
+        os.chdir(root)
+        results[f"get_codebase_context[{tier}]"] = measure(get_codebase_context, repo_bytes, repeat, setup=cold_snapshot)
+        cold_snapshot()
+        context = get_codebase_context()
+        os.chdir(cwd)
+
+        context_bytes = len(context.encode("utf-8"))
+        results[f"split_context[{tier}]"] = measure(lambda: split_context(context, SAFE_TOKEN_LIMIT_FAST), context_bytes, repeat, setup=cold_snapshot)
+    finally:
+        os.chdir(cwd)
+        os.environ.pop("ALCHEMIST_SNAPSHOT_DIR", None)
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.rmtree(snapshots, ignore_errors=True)
+    results[f"estimate_tokens[{tier}]"] = measure(lambda: estimate_tokens(context), context_bytes, repeat)
+
+    answer = synthetic_llm_output(files)
+    results[f"parse_json_response[{tier}]"] = measure(lambda: parse_json_response(answer), len(answer.encode("utf-8")), repeat)
+    return results
+
+def compare(results: dict[str, dict[str, float]], baselines: dict[str, dict[str, float]]) -> list[str]:
+    """Returns a message per case that is slower or larger than its baseline allows."""
+    regressions = []
+    for case, current in results.items():
+        base = baselines.get(case)
+        if not base:
+            continue
+        if current["seconds"] > base["seconds"] * (1 + TIME_TOLERANCE) and current["seconds"] - base["seconds"] > TIME_FLOOR_SECONDS:
+            regressions.append(f"{case}: {current['seconds'] * 1000:.1f} ms vs baseline {base['seconds'] * 1000:.1f} ms")
+        if current["peak_mb"] > base["peak_mb"] * (1 + MEMORY_TOLERANCE):
+            regressions.append(f"{case}: peak {current['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", default="1k,10k", help="Comma-separated repo sizes: 1k, 10k, 100k")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baselines", default=DEFAULT_BASELINES)
+    parser.add_argument("--check", action="store_true", help="Fail if a case regressed against the baselines")
+    parser.add_argument("--update", action="store_true", help="Store this run as the new baselines")
+    args = parser.parse_args()
+
+    # Keep calibration and cache lookups away from the user's real cache directory
+    os.environ["ALCHEMIST_CACHE_DIR"] = tempfile.mkdtemp(prefix="alchemist_bench_")
+
+    results: dict[str, dict[str, float]] = {}
+    for tier in args.tiers.split(","):
+        tier = tier.strip()
+        if tier not in TIERS:
+            parser.error(f"unknown tier {tier!r} (choose from {', '.join(TIERS)})")
+        results.update(run_tier(tier, TIERS[tier], args.repeat))
+
+    try:
+        with open(args.baselines, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+
+    print(f"{'case':34} {'time':>11} {'peak':>10} {'throughput':>12} {'vs baseline':>12}")
+    for case, row in results.items():
+        base = baselines.get(case)
+        delta = f"{(row['seconds'] / base['seconds'] - 1) * 100:+.0f}%" if base and base["seconds"] else "-"
+        print(f"{case:34} {row['seconds'] * 1000:8.1f} ms {row['peak_mb']:7.1f} MB {row['mb_per_s']:7.1f} MB/s {delta:>12}")
+
+    if args.update:
+        baselines.update(results)
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaselines written to {args.baselines}")
+
+    if args.check:
+        regressions = compare(results, baselines)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions against the baselines.")
+
+if __name__ == "__main__":
+    main()
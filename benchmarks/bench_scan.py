@@ -0,0 +1,84 @@
+"""
+Compares the old serial os.walk scan with src/scanner.py (git ls-files or
+the gitignore-aware walk, plus a thread pool for reading) on a synthetic
+repository with a gitignored build output directory next to the sources:
+files and MB scanned per second. The last case rescans an unchanged tree
+from the .alchemist/ snapshot (index load included).
+
+Usage: python -m benchmarks.bench_scan [--files N] [--ignored N] [--repeat N] [--git]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+from src.models import FileRecord
+from src.scanner import EXTENSIONS, IGNORE_DIRS, scan_codebase
+from src.snapshot import Snapshot
+from benchmarks.synthetic import write_repo
+
+def legacy_scan(root: str) -> list[FileRecord]:
+    """The scan utils.get_codebase_files used to do: serial walk and read."""
+    records = []
+    for current, dirs, files in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in IGNORE_DIRS]
+        for file in files:
+            if os.path.splitext(file)[1] in EXTENSIONS:
+                path = os.path.join(current, file)
+                try:
+                    with open(path, "r", encoding="utf-8") as f:
+                        records.append(FileRecord(path=path, content=f.read()))
+                except Exception:
+                    continue
+    return records
+
+def timed(fn, repeat: int) -> tuple[float, list[FileRecord]]:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        records = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), records
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--ignored", type=int, default=5000, help="files under a gitignored out/ directory")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--git", action="store_true", help="commit the tree so the scanner lists it with git ls-files")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        total = write_repo(root, args.files)
+        write_repo(os.path.join(root, "out"), args.ignored, seed=1)
+        with open(os.path.join(root, ".gitignore"), "w", encoding="utf-8") as f:
+            f.write("out/\n")
+        if args.git:
+            for cmd in (["git", "init", "-q"], ["git", "add", "-A"]):
+                subprocess.run(cmd, cwd=root, check=True, capture_output=True)
+        # Age the tree past the snapshot's racy window so unchanged files are reused
+        past = time.time() - 60
+        for current, _, files in os.walk(root):
+            for file in files:
+                os.utime(os.path.join(current, file), (past, past))
+        snapshot_path = os.path.join(root, ".alchemist", "snapshot.json")
+        scan_codebase(root, snapshot=Snapshot(snapshot_path))
+        print(f"{args.files} source files, {total / 1e6:.1f} MB; {args.ignored} ignored files under out/")
+
+        cases = [
+            ("legacy walk", lambda: legacy_scan(root)),
+            ("scanner", lambda: scan_codebase(root)[0]),
+            ("scanner (1 thread)", lambda: scan_codebase(root, workers=1)[0]),
+            ("snapshot rescan", lambda: scan_codebase(root, snapshot=Snapshot(snapshot_path))[0]),
+        ]
+        for label, fn in cases:
+            seconds, records = timed(fn, args.repeat)
+            size = sum(len(r.content.encode("utf-8")) for r in records)
+            print(f"{label:20} {len(records):6d} files  {seconds * 1000:8.1f} ms  "
+                  f"{len(records) / seconds:9.0f} files/s  {size / seconds / 1e6:7.1f} MB/s")
+        print(scan_codebase(root)[1].summary())
+
+if __name__ == "__main__":
+    main()
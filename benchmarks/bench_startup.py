@@ -0,0 +1,57 @@
+"""
+Measures CLI startup import cost per subcommand with `python -X importtime`,
+comparing the lazy dispatch in src/cli.py with eagerly importing every
+command module plus the genai SDK (what the CLI used to do).
+
+Usage: python -m benchmarks.bench_startup [--repeat N]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+from src.cli import COMMANDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EAGER = "import src.cli, google.genai; [src.cli.load_command(c) for c in src.cli.COMMANDS]"
+
+def import_time(code: str) -> tuple[float, bool]:
+    """
+    Runs `code` in a fresh interpreter under -X importtime and returns the
+    total import time in ms (top-level imports only) and whether genai loaded.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code + "; import sys; print('google.genai' in sys.modules)"],
+        capture_output=True, text=True, cwd=ROOT, check=True,
+    )
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not name.startswith("  "):  # top-level import (nested ones are indented)
+            total_us += int(cumulative)
+    return total_us / 1000, result.stdout.strip().endswith("True")
+
+def measure(code: str, repeat: int) -> tuple[float, bool]:
+    runs = [import_time(code) for _ in range(repeat)]
+    return statistics.median(ms for ms, _ in runs), runs[-1][1]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    eager_ms, _ = measure(EAGER, args.repeat)
+    print(f"{'command':12} {'imports':>10} {'eager':>10} {'speedup':>8}  genai loaded")
+    cases = [("--help", "import src.cli")] + [
+        (name, f"import src.cli; src.cli.load_command({name!r})") for name in COMMANDS
+    ]
+    for label, code in cases:
+        lazy_ms, genai_loaded = measure(code, args.repeat)
+        print(f"{label:12} {lazy_ms:7.1f} ms {eager_ms:7.1f} ms {eager_ms / lazy_ms:7.1f}x  {'yes' if genai_loaded else 'no'}")
+    print("\nThe genai SDK itself is imported on the first model call (core.get_gemini_client).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Peak Python heap of a map-reduce run over a synthetic repository: the
+string path (get_codebase_context + generate_content(context=...)) versus
+the streaming path (iter_codebase_files + generate_content(files=...)).
+Uses the offline FakeProvider, so only the engine's own memory is measured.
+
+Usage: python -m benchmarks.bench_stream [--files N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from src import core
+from src.cache import set_cache_enabled
+from src.providers import FakeProvider
+from src.scheduler import ModelLimits, RequestScheduler, set_scheduler
+from src.utils import get_codebase_context, iter_codebase_files
+from benchmarks.synthetic import write_repo
+
+def run(label: str, call) -> None:
+    core.set_provider(FakeProvider(latency=0.001, tokens_per_second=1e9))
+    tracemalloc.start()
+    start = time.perf_counter()
+    call()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:10} peak {peak / 1e6:8.1f} MB  {elapsed:6.2f} s")
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=5000)
+    args = parser.parse_args()
+
+    os.environ["ALCHEMIST_NO_SNAPSHOT"] = "1"
+    os.environ["ALCHEMIST_NO_TRACE"] = "1"
+    set_cache_enabled(False)
+    set_scheduler(RequestScheduler(limits={m: ModelLimits(rpm=10**6, tpm=10**12) for m in core.FAST_MODELS}))
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as root:
+        total = write_repo(root, args.files)
+        os.chdir(root)
+        try:
+            print(f"{args.files} files, {total / 1e6:.1f} MB")
+            run("string", lambda: core.generate_content("Summarize", context=get_codebase_context()))
+            run("streamed", lambda: core.generate_content("Summarize", files=iter_codebase_files()))
+        finally:
+            os.chdir(cwd)
+
+if __name__ == "__main__":
+    main()
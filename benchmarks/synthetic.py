@@ -0,0 +1,61 @@
+"""
+Deterministic synthetic repository content for benchmarks.
+"""
+import json
+import os
+import random
+
+from src.models import FileRecord
+
+def synthetic_source(rng: random.Random, functions: int) -> str:
+    lines = ['"""Synthetic module."""', "import os", ""]
+    for i in range(functions):
+        lines.append(f"def handler_{i}(value, *args):")
+        lines.append(f'    """Handles case {i}."""')
+        for j in range(rng.randint(2, 12)):
+            lines.append(f"    value = value * {j} + len(args)  # step {j}")
+        lines.append("    return value")
+        lines.append("")
+    return "\n".join(lines)
+
+def synthetic_records(files: int, seed: int = 0) -> list[FileRecord]:
+    """
+    Builds `files` Python-like records with a long-tailed size distribution
+    (mostly small modules, a few very large ones).
+    """
+    rng = random.Random(seed)
+    records = []
+    for i in range(files):
+        functions = min(400, int(rng.paretovariate(1.2) * 3))
+        records.append(FileRecord(path=f"./pkg{i % 50}/module_{i}.py", content=synthetic_source(rng, functions)))
+    return records
+
+def write_repo(root: str, files: int, seed: int = 0) -> int:
+    """
+    Writes synthetic_records(files) under `root` as a source tree.
+    Returns the total number of bytes written.
+    """
+    total = 0
+    for record in synthetic_records(files, seed):
+        path = os.path.join(root, record.path[2:])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            total += f.write(record.content)
+    return total
+
+def synthetic_llm_output(items: int, seed: int = 0) -> str:
+    """
+    Builds a large model answer: chatter around a ```json fence whose string
+    values contain their own fenced code blocks, as issue drafts usually do.
+    """
+    rng = random.Random(seed)
+    entries = []
+    for i in range(items):
+        steps = "\n".join(f"{j}. call handler_{rng.randint(0, 400)}()" for j in range(rng.randint(1, 6)))
+        body = (
+            f"## Problem\nhandler_{i} fails on empty input.\n\n"
+            f"```python\ndef handler_{i}(value):\n    return value[0]\n```\n\n"
+            f"## Steps\n{steps}\n\n```json\n{{\"value\": []}}\n```"
+        )
+        entries.append({"title": f"Fix handler_{i}", "body": body, "labels": ["bug", f"area-{i % 7}"]})
+    return f"Here are the issues I found:\n\n```json\n{json.dumps(entries, indent=2)}\n```\n\nLet me know if you want more."
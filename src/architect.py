@@ -6,7 +6,7 @@ import subprocess
 from typing import Optional, Literal
 from rich.console import Console
 from rich.prompt import Confirm
-from .core import generate_content
+from .core import generate_content, generate_content_stream
 from .utils import run_shell, parse_json_response
 
 console = Console()
@@ -179,7 +179,7 @@ def explain_code(
     Explains a concept or code snippet.
     """
     prompt = f"Task: Explain Concept/Code. Context is provided. Keep it concise and technical."
-    # Pass context separately
-    result = generate_content(prompt, mode=mode, context=context)
+    # Pass context separately; the explanation is rendered as it streams in
+    result = generate_content_stream(prompt, mode=mode, context=context, title="\n[bold white]--- Explanation ---[/bold white]")
     if result:
-        console.print(f"\n[bold white]--- Explanation ---[/bold white]\n{result}\n[bold white]-------------------[/bold white]")
\ No newline at end of file
+        console.print("[bold white]-------------------[/bold white]")
\ No newline at end of file
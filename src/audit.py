@@ -1,10 +1,10 @@
 import os
-import json
 from typing import Optional, Any
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress
-from .utils import run_shell, check_gh_auth
+from .utils import check_gh_auth
+from .github import GitHubError, current_repo, get_github
 
 console = Console()
 
@@ -18,14 +18,20 @@ def run_audit(user: Optional[str] = None, repo_name: Optional[str] = None) -> Op
         return None
 
     # Use current directory if no repo specified
-    target_repo = repo_name or run_shell("gh repo view --json name --jq .name", check=False)
+    owner, target_repo = username, repo_name
+    if not target_repo:
+        origin = current_repo()
+        if origin:
+            owner, target_repo = origin
     if not target_repo:
         console.print("[yellow]Not inside a Git repository. Auditing current directory files only.[/yellow]")
         repo_data: dict[str, Any] = {}
     else:
-        console.print(f"[cyan]Auditing Repository:[/cyan] [bold]{username}/{target_repo}[/bold]")
-        repo_data_raw = run_shell(f"gh repo view {username}/{target_repo} --json description,repositoryTopics,licenseInfo", check=False)
-        repo_data = json.loads(repo_data_raw) if repo_data_raw else {}
+        console.print(f"[cyan]Auditing Repository:[/cyan] [bold]{owner}/{target_repo}[/bold]")
+        try:
+            repo_data = get_github().get_repo(owner, target_repo)
+        except GitHubError:
+            repo_data = {}
 
     checks = {
         "README.md": {"score": 20, "found": os.path.exists("README.md")},
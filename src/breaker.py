@@ -0,0 +1,170 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Callable
+from .cache import get_cache_dir
+
+# Cooldown when a quota error carries no retry hint
+DEFAULT_QUOTA_COOLDOWN = 60.0
+# Cooldown after repeated non-quota errors
+DEFAULT_ERROR_COOLDOWN = 30.0
+# Consecutive non-quota errors before a model is taken out of rotation
+FAILURE_THRESHOLD = 2
+
+_RETRY_PATTERNS = [
+    re.compile(r"retry[- ]after[\"']?\s*[:=]\s*[\"']?(\d+(?:\.\d+)?)", re.IGNORECASE),
+    re.compile(r"retryDelay[\"']?\s*[:=]\s*[\"']?(\d+(?:\.\d+)?)s", re.IGNORECASE),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+]
+
+def parse_retry_after(err_msg: str) -> float | None:
+    """
+    Extracts a retry hint in seconds from an API error message, if present.
+    Understands Retry-After headers, Gemini's retryDelay and "retry in Ns".
+    """
+    for pattern in _RETRY_PATTERNS:
+        match = pattern.search(err_msg)
+        if match:
+            return float(match.group(1))
+    return None
+
+class CircuitBreaker:
+    """
+    Remembers models that are out of quota or failing, so later prompts skip
+    them until their cooldown expires. State is shared across threads and,
+    when `path` is set, persisted between CLI invocations.
+    """
+
+    def __init__(self, path: str | None = None, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._open_until: dict[str, float] = {}
+        self._reasons: dict[str, str] = {}
+        self._failures: dict[str, int] = {}
+        self._cleared: set[str] = set()
+        self._load()
+
+    def is_open(self, model: str) -> bool:
+        with self._lock:
+            return self._open_until.get(model, 0.0) > self._clock()
+
+    def available(self, models: list[str]) -> list[str]:
+        """
+        Returns the models whose circuit is closed, in order. If every model is
+        cooling down, returns the one that recovers first as a single probe.
+        """
+        with self._lock:
+            now = self._clock()
+            ready = [m for m in models if self._open_until.get(m, 0.0) <= now]
+            if ready or not models:
+                return ready
+            return [min(models, key=lambda m: self._open_until.get(m, 0.0))]
+
+    def record_quota_error(self, model: str, err_msg: str = "") -> float:
+        """Opens the circuit for the Retry-After hint or the default cooldown."""
+        cooldown = parse_retry_after(err_msg) or DEFAULT_QUOTA_COOLDOWN
+        self._trip(model, cooldown, "quota")
+        return cooldown
+
+    def record_failure(self, model: str) -> None:
+        """Counts a non-quota error; opens the circuit after FAILURE_THRESHOLD in a row."""
+        with self._lock:
+            self._failures[model] = self._failures.get(model, 0) + 1
+            should_trip = self._failures[model] >= FAILURE_THRESHOLD
+        if should_trip:
+            self._trip(model, DEFAULT_ERROR_COOLDOWN, "error")
+
+    def record_success(self, model: str) -> None:
+        with self._lock:
+            self._failures.pop(model, None)
+            changed = self._open_until.pop(model, None) is not None
+            self._reasons.pop(model, None)
+            if changed:
+                self._cleared.add(model)
+        if changed:
+            self._save()
+
+    def snapshot(self) -> dict[str, dict[str, float | str]]:
+        """Returns {model: {"remaining": seconds, "reason": str}} for open circuits."""
+        with self._lock:
+            now = self._clock()
+            return {
+                model: {"remaining": until - now, "reason": self._reasons.get(model, "")}
+                for model, until in self._open_until.items()
+                if until > now
+            }
+
+    def _trip(self, model: str, cooldown: float, reason: str) -> None:
+        with self._lock:
+            self._open_until[model] = max(self._open_until.get(model, 0.0), self._clock() + cooldown)
+            self._reasons[model] = reason
+            self._failures.pop(model, None)
+            self._cleared.discard(model)
+        self._save()
+
+    def _load(self) -> None:
+        with self._lock:
+            self._merge_from_file()
+
+    def _merge_from_file(self) -> None:
+        # Caller holds the lock. Models cleared locally stay cleared.
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = self._clock()
+        for model, entry in data.items():
+            until = float(entry.get("until", 0.0))
+            if model in self._cleared or until <= now or until <= self._open_until.get(model, 0.0):
+                continue
+            self._open_until[model] = until
+            self._reasons[model] = str(entry.get("reason", ""))
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            # Merge with what other processes may have written meanwhile
+            self._merge_from_file()
+            now = self._clock()
+            data = {
+                model: {"until": until, "reason": self._reasons.get(model, "")}
+                for model, until in self._open_until.items()
+                if until > now
+            }
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                pass
+
+_breaker: CircuitBreaker | None = None
+_breaker_lock = threading.Lock()
+
+def get_breaker() -> CircuitBreaker:
+    """
+    Returns the process-wide circuit breaker, persisted in the cache directory.
+    """
+    global _breaker
+    with _breaker_lock:
+        if _breaker is None:
+            try:
+                path: str | None = os.path.join(get_cache_dir(), "circuit_breaker.json")
+            except OSError:
+                path = None
+            _breaker = CircuitBreaker(path)
+        return _breaker
+
+def reset_breaker() -> None:
+    """Forgets the process-wide breaker (the next call reloads persisted state)."""
+    global _breaker
+    with _breaker_lock:
+        _breaker = None
@@ -0,0 +1,189 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+# Defaults can be overridden through the environment (or .env)
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 3600
+
+_cache_enabled = not os.getenv("ALCHEMIST_NO_CACHE")
+_cache_instance: "ResponseCache | None" = None
+_cache_lock = threading.Lock()
+
+def get_cache_dir() -> str:
+    """
+    Returns the user-level cache directory, creating it if needed.
+    Honours ALCHEMIST_CACHE_DIR, otherwise uses ~/.cache/git-alchemist.
+    """
+    path = os.getenv("ALCHEMIST_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "git-alchemist")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def make_cache_key(models: list[str], prompt: str, context: str | None = None) -> str:
+    """
+    Builds a content-addressed key from the model tier, prompt and context.
+    Each part is length-prefixed so ("ab", "c") and ("a", "bc") never collide.
+    """
+    digest = hashlib.sha256()
+    for part in ("|".join(models), prompt, context or ""):
+        data = part.encode("utf-8", "replace")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+class SQLiteStore:
+    """
+    Disk-backed key/value table with TTL expiry, size-bounded LRU eviction
+    and lifetime hit/miss counters; the model response cache and the GitHub
+    conditional-request cache (src/http_cache.py) are both built on it.
+    Safe to share between the worker threads of a single process.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.commit()
+
+    def lookup(self, key: str, ttl: float | None = None) -> str | bytes | None:
+        """
+        The stored value, or None if missing or older than `ttl` (default
+        self.ttl; expired entries are dropped). Does not touch the counters.
+        """
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if now - row[1] > (self.ttl if ttl is None else ttl):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            return row[0]
+
+    def store(self, key: str, value: str | bytes) -> None:
+        """Stores a value and evicts least-recently-used entries beyond max_bytes."""
+        size = len(value.encode("utf-8", "replace")) if isinstance(value, str) else len(value)
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def record(self, hit: bool) -> None:
+        """Counts one lookup as a hit or a miss, for this session and for good."""
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+            self._conn.execute(
+                "INSERT INTO counters (name, value) VALUES (?, 1) "
+                "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+                ("hits" if hit else "misses",),
+            )
+            self._conn.commit()
+
+    def clear(self) -> None:
+        """Drops every stored entry and resets the counters."""
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.execute("DELETE FROM counters")
+            self._conn.commit()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Returns session counters plus on-disk totals and lifetime counters."""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            lifetime = dict(self._conn.execute("SELECT name, value FROM counters").fetchall())
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "lifetime_hits": lifetime.get("hits", 0),
+            "lifetime_misses": lifetime.get("misses", 0),
+        }
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            self.evictions += 1
+
+class ResponseCache(SQLiteStore):
+    """Model responses keyed by make_cache_key; every get counts as a hit or miss."""
+
+    def get(self, key: str) -> str | None:
+        """Returns the cached value, or None on a miss or expired entry."""
+        value = self.lookup(key)
+        self.record(value is not None)
+        return value  # type: ignore[return-value]
+
+    def set(self, key: str, value: str) -> None:
+        self.store(key, value)
+
+def set_cache_enabled(enabled: bool) -> None:
+    """Globally enables or disables the response cache (used by --no-cache)."""
+    global _cache_enabled
+    _cache_enabled = enabled
+
+def cache_enabled() -> bool:
+    return _cache_enabled
+
+def get_response_cache() -> ResponseCache | None:
+    """
+    Returns the process-wide response cache, or None when caching is disabled
+    or the cache directory is not writable.
+    """
+    global _cache_instance
+    if not _cache_enabled:
+        return None
+    with _cache_lock:
+        if _cache_instance is None:
+            try:
+                max_bytes = int(float(os.getenv("ALCHEMIST_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+                ttl = float(os.getenv("ALCHEMIST_CACHE_TTL", DEFAULT_TTL_SECONDS))
+                path = os.path.join(get_cache_dir(), "responses.sqlite3")
+                _cache_instance = ResponseCache(path, max_bytes=max_bytes, ttl=ttl)
+            except (OSError, ValueError, sqlite3.Error):
+                return None
+        return _cache_instance
+
+def reset_response_cache() -> None:
+    """Forgets the process-wide cache instance (the next call reopens it)."""
+    global _cache_instance
+    with _cache_lock:
+        _cache_instance = None
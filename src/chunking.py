@@ -0,0 +1,185 @@
+import bisect
+import re
+from typing import Callable, Iterable, Iterator
+from .models import FileRecord
+
+# Lines that start a new top-level unit; oversized files are split here first
+BOUNDARY_RE = re.compile(
+    r"^(?:async def |def |class |@|function |export |const |let |var |public |private |protected |static |func |fn |impl |struct |enum |interface |type |#include|\S.*\{\s*$)"
+)
+
+def _iter_headers(context: str) -> Iterator[tuple[int, int, str]]:
+    """Yields (header start, body start, path) for every file header line."""
+    marker = "--- FILE: "
+    pos = context.find(marker)
+    while pos != -1:
+        line_end = context.find("\n", pos)
+        if line_end == -1:
+            return
+        line = context[pos:line_end]
+        if (pos == 0 or context[pos - 1] == "\n") and line.endswith(" ---"):
+            yield pos, line_end + 1, line[len(marker):-4]
+        pos = context.find(marker, line_end)
+
+def parse_context_records(context: str) -> list[FileRecord]:
+    """
+    Splits a rendered codebase context back into per-file records.
+    Text before the first header (or a context without headers) becomes a
+    record with an empty path.
+    """
+    if not isinstance(context, str):
+        raise TypeError("Context must be a string")
+    records = []
+    headers = list(_iter_headers(context))
+    head = context[:headers[0][0]] if headers else context
+    if head.strip():
+        records.append(FileRecord(path="", content=head))
+    for i, (_, body_start, path) in enumerate(headers):
+        end = headers[i + 1][0] if i + 1 < len(headers) else len(context)
+        body = context[body_start:end]
+        # render() appends "\n" and the context joins records with "\n"
+        if body.endswith("\n\n"):
+            body = body[:-2]
+        elif body.endswith("\n"):
+            body = body[:-1]
+        records.append(FileRecord(path=path, content=body))
+    return records
+
+def _blocks(content: str) -> list[str]:
+    """Groups lines into top-level blocks (a definition plus its body)."""
+    blocks: list[str] = []
+    current: list[str] = []
+    for line in content.splitlines(keepends=True):
+        # Keep decorators attached to the definition that follows them
+        if current and BOUNDARY_RE.match(line) and not current[-1].startswith("@"):
+            blocks.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+def _fill(units: Iterable[str], budget_chars: int) -> list[str]:
+    """Greedily concatenates units into pieces of at most budget_chars."""
+    pieces: list[str] = []
+    current = ""
+    for unit in units:
+        if current and len(current) + len(unit) > budget_chars:
+            pieces.append(current)
+            current = ""
+        current += unit
+    if current:
+        pieces.append(current)
+    return pieces
+
+def group_blocks(content: str, budget_chars: int) -> list[str]:
+    """
+    Cuts a file into pieces of whole top-level blocks, each up to about
+    `budget_chars` (a single larger block stays one piece). Used for
+    retrieval segments, where no piece has to fit a hard limit.
+    """
+    return _fill(_blocks(content), budget_chars)
+
+def split_record(record: FileRecord, limit: int, estimate: Callable[[str], int]) -> list[FileRecord]:
+    """
+    Splits one oversized file into parts that each fit within `limit` tokens,
+    preferring top-level definition boundaries, then line boundaries, and
+    slicing raw characters only for single lines longer than the limit.
+    """
+    content_tokens = max(1, estimate(record.content))
+    chars_per_token = max(1.0, len(record.content) / content_tokens)
+    # Leave room for the "--- FILE: path (part i/n) ---" header
+    header_tokens = estimate(FileRecord(record.path, "").render()) + 4 if record.path else 0
+    budget_chars = max(1, int(max(1, limit - header_tokens) * chars_per_token))
+
+    units: list[str] = []
+    for block in _blocks(record.content):
+        if len(block) <= budget_chars:
+            units.append(block)
+            continue
+        for line in block.splitlines(keepends=True):
+            if len(line) <= budget_chars:
+                units.append(line)
+            else:
+                units.extend(line[i:i + budget_chars] for i in range(0, len(line), budget_chars))
+
+    pieces = _fill(units, budget_chars)
+    if len(pieces) == 1 or not record.path:
+        return [FileRecord(record.path, piece) for piece in pieces]
+    return [
+        FileRecord(f"{record.path} (part {i}/{len(pieces)})", piece)
+        for i, piece in enumerate(pieces, 1)
+    ]
+
+def pack_records(records: list[FileRecord], limit: int, estimate: Callable[[str], int]) -> list[str]:
+    """
+    Bin-packs file records into the fewest chunks of at most `limit` tokens
+    (best-fit decreasing). Files are never cut unless they alone exceed the
+    limit; within a chunk, records keep their original order.
+    """
+    if limit <= 0:
+        raise ValueError("Chunk token limit must be positive")
+
+    items: list[tuple[int, FileRecord]] = []
+    for record in records:
+        size = max(1, estimate(record.render()))
+        if size <= limit:
+            items.append((size, record))
+        else:
+            items.extend((max(1, estimate(part.render())), part) for part in split_record(record, limit, estimate))
+
+    order = sorted(range(len(items)), key=lambda i: -items[i][0])
+    bins: list[list[int]] = []
+    # Sorted (remaining capacity, bin index) pairs for best-fit lookup
+    free: list[tuple[int, int]] = []
+    for i in order:
+        size = items[i][0]
+        pos = bisect.bisect_left(free, (size, -1))
+        if pos < len(free):
+            remaining, b = free.pop(pos)
+            bins[b].append(i)
+            bisect.insort(free, (remaining - size, b))
+        else:
+            bins.append([i])
+            bisect.insort(free, (max(0, limit - size), len(bins) - 1))
+
+    return ["\n".join(items[i][1].render() for i in sorted(b)) for b in bins]
+
+# Chunks the streaming packer keeps open while waiting for files that fit
+OPEN_BINS = 4
+
+def pack_stream(records: Iterable[FileRecord], limit: int, estimate: Callable[[str], int], open_bins: int = OPEN_BINS) -> Iterator[str]:
+    """
+    Streaming counterpart of pack_records: packs records as they arrive into
+    at most `open_bins` open chunks (best fit) and yields the fullest one
+    whenever a record fits none of them. Memory stays bounded by
+    `open_bins` chunks however long the input is, at the cost of slightly
+    more chunks than packing everything at once.
+    """
+    if limit <= 0:
+        raise ValueError("Chunk token limit must be positive")
+
+    # Open chunks: remaining capacity and rendered records in arrival order
+    remaining: list[int] = []
+    contents: list[list[str]] = []
+    for record in records:
+        size = max(1, estimate(record.render()))
+        items = [(size, record)] if size <= limit else [
+            (max(1, estimate(part.render())), part) for part in split_record(record, limit, estimate)
+        ]
+        for size, item in items:
+            fitting = [b for b in range(len(remaining)) if remaining[b] >= size]
+            if fitting:
+                b = min(fitting, key=lambda i: remaining[i])
+            else:
+                if len(remaining) >= max(1, open_bins):
+                    fullest = min(range(len(remaining)), key=lambda i: remaining[i])
+                    remaining.pop(fullest)
+                    yield "\n".join(contents.pop(fullest))
+                remaining.append(limit)
+                contents.append([])
+                b = len(remaining) - 1
+            remaining[b] = max(0, remaining[b] - size)
+            contents[b].append(item.render())
+    for rendered in contents:
+        yield "\n".join(rendered)
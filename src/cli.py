@@ -1,23 +1,48 @@
 import argparse
+import importlib
 import sys
-from typing import Literal, cast
+from typing import TYPE_CHECKING, Any, Callable, Literal, cast
 from rich.console import Console
-from .profile_gen import generate_profile
-from .architect import scaffold_project, fix_code, explain_code
-from .repo_tools import optimize_topics, generate_descriptions
-from .issue_gen import create_issue
-from .audit import run_audit
-from .sage import ask_sage
-from .committer import suggest_commits
-from .forge import forge_pr
-from .helper import run_helper
+from .cache import set_cache_enabled
+from . import telemetry
+
+if TYPE_CHECKING:
+    from .profiling import PhaseProfiler
 
 Mode = Literal["fast", "smart"]
 console = Console()
 
+# Subcommand -> "module:function". Modules are imported only when their
+# command runs, so --help and light commands skip the SDK and prompt stack.
+COMMANDS: dict[str, str] = {
+    "profile": "profile_gen:generate_profile",
+    "topics": "repo_tools:optimize_topics",
+    "describe": "repo_tools:generate_descriptions",
+    "issue": "issue_gen:create_issue",
+    "scaffold": "architect:scaffold_project",
+    "fix": "architect:fix_code",
+    "explain": "architect:explain_code",
+    "audit": "audit:run_audit",
+    "sage": "sage:ask_sage",
+    "commit": "committer:suggest_commits",
+    "forge": "forge:forge_pr",
+    "helper": "helper:run_helper",
+}
+
+def load_command(name: str) -> Callable[..., Any]:
+    """
+    Imports the module behind a subcommand and returns its entry point.
+    """
+    module_name, func_name = COMMANDS[name].split(":")
+    module = importlib.import_module(f".{module_name}", __package__)
+    return cast(Callable[..., Any], getattr(module, func_name))
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Git-Alchemist: AI-powered Git Operations")
     parser.add_argument("--smart", action="store_true", help="Use high-end Gemini Pro models (slower/lower quota)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the local response cache for this run")
+    parser.add_argument("--profile", action="store_true", help="Print per-phase timings (scan, chunking, map, reduce, git/gh, rendering) after the command")
+    parser.add_argument("--profile-out", metavar="FILE", help="Also write a cProfile/pstats dump of the run to FILE (implies --profile)")
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
     
     # Helper Command
@@ -32,6 +57,8 @@ def main() -> None:
     # Sage Command
     sage_parser = subparsers.add_parser("sage", help="Ask the Sage questions about your codebase")
     sage_parser.add_argument("question", help="The question about your code")
+    sage_parser.add_argument("--skeleton", action="store_true", help="Send Python files as skeletons (signatures, classes, docstrings) to fit one request")
+    sage_parser.add_argument("--expand", action="append", default=[], metavar="SYMBOL", help="Keep the full body of a function, class or Class.method in skeleton mode (repeatable)")
 
     # Audit Command
     audit_parser = subparsers.add_parser("audit", help="Check repository 'Gold' status and metadata")
@@ -64,6 +91,17 @@ def main() -> None:
     explain_parser = subparsers.add_parser("explain", help="Explain code or concepts")
     explain_parser.add_argument("context", help="The code or concept to explain")
 
+    # Cache Command
+    cache_parser = subparsers.add_parser("cache", help="Show or clear the local AI response cache")
+    cache_parser.add_argument("--clear", action="store_true", help="Remove every cached response")
+
+    # Token Calibration Command
+    subparsers.add_parser("calibrate", help="Compare token estimates with actual API usage")
+
+    # Telemetry Command
+    stats_parser = subparsers.add_parser("stats", help="Summarize latency, quota failures and token spend per command")
+    stats_parser.add_argument("--clear", action="store_true", help="Delete the recorded trace")
+
     args = parser.parse_args()
     
     # Check if a command was selected
@@ -72,31 +110,194 @@ def main() -> None:
         return
 
     mode: Mode = cast(Mode, "smart" if args.smart else "fast")
-    
+
+    if args.no_cache:
+        set_cache_enabled(False)
+
+    telemetry.set_command(args.command)
+
+    if not (args.profile or args.profile_out):
+        run_command(args, mode)
+        return
+    from .profiling import PhaseProfiler, profiled
+    profiler = PhaseProfiler()
+    try:
+        with profiled(args.profile_out, profiler):
+            run_command(args, mode)
+    finally:
+        show_profile(profiler, args.profile_out)
+
+def run_command(args: argparse.Namespace, mode: Mode) -> None:
+    """
+    Dispatches the parsed subcommand.
+    """
     if args.command == "profile":
-        generate_profile(args.user, args.force, mode=mode)
+        load_command("profile")(args.user, args.force, mode=mode)
     elif args.command == "topics":
-        optimize_topics(args.user, mode=mode)
+        load_command("topics")(args.user, mode=mode)
     elif args.command == "describe":
-        generate_descriptions(args.user, mode=mode)
+        load_command("describe")(args.user, mode=mode)
     elif args.command == "issue":
-        create_issue(args.idea, mode=mode)
+        load_command("issue")(args.idea, mode=mode)
     elif args.command == "scaffold":
-        scaffold_project(args.instruction, mode=mode)
+        load_command("scaffold")(args.instruction, mode=mode)
     elif args.command == "fix":
-        fix_code(args.file, args.instruction, mode=mode)
+        load_command("fix")(args.file, args.instruction, mode=mode)
     elif args.command == "explain":
-        explain_code(args.context, mode=mode)
+        load_command("explain")(args.context, mode=mode)
     elif args.command == "audit":
-        run_audit(repo_name=args.repo)
+        load_command("audit")(repo_name=args.repo)
     elif args.command == "sage":
-        ask_sage(args.question, mode=mode)
+        load_command("sage")(args.question, mode=mode, skeleton=args.skeleton, expand=args.expand)
     elif args.command == "commit":
-        suggest_commits(mode=mode)
+        load_command("commit")(mode=mode)
     elif args.command == "forge":
-        forge_pr(mode=mode)
+        load_command("forge")(mode=mode)
     elif args.command == "helper":
-        run_helper(mode=mode)
+        load_command("helper")(mode=mode)
+    elif args.command == "cache":
+        show_cache(clear=args.clear)
+    elif args.command == "calibrate":
+        show_calibration()
+    elif args.command == "stats":
+        show_stats(clear=args.clear)
+
+def show_cache(clear: bool = False) -> None:
+    """
+    Prints response cache statistics, optionally clearing it first.
+    """
+    from .cache import get_response_cache
+    cache = get_response_cache()
+    if cache is None:
+        console.print("[yellow]Response cache is disabled.[/yellow]")
+        return
+    if clear:
+        cache.clear()
+        console.print("[green]Response cache cleared.[/green]")
+    _print_store_stats("Cache", cache.stats())
+    show_github_cache(clear=clear)
+
+def show_github_cache(clear: bool = False) -> None:
+    """
+    Prints the GitHub conditional-request cache statistics and the last
+    rate-limit headers seen per resource.
+    """
+    import time
+    from .http_cache import get_http_cache
+    cache = get_http_cache()
+    if cache is None:
+        return
+    if clear:
+        cache.clear()
+    _print_store_stats("GitHub cache", cache.stats())
+    for resource, limit in sorted(cache.rate_limits().items()):
+        resets = max(0, limit["reset"] - int(time.time())) // 60
+        console.print(f"  Rate limit ({resource}): {limit['remaining']}/{limit['limit']} remaining, resets in {resets} min")
+
+def _print_store_stats(title: str, stats: dict[str, Any]) -> None:
+    """Prints a SQLiteStore's size and lifetime hit rate."""
+    lookups = stats["lifetime_hits"] + stats["lifetime_misses"]
+    hit_rate = (stats["lifetime_hits"] / lookups * 100) if lookups else 0.0
+    console.print(f"[cyan]{title}:[/cyan] {stats['path']}")
+    console.print(f"  Entries: {stats['entries']} ({stats['bytes'] / 1024:.1f} KiB of {stats['max_bytes'] / (1024 * 1024):.0f} MiB)")
+    console.print(f"  Hits: {stats['lifetime_hits']}  Misses: {stats['lifetime_misses']}  Hit rate: {hit_rate:.1f}%")
+
+def show_calibration() -> None:
+    """
+    Prints the token estimator calibration report per content type.
+    """
+    from rich.table import Table
+    from .tokens import calibration_report
+    report = calibration_report()
+    if not report:
+        console.print("[yellow]No usage samples recorded yet. Run a few commands first.[/yellow]")
+        return
+
+    table = Table(title="Token Estimator Calibration", border_style="blue")
+    table.add_column("Content", style="cyan")
+    table.add_column("Samples", justify="right")
+    table.add_column("Estimated", justify="right")
+    table.add_column("Actual", justify="right")
+    table.add_column("Error", justify="right")
+    table.add_column("Chars/Token", justify="right")
+    for content_type, row in report.items():
+        table.add_row(
+            content_type,
+            f"{row['samples']:.0f}",
+            f"{row['estimated']:.0f}",
+            f"{row['actual']:.0f}",
+            f"{row['error'] * 100:+.1f}%",
+            f"{row['chars_per_token']:.2f}",
+        )
+    console.print(table)
+
+def show_stats(clear: bool = False) -> None:
+    """
+    Prints per-command aggregates of the recorded telemetry trace.
+    """
+    from rich.table import Table
+    tracer = telemetry.get_tracer()
+    if clear:
+        tracer.clear()
+        console.print("[green]Telemetry trace cleared.[/green]")
+        return
+    summary = telemetry.summarize([s for s in tracer.load() if s.get("command") != "stats"])
+    if not summary:
+        console.print("[yellow]No telemetry recorded yet. Run a few commands first.[/yellow]")
+        return
+
+    table = Table(title="Command Telemetry", border_style="blue")
+    table.add_column("Command", style="cyan")
+    table.add_column("Runs", justify="right")
+    table.add_column("Calls", justify="right")
+    table.add_column("p50", justify="right")
+    table.add_column("p95", justify="right")
+    table.add_column("Hops", justify="right")
+    table.add_column("429s", justify="right")
+    table.add_column("Err", justify="right")
+    table.add_column("In est/act", justify="right")
+    table.add_column("Out", justify="right")
+    table.add_column("Cache", justify="right")
+    table.add_column("Procs", justify="right")
+    table.add_column("GitHub", justify="right")
+    for command, row in summary.items():
+        table.add_row(
+            command,
+            f"{row['runs']:.0f}",
+            f"{row['calls']:.0f}",
+            f"{row['p50_ms'] / 1000:.2f}s",
+            f"{row['p95_ms'] / 1000:.2f}s",
+            f"{row['fallbacks']:.0f}",
+            f"{row['quota_failures']:.0f}",
+            f"{row['errors']:.0f}",
+            f"{row['estimated_tokens']:.0f}/{row['prompt_tokens']:.0f}",
+            f"{row['output_tokens']:.0f}",
+            f"{row['cache_hits']:.0f}/{row['cache_lookups']:.0f}",
+            f"{row['subprocesses']:.0f}/{row['subprocess_ms'] / 1000:.1f}s",
+            f"{row['github_calls']:.0f} ({row['github_cache_hits']:.0f}/{row['github_cache_lookups']:.0f})",
+        )
+    console.print(table)
+    console.print("[gray]Hops: fallbacks to a later model. Cache: hits/lookups. Procs: subprocesses/total time. GitHub: requests (cache hits/lookups).[/gray]")
+    console.print(f"[gray]Trace: {', '.join(tracer.files())}[/gray]")
+
+def show_profile(profiler: "PhaseProfiler", dump_path: str | None = None) -> None:
+    """
+    Prints the phase timings collected by --profile.
+    """
+    from rich.table import Table
+    table = Table(title=f"Profile ({profiler.wall:.2f}s wall)", border_style="blue")
+    table.add_column("Phase", style="cyan")
+    table.add_column("Count", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Mean", justify="right")
+    table.add_column("% of wall", justify="right")
+    for name, count, total in profiler.report():
+        share = total / profiler.wall * 100 if profiler.wall else 0.0
+        table.add_row(name, str(count), f"{total:.3f}s", f"{total / count:.3f}s", f"{share:.0f}%")
+    console.print(table)
+    console.print("[gray]Phases nest (map includes chunking and model calls) and concurrent calls can add up past the wall time.[/gray]")
+    if dump_path:
+        console.print(f"[gray]cProfile stats written to {dump_path} (python -m pstats {dump_path})[/gray]")
 
 if __name__ == "__main__":
     main()
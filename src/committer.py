@@ -3,13 +3,13 @@ from typing import Optional
 from rich.console import Console
 from rich.prompt import Prompt
 from .core import generate_content
-from .utils import run_shell
+from .git_session import get_git_session
 
 console = Console()
 
 def get_staged_diff() -> Optional[str]:
     """Returns the diff of staged changes."""
-    return run_shell("git diff --cached", check=False)
+    return get_git_session().diff("--cached")
 
 def suggest_commits(mode: str = "fast") -> None:
     """
@@ -20,7 +20,7 @@ def suggest_commits(mode: str = "fast") -> None:
     if not diff:
         console.print("[yellow]No staged changes found.[/yellow]")
         if Prompt.ask("Stage all changes now? (git add .)", choices=["y", "n"], default="y") == "y":
-            run_shell("git add .")
+            get_git_session().run("add", ".")
             diff = get_staged_diff()
         else:
             return
@@ -62,6 +62,6 @@ Instructions:
     if choice != "c":
         selected_msg = clean_options[int(choice)-1]
         console.print(f"[green]Committing with message:[/green] {selected_msg}")
-        run_shell(f'git commit -m "{selected_msg}"')
+        get_git_session().run("commit", "-m", selected_msg)
     else:
         console.print("[yellow]Commit aborted.[/yellow]")
\ No newline at end of file
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable
+from rich.console import Console
+from .cache import get_cache_dir
+from . import telemetry
+
+console = Console()
+
+# Lifetime requested for server-side caches (seconds)
+DEFAULT_CONTEXT_TTL = 3600.0
+# A handle this close to expiry is replaced instead of reused
+EXPIRY_MARGIN = 60.0
+# Contexts smaller than this are cheaper to send inline (Gemini also
+# rejects caches below a model-specific minimum)
+MIN_CACHED_TOKENS = 4096
+# Model families with no server-side context caching (Gemma): never asked
+UNCACHED_MODEL_PREFIXES = ("gemma-",)
+# A model that refused a cache is asked again after this long (seconds)
+UNSUPPORTED_RECHECK = 7 * 24 * 3600.0
+
+_STATUS_RE = re.compile(r"\b(4\d\d)\b")
+# Client errors that are worth retrying: request timeout, rate limit
+_TRANSIENT_STATUSES = (408, 429)
+
+def supports_context_cache(model: str) -> bool:
+    """False for model families known to have no context caching."""
+    return not model.startswith(UNCACHED_MODEL_PREFIXES)
+
+def is_unsupported_error(error: Exception) -> bool:
+    """
+    True for a client error (4xx other than 408/429): resending the same
+    cache request would fail the same way. Network failures, 408s, 429s
+    and 5xx are transient.
+    """
+    status = getattr(error, "code", None)
+    if not isinstance(status, int):
+        match = _STATUS_RE.search(str(error))
+        status = int(match.group(1)) if match else None
+    return status is not None and 400 <= status < 500 and status not in _TRANSIENT_STATUSES
+
+def render_cached_context(context: str) -> str:
+    """The cached text: identical to the inline "\n\nCONTEXT:\n..." suffix."""
+    return f"CONTEXT:\n{context}"
+
+class ContextCache:
+    """
+    Registers a large context with the provider's server-side cache once and
+    hands out its handle to later prompts. Handles are kept per (provider,
+    model, workspace) and persisted, so a later run with unchanged files
+    reuses them; when the context changes the stale cache is deleted and a
+    new one registered. Models that rejected a cache are persisted too and
+    not asked again for UNSUPPORTED_RECHECK.
+    """
+
+    def __init__(self, path: str | None = None, ttl: float = DEFAULT_CONTEXT_TTL, clock: Callable[[], float] = time.time) -> None:
+        self.path = path
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, Any]] = {}
+        # "provider|model" -> when the model rejected a cache
+        self._unsupported: dict[str, float] = {}
+        self._load()
+
+    def handle(self, provider: Any, model: str, context: str, workspace: str | None = None) -> str | None:
+        """
+        Returns a handle for `context` on `model`, creating the server-side
+        cache if needed. Returns None when caching is unavailable, in which
+        case the caller sends the context inline.
+        """
+        if not supports_context_cache(model):
+            return None
+        key = f"{provider.name}|{model}|{workspace or os.getcwd()}"
+        digest = hashlib.sha256(context.encode("utf-8", "replace")).hexdigest()
+        with self._lock:
+            rejected = self._unsupported.get(f"{provider.name}|{model}")
+            if rejected is not None and rejected + UNSUPPORTED_RECHECK > self._clock():
+                return None
+            entry = self._entries.get(key)
+            if entry and entry["digest"] == digest and entry["expires"] > self._clock() + EXPIRY_MARGIN:
+                return str(entry["handle"])
+
+        with telemetry.span("context_cache", model=model) as span:
+            if entry:
+                # The files changed (or the cache is about to expire): drop it
+                try:
+                    provider.delete_context_cache(entry["handle"])
+                except Exception:
+                    pass
+                span.set(replaced=True)
+            unsupported = False
+            try:
+                handle = provider.create_context_cache(model, render_cached_context(context), self.ttl)
+                if handle is None:
+                    unsupported = True
+                    span.set(outcome="unsupported")
+            except Exception as e:
+                handle = None
+                unsupported = is_unsupported_error(e)
+                span.set(outcome="unsupported" if unsupported else "error", error=str(e)[:200])
+                if not unsupported:
+                    # Transient (network, 429, 5xx): inline this time, try again next time
+                    console.print(f"[dim]Context cache unavailable for {model} ({str(e)[:120]}); sending the context inline.[/dim]")
+
+        with self._lock:
+            if handle is None:
+                if unsupported:
+                    self._unsupported[f"{provider.name}|{model}"] = self._clock()
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = {"digest": digest, "handle": handle, "expires": self._clock() + self.ttl}
+        self._save()
+        return handle
+
+    def invalidate(self, handle: str) -> None:
+        """Forgets a handle the server no longer recognises."""
+        with self._lock:
+            self._entries = {k: v for k, v in self._entries.items() if v["handle"] != handle}
+        self._save()
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict):
+            return
+        if "entries" not in data:
+            # Written before unsupported models were persisted: handles only
+            data = {"entries": data}
+        now = self._clock()
+        self._entries = {k: v for k, v in data["entries"].items() if float(v.get("expires", 0.0)) > now}
+        self._unsupported = {
+            k: float(v) for k, v in data.get("unsupported", {}).items()
+            if float(v) + UNSUPPORTED_RECHECK > now
+        }
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            now = self._clock()
+            data = {
+                "entries": {k: v for k, v in self._entries.items() if v["expires"] > now},
+                "unsupported": {k: v for k, v in self._unsupported.items() if v + UNSUPPORTED_RECHECK > now},
+            }
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+_context_cache: ContextCache | None = None
+_context_cache_lock = threading.Lock()
+
+def get_context_cache() -> ContextCache | None:
+    """
+    Returns the process-wide context cache, or None when disabled with
+    ALCHEMIST_NO_CONTEXT_CACHE. ALCHEMIST_CONTEXT_CACHE_TTL sets the lifetime.
+    """
+    global _context_cache
+    if os.getenv("ALCHEMIST_NO_CONTEXT_CACHE"):
+        return None
+    with _context_cache_lock:
+        if _context_cache is None:
+            try:
+                path: str | None = os.path.join(get_cache_dir(), "context_caches.json")
+            except OSError:
+                path = None
+            try:
+                ttl = float(os.getenv("ALCHEMIST_CONTEXT_CACHE_TTL", DEFAULT_CONTEXT_TTL))
+            except ValueError:
+                ttl = DEFAULT_CONTEXT_TTL
+            _context_cache = ContextCache(path, ttl=ttl)
+        return _context_cache
+
+def reset_context_cache() -> None:
+    """Forgets the process-wide context cache (the next call reloads handles)."""
+    global _context_cache
+    with _context_cache_lock:
+        _context_cache = None
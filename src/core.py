@@ -1,14 +1,27 @@
+import asyncio
+import itertools
 import os
 import sys
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from google import genai
-from dotenv import load_dotenv
 from rich.console import Console
-from typing import Any
+from typing import Any, Awaitable, Callable, Coroutine, Generator, Iterable, Iterator, TypeVar
+from .cache import get_response_cache, make_cache_key
+from .scheduler import get_scheduler
+from .breaker import get_breaker
+from .tokens import get_estimator, record_usage
+from .chunking import pack_records, pack_stream, parse_context_records
+from .models import FileRecord
+from .providers import Completion, FakeProvider, GeminiProvider, Provider
+from .context_cache import MIN_CACHED_TOKENS, get_context_cache, supports_context_cache
+from .retrieval import prefilter_context
+from .snapshot import get_snapshot
+from . import telemetry
 
 console = Console()
 
+T = TypeVar("T")
+
 # User-specified model tiers
 SMART_MODELS = [
     "gemini-3-flash",
@@ -26,37 +39,175 @@ FAST_MODELS = [
 SAFE_TOKEN_LIMIT_FAST = 12000
 SAFE_TOKEN_LIMIT_SMART = 230000 
 
-# Heuristic: ~4 characters per token
-CHARS_PER_TOKEN = 4
+# Per-request timeout (seconds) for the async engine
+REQUEST_TIMEOUT = float(os.getenv("ALCHEMIST_REQUEST_TIMEOUT", "120"))
+
+# Keep-alive expiry (seconds) for pooled API connections
+KEEPALIVE_EXPIRY = 60.0
+
+# With a query, the map step only sees this many chunks' worth of the most
+# relevant code (0 disables the prefilter)
+PREFILTER_CHUNKS = int(os.getenv("ALCHEMIST_PREFILTER_CHUNKS", "4"))
+
+# Shown in place of an answer when every model failed
+NO_ANSWER = "No relevant information found in the provided context."
+
+# Rate-limit waits shorter than this pass without a notice (seconds)
+WAIT_NOTICE_MIN_SECONDS = 1.0
+
+_clients: dict[tuple[str, str | None, int], Any] = {}
+_clients_lock = threading.Lock()
+_env_loaded = False
+_loop: asyncio.AbstractEventLoop | None = None
+_provider: Provider | None = None
+_provider_lock = threading.Lock()
+_wait_notice_until = 0.0
+_wait_notice_lock = threading.Lock()
+
+def get_pool_size() -> int:
+    """
+    Connection pool size per client. Defaults to the scheduler's concurrency
+    so every admitted request can reuse a warm connection.
+    """
+    raw = os.getenv("ALCHEMIST_POOL_SIZE")
+    if raw:
+        try:
+            return max(1, int(raw))
+        except ValueError:
+            pass
+    return get_scheduler().max_concurrency
 
 def get_gemini_client() -> Any:
-    load_dotenv()
+    """
+    Returns the process-wide genai client. The .env file is parsed once and
+    clients are registered per (api key, base url, pool size), each with
+    keep-alive httpx pools so repeated calls skip connection setup.
+    """
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
     api_key = os.getenv("GEMINI_API_KEY")
     if not api_key:
         console.print("[bold red]Error:[/bold red] GEMINI_API_KEY not found.")
         sys.exit(1)
-    return genai.Client(api_key=api_key, http_options={'api_version':'v1alpha'})
+    base_url = os.getenv("GEMINI_BASE_URL")
+    pool_size = get_pool_size()
+    key = (api_key, base_url, pool_size)
+
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            # The SDK is imported on first use so commands that never call
+            # the API (audit, cache, stats, --help) start without it
+            import httpx
+            from google import genai
+
+            limits = httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            )
+            from google.genai import types
+
+            http_options = types.HttpOptions(
+                api_version='v1alpha',
+                httpx_client=httpx.Client(limits=limits, timeout=REQUEST_TIMEOUT),
+                httpx_async_client=httpx.AsyncClient(limits=limits, timeout=REQUEST_TIMEOUT),
+            )
+            if base_url:
+                http_options.base_url = base_url
+            client = genai.Client(api_key=api_key, http_options=http_options)
+            _clients[key] = client
+        return client
+
+def reset_clients() -> None:
+    """Drops every registered client (the next call builds fresh pools)."""
+    with _clients_lock:
+        _clients.clear()
+
+def get_provider() -> Provider:
+    """
+    Returns the process-wide LLM provider. ALCHEMIST_PROVIDER=fake selects the
+    deterministic offline backend (configured through ALCHEMIST_FAKE_*).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if os.getenv("ALCHEMIST_PROVIDER", "gemini") == "fake":
+                _provider = FakeProvider.from_env()
+            else:
+                _provider = GeminiProvider(get_gemini_client())
+        return _provider
+
+def set_provider(provider: Provider | None) -> None:
+    """Installs a provider for the process (None restores the default on next use)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
 
 def estimate_tokens(text: str) -> int:
     """
-    Estimates token count using a simple character heuristic.
+    Estimates token count with the active estimator (per-content-type
+    heuristic by default, see src/tokens.py).
     """
     if not text:
         return 0
-    return len(text) // CHARS_PER_TOKEN
+    return get_estimator().estimate(text)
+
+def record_response_usage(prompt: str, completion: Completion) -> None:
+    """
+    Feeds the actual prompt token count from a response into calibration.
+    """
+    if completion.prompt_tokens:
+        record_usage(prompt, completion.prompt_tokens)
 
 def split_context(context: str, limit: int) -> list[str]:
     """
     Splits context into chunks that fit within the token limit.
+    Files are kept whole and bin-packed into as few chunks as possible;
+    only files larger than the limit are cut, at definition/line boundaries.
+    """
+    if limit <= 0:
+        raise ValueError("Chunk token limit must be positive")
+    with telemetry.span("phase", name="chunking"):
+        estimate, snapshot = chunk_estimator()
+        chunks = pack_records(parse_context_records(context), limit, estimate)
+        if snapshot:
+            snapshot.save()
+        return chunks
+
+def split_records(records: Iterable[FileRecord], limit: int) -> Generator[str, None, None]:
+    """
+    Streaming counterpart of split_context: packs file records as they are
+    produced and yields each chunk once it is full, so only a few chunks are
+    in memory at a time (see chunking.pack_stream).
+    """
+    if limit <= 0:
+        raise ValueError("Chunk token limit must be positive")
+    estimate, snapshot = chunk_estimator()
+    yield from pack_stream(records, limit, estimate)
+    if snapshot:
+        snapshot.save()
+
+def chunk_estimator() -> tuple[Callable[[str], int], Any]:
     """
-    chunk_size = limit * CHARS_PER_TOKEN
-    return [context[i:i+chunk_size] for i in range(0, len(context), chunk_size)]
+    The estimator used for packing, memoized in the workspace snapshot when
+    the active estimator identifies itself, so per-file token counts persist
+    across runs. Returns the snapshot to save afterwards (or None).
+    """
+    snapshot = get_snapshot()
+    signature = getattr(get_estimator(), "signature", None)
+    if snapshot is None or not signature:
+        return estimate_tokens, None
+    return snapshot.memo_estimate(estimate_tokens, signature), snapshot
 
-def process_chunk(client: Any, chunk: str, prompt: str, models: list[str]) -> str | None:
+def build_chunk_prompt(chunk: str, prompt: str) -> str:
     """
-    Worker function to process a single chunk.
+    Wraps one chunk of context for the map step.
     """
-    chunk_prompt = f"""
+    return f"""
     Analyze the following part of the codebase context based on this instruction:
     "{prompt}"    
     PARTIAL CONTEXT:
@@ -66,13 +217,85 @@ def process_chunk(client: Any, chunk: str, prompt: str, models: list[str]) -> st
     
     Extract any relevant information found in this chunk. If nothing is relevant, say "Nothing relevant".
     """
-    return generate_with_fallback(client, chunk_prompt, models, silent=True)
 
-def generate_content(prompt: str, mode: str = "fast", context: str | None = None) -> str:
+def build_reduce_prompt(summaries: list[str], prompt: str) -> str:
+    """
+    Combines map-step findings into the final synthesis prompt.
+    """
+    combined_summaries = "\n".join(summaries)
+    return f"""
+        Here are the findings from analyzing different parts of the codebase:
+        
+        {combined_summaries}
+        
+        Based on these findings, answer the original user request:
+        {prompt}
+        """
+
+def build_merge_prompt(summaries: list[str], prompt: str) -> str:
+    """
+    Intermediate reduce prompt: condenses a group of findings without answering yet.
+    """
+    combined_summaries = "\n---\n".join(summaries)
+    return f"""
+        Merge the following findings from different parts of a codebase into one
+        condensed set of findings. Keep every concrete detail (file names, symbols,
+        behaviour) that is relevant to this request, drop duplicates, and do NOT
+        answer the request yet:
+        "{prompt}"
+
+        FINDINGS:
+        {combined_summaries}
+        """
+
+def group_by_budget(summaries: list[str], budget: int) -> list[list[str]]:
+    """
+    Groups consecutive summaries so each group fits within `budget` tokens.
+    Always returns fewer groups than summaries (pairing when nothing fits),
+    which guarantees the tree reduce makes progress.
+    """
+    groups: list[list[str]] = []
+    current: list[str] = []
+    used = 0
+    for summary in summaries:
+        size = estimate_tokens(summary) + 2  # "\n---\n" separator
+        if current and used + size > budget:
+            groups.append(current)
+            current, used = [], 0
+        current.append(summary)
+        used += size
+    if current:
+        groups.append(current)
+    if len(groups) >= len(summaries) and len(summaries) > 1:
+        groups = [summaries[i:i + 2] for i in range(0, len(summaries), 2)]
+    return groups
+
+def is_quota_error(err_msg: str) -> bool:
+    return "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg
+
+def lookup_cache(cache: Any, key: str) -> str | None:
+    """Response cache lookup, traced as a "cache" span."""
+    with telemetry.span("cache") as span:
+        value = cache.get(key)
+        span.set(outcome="hit" if value is not None else "miss")
+    return value
+
+def generate_content(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    query: str | None = None,
+    files: Iterable[FileRecord] | None = None,
+) -> str:
     """
     Generates content with strict model separation and parallel smart chunking.
+    `query` (the user's question) lets the map step skip irrelevant code.
+    Instead of a `context` string, `files` may stream file records: they are
+    chunked and mapped as they arrive, keeping memory bounded by chunk size.
     """
-    client = get_gemini_client()
+    if files is not None:
+        return run_async(generate_content_async(prompt, mode=mode, files=files))
+
     # Strict separation: Fast uses ONLY Gemma, Smart uses ONLY Gemini
     models = SMART_MODELS if mode == "smart" else FAST_MODELS
     
@@ -81,90 +304,602 @@ def generate_content(prompt: str, mode: str = "fast", context: str | None = None
     
     total_tokens = estimate_tokens(prompt) + estimate_tokens(context or "")
     
-    # 1. Smart Chunking (Map-Reduce) for large contexts
+    # 1. Smart Chunking (Map-Reduce) runs on the async engine so chunks overlap
     if context and total_tokens > safe_limit:
-        console.print(f"[yellow]Large context detected (~{total_tokens} tokens). Engaging Smart Chunking with {models[0]}...[/yellow]")
-        
-        chunks = split_context(context, safe_limit)
-        summaries = []
-        batch_size = 2 # Process 2 chunks in parallel
-        
-        with ThreadPoolExecutor(max_workers=batch_size) as executor:
-            # Iterate through chunks in batches
-            for i in range(0, len(chunks), batch_size):
-                batch = chunks[i:i + batch_size]
-                futures = []
-                
-                console.print(f"[cyan]Processing batch {i//batch_size + 1} ({len(batch)} chunks)...[/cyan]")
-                
-                for chunk in batch:
-                    futures.append(executor.submit(process_chunk, client, chunk, prompt, models))
-                
-                for future in as_completed(futures):
-                    try:
-                        res = future.result()
-                        if res and "Nothing relevant" not in res:
-                            summaries.append(res)
-                    except Exception as e:
-                        console.print(f"[red]Chunk processing failed:[/red] {e}")
-
-                # Delay between batches to respect rate limits (if not the last batch)
-                if i + batch_size < len(chunks):
-                    console.print("[gray]Pausing briefly for rate limits...[/gray]")
-                    time.sleep(2)
-
-        # REDUCE STEP
-        if not summaries:
-            return "No relevant information found in the provided context."
-            
-        console.print("[cyan]Synthesizing final answer...[/cyan]")
-        combined_summaries = "\n".join(summaries)
-        final_prompt = f"""
-        Here are the findings from analyzing different parts of the codebase:
-        
-        {combined_summaries}
-        
-        Based on these findings, answer the original user request:
-        {prompt}
-        """
-        result = generate_with_fallback(client, final_prompt, models)
-        return result or "No relevant information found in the provided context."
+        return run_async(generate_content_async(prompt, mode=mode, context=context, query=query))
 
     # 2. Standard Generation
+    provider = get_provider()
     full_prompt = f"{prompt}\n\nCONTEXT:\n{context}" if context else prompt
-    result = generate_with_fallback(client, full_prompt, models)
-    return result or "No relevant information found in the provived context."
+    result = generate_with_fallback(provider, full_prompt, models)
+    return result or NO_ANSWER
 
 def generate_with_fallback(
-    client: Any,
+    provider: Provider,
     prompt: str,
     models: list[str],
     silent: bool = False,
+    use_cache: bool = True,
 ) -> str | None:
     """
     Helper to try a list of models in order.
+    Identical (tier, prompt) pairs are served from the response cache.
     """
-    for model_name in models:
-        try:
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(models, prompt) if cache else ""
+    if cache:
+        cached = lookup_cache(cache, cache_key)
+        if cached is not None:
             if not silent:
-                console.print(f"[gray]Attempting with {model_name}...[/gray]")
-            response = client.models.generate_content(
-                model=model_name,
-                contents=prompt
-            )
-            if response and response.text:
-                return response.text
-        except Exception as e:
-            err_msg = str(e)
-            if "429" in err_msg or "RESOURCE_EXHAUSTED" in err_msg:
-                if not silent:
-                    console.print(f"[yellow]Quota/TPM hit for {model_name}. Trying next...[/yellow]")
-                continue
-            else:
+                console.print("[gray]Served from response cache.[/gray]")
+            return cached
+
+    scheduler = get_scheduler()
+    breaker = get_breaker()
+    prompt_tokens = estimate_tokens(prompt)
+    candidates = breaker.available(models)
+    if not silent and len(candidates) < len(models):
+        skipped = [m for m in models if m not in candidates]
+        console.print(f"[gray]Skipping cooling-down models: {', '.join(skipped)}[/gray]")
+
+    for attempt, model_name in enumerate(candidates):
+        with scheduler.slot(model_name, prompt_tokens) as ticket, \
+                telemetry.span("model", model=model_name, attempt=attempt, est_tokens=prompt_tokens) as call:
+            try:
                 if not silent:
-                    console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
-                continue
+                    console.print(f"[gray]Attempting with {model_name}...[/gray]")
+                completion = provider.generate(model_name, prompt)
+                call.set(prompt_tokens=completion.prompt_tokens, output_tokens=completion.output_tokens)
+                if completion.text:
+                    breaker.record_success(model_name)
+                    record_response_usage(prompt, completion)
+                    if cache:
+                        cache.set(cache_key, completion.text)
+                    return completion.text
+                call.set(outcome="empty")
+            except Exception as e:
+                err_msg = str(e)
+                if is_quota_error(err_msg):
+                    ticket.throttled = True
+                    call.set(outcome="quota")
+                    cooldown = breaker.record_quota_error(model_name, err_msg)
+                    if not silent:
+                        console.print(f"[yellow]Quota/TPM hit for {model_name} (cooling down {cooldown:.0f}s). Trying next...[/yellow]")
+                    continue
+                else:
+                    breaker.record_failure(model_name)
+                    call.set(outcome="error")
+                    if not silent:
+                        console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+                    continue
                 
     if not silent:
         console.print("[bold red]Critical:[/bold red] All models exhausted or failed.")
     return None
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Runs a coroutine from synchronous code (the CLI commands are synchronous).
+    One event loop is reused for the whole process so pooled async
+    connections stay valid between calls.
+    """
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+async def gather_bounded(
+    aws: Iterable[Awaitable[T]],
+    limit: int,
+    timeout: float | None = None,
+) -> list[T | BaseException]:
+    """
+    Awaits many awaitables with at most `limit` running at once.
+    Results keep input order; failures (including per-task timeouts) are
+    returned in place as exceptions. Cancelling the caller cancels every task.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run_one(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            if timeout is None:
+                return await aw
+            return await asyncio.wait_for(aw, timeout)
+
+    tasks = [asyncio.ensure_future(run_one(aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks, return_exceptions=True)
+    except asyncio.CancelledError:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+def notify_rate_limit_wait(delay: float) -> None:
+    """
+    Tells the user requests are held back by the rate limiter. Concurrent
+    callers blocked over the same window share one notice; short waits
+    (concurrency polling) print nothing.
+    """
+    global _wait_notice_until
+    if delay < WAIT_NOTICE_MIN_SECONDS:
+        return
+    now = time.monotonic()
+    with _wait_notice_lock:
+        if now < _wait_notice_until:
+            return
+        _wait_notice_until = now + delay
+    console.print(f"[dim]Waiting {delay:.0f}s for rate limit...[/dim]")
+
+async def generate_with_fallback_async(
+    provider: Provider,
+    prompt: str,
+    models: list[str],
+    silent: bool = False,
+    use_cache: bool = True,
+    timeout: float | None = REQUEST_TIMEOUT,
+) -> str | None:
+    """
+    Async counterpart of generate_with_fallback using the genai async provider.
+    A model that exceeds `timeout` is treated like any other failure. Each
+    attempt goes to the first remaining model with rate-limit budget, so a
+    drained bucket on one model does not stall the call while another could
+    serve it.
+    """
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_cache_key(models, prompt) if cache else ""
+    if cache:
+        cached = lookup_cache(cache, cache_key)
+        if cached is not None:
+            return cached
+
+    scheduler = get_scheduler()
+    breaker = get_breaker()
+    prompt_tokens = estimate_tokens(prompt)
+    remaining = breaker.available(models)
+    for attempt in range(len(remaining)):
+        model_name = await scheduler.acquire_any_async(remaining, prompt_tokens, on_wait=notify_rate_limit_wait)
+        remaining.remove(model_name)
+        throttled = False
+        with telemetry.span("model", model=model_name, attempt=attempt, est_tokens=prompt_tokens) as call:
+            try:
+                if not silent:
+                    console.print(f"[gray]Attempting with {model_name}...[/gray]")
+                completion = await asyncio.wait_for(provider.generate_async(model_name, prompt), timeout)
+                call.set(prompt_tokens=completion.prompt_tokens, output_tokens=completion.output_tokens)
+                if completion.text:
+                    breaker.record_success(model_name)
+                    record_response_usage(prompt, completion)
+                    if cache:
+                        cache.set(cache_key, completion.text)
+                    return completion.text
+                call.set(outcome="empty")
+            except asyncio.TimeoutError:
+                call.set(outcome="timeout")
+                breaker.record_failure(model_name)
+                if not silent:
+                    console.print(f"[yellow]{model_name} timed out after {timeout}s. Trying next...[/yellow]")
+            except Exception as e:
+                err_msg = str(e)
+                throttled = is_quota_error(err_msg)
+                if throttled:
+                    call.set(outcome="quota")
+                    cooldown = breaker.record_quota_error(model_name, err_msg)
+                else:
+                    call.set(outcome="error")
+                    breaker.record_failure(model_name)
+                if not silent:
+                    if throttled:
+                        console.print(f"[yellow]Quota/TPM hit for {model_name} (cooling down {cooldown:.0f}s). Trying next...[/yellow]")
+                    else:
+                        console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+            finally:
+                scheduler.release(model_name, throttled=throttled)
+
+    if not silent:
+        console.print("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    return None
+
+async def process_chunk_async(provider: Provider, chunk: str, prompt: str, models: list[str]) -> str | None:
+    """
+    Worker coroutine to process a single chunk.
+    """
+    with telemetry.span("chunk", est_tokens=estimate_tokens(chunk)) as span:
+        result = await generate_with_fallback_async(provider, build_chunk_prompt(chunk, prompt), models, silent=True)
+        if not result:
+            span.set(outcome="failed")
+        elif "Nothing relevant" in result:
+            span.set(outcome="irrelevant")
+    return result
+
+def prefilter(context: str, query: str, limit: int) -> str:
+    """
+    Narrows a large context to the code segments that rank best (BM25)
+    against the query, within PREFILTER_CHUNKS chunks of `limit` tokens.
+    """
+    budget = PREFILTER_CHUNKS * limit
+    if PREFILTER_CHUNKS <= 0 or estimate_tokens(context) <= budget:
+        return context
+    with telemetry.span("phase", name="prefilter") as span:
+        filtered, kept, total = prefilter_context(context, query, budget, estimate_tokens)
+        span.set(kept=kept, segments=total)
+    if kept < total:
+        console.print(f"[cyan]Relevance prefilter kept {kept} of {total} code segments.[/cyan]")
+    return filtered
+
+async def map_chunks(
+    provider: Provider,
+    context: str,
+    prompt: str,
+    models: list[str],
+    safe_limit: int,
+    query: str | None = None,
+) -> list[str]:
+    """
+    Map step: splits the context and runs every chunk concurrently.
+    With a `query`, only the most relevant code is mapped.
+    Returns the relevant findings.
+    """
+    with telemetry.span("phase", name="map"):
+        if query:
+            context = prefilter(context, query, safe_limit)
+        chunks = split_context(context, safe_limit)
+        scheduler = get_scheduler()
+        console.print(f"[cyan]Processing {len(chunks)} chunks (up to {scheduler.max_concurrency} in flight)...[/cyan]")
+
+        # The scheduler admits each chunk as RPM/TPM budget allows and shrinks
+        # concurrency on 429s, so every chunk can be submitted up front.
+        results = await gather_bounded(
+            (process_chunk_async(provider, chunk, prompt, models) for chunk in chunks),
+            limit=scheduler.max_concurrency,
+        )
+    summaries = []
+    for res in results:
+        if isinstance(res, BaseException):
+            console.print(f"[red]Chunk processing failed:[/red] {res}")
+        elif res and "Nothing relevant" not in res:
+            summaries.append(res)
+    return summaries
+
+async def map_records(
+    provider: Provider,
+    records: Iterable[FileRecord],
+    prompt: str,
+    models: list[str],
+    safe_limit: int,
+) -> list[str]:
+    """
+    Streaming map step: pulls chunks from split_records only when a slot in
+    the scheduler's concurrency frees up, so the chunks held at once (and the
+    files read ahead of them) stay bounded however large the repository is.
+    Returns the relevant findings in chunk order.
+    """
+    with telemetry.span("phase", name="map") as span:
+        chunks: Generator[str, None, None] = split_records(records, safe_limit)
+        scheduler = get_scheduler()
+        console.print(f"[cyan]Streaming chunks to the map step (up to {scheduler.max_concurrency} in flight)...[/cyan]")
+        slots = asyncio.Semaphore(max(1, scheduler.max_concurrency))
+        tasks: list[asyncio.Future[str | None]] = []
+        try:
+            while True:
+                await slots.acquire()
+                # Reading and packing files is blocking work; keep the loop free for in-flight chunks
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    slots.release()
+                    break
+                future = asyncio.ensure_future(process_chunk_async(provider, chunk, prompt, models))
+                future.add_done_callback(lambda _: slots.release())
+                tasks.append(future)
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            try:
+                chunks.close()
+            except ValueError:
+                pass  # still running in its worker thread after a cancellation
+        span.set(chunks=len(tasks))
+    summaries = []
+    for res in results:
+        if isinstance(res, BaseException):
+            console.print(f"[red]Chunk processing failed:[/red] {res}")
+        elif res and "Nothing relevant" not in res:
+            summaries.append(res)
+    return summaries
+
+def inline_or_stream(files: Iterable[FileRecord], budget: int) -> tuple[str | None, Iterator[FileRecord]]:
+    """
+    Reads records until they exceed `budget` tokens. Returns their joined
+    context if the whole stream fit (a single request suffices), otherwise
+    None and an iterator over every record, buffered ones included.
+    """
+    iterator = iter(files)
+    buffered: list[FileRecord] = []
+    used = 0
+    for record in iterator:
+        buffered.append(record)
+        used += estimate_tokens(record.render())
+        if used > budget:
+            return None, itertools.chain(buffered, iterator)
+    return "\n".join(r.render() for r in buffered), iter(())
+
+async def generate_content_async(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    query: str | None = None,
+    files: Iterable[FileRecord] | None = None,
+) -> str:
+    """
+    Async counterpart of generate_content. The map step fans out every chunk
+    at once, bounded by the scheduler's concurrency. With `files`, chunks are
+    packed and mapped as records arrive (the BM25 prefilter needs the whole
+    corpus, so `query` only applies to a `context` string).
+    """
+    result = await generate_answer_async(prompt, mode=mode, context=context, query=query, files=files)
+    return result or NO_ANSWER
+
+async def generate_answer_async(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    query: str | None = None,
+    files: Iterable[FileRecord] | None = None,
+) -> str | None:
+    """
+    Like generate_content_async, but returns None instead of the NO_ANSWER
+    placeholder when no model produced an answer.
+    """
+    provider = get_provider()
+    models = SMART_MODELS if mode == "smart" else FAST_MODELS
+    safe_limit = SAFE_TOKEN_LIMIT_SMART if mode == "smart" else SAFE_TOKEN_LIMIT_FAST
+
+    summaries: list[str] | None = None
+    if files is not None:
+        context, stream = inline_or_stream(files, safe_limit - estimate_tokens(prompt))
+        if context is None:
+            console.print(f"[yellow]Large codebase detected. Engaging Smart Chunking with {models[0]}...[/yellow]")
+            summaries = await map_records(provider, stream, prompt, models, safe_limit)
+
+    total_tokens = estimate_tokens(prompt) + estimate_tokens(context or "")
+
+    if summaries is None and context and total_tokens > safe_limit:
+        console.print(f"[yellow]Large context detected (~{total_tokens} tokens). Engaging Smart Chunking with {models[0]}...[/yellow]")
+        summaries = await map_chunks(provider, context, prompt, models, safe_limit, query=query)
+
+    if summaries is not None:
+        # REDUCE STEP
+        if not summaries:
+            return None
+        return await reduce_summaries(provider, summaries, prompt, models, safe_limit)
+
+    full_prompt = f"{prompt}\n\nCONTEXT:\n{context}" if context else prompt
+    return await generate_with_fallback_async(provider, full_prompt, models)
+
+async def reduce_to_prompt(
+    provider: Provider,
+    summaries: list[str],
+    prompt: str,
+    models: list[str],
+    limit: int,
+    level: int = 1,
+) -> str | None:
+    """
+    Hierarchical reduce: merges limit-sized groups of findings in parallel,
+    recursing until the final synthesis prompt fits in one request, and
+    returns that prompt. Depth grows logarithmically with the findings.
+    """
+    final_prompt = build_reduce_prompt(summaries, prompt)
+    if len(summaries) == 1 or estimate_tokens(final_prompt) <= limit:
+        return final_prompt
+
+    budget = max(1, limit - estimate_tokens(build_merge_prompt([], prompt)))
+    groups = group_by_budget(summaries, budget)
+    console.print(f"[cyan]Reduce level {level}: merging {len(summaries)} findings in {len(groups)} groups...[/cyan]")
+    results = await gather_bounded(
+        (generate_with_fallback_async(provider, build_merge_prompt(group, prompt), models, silent=True) for group in groups),
+        limit=get_scheduler().max_concurrency,
+    )
+    merged = []
+    for group, res in zip(groups, results):
+        if isinstance(res, str) and res:
+            merged.append(res)
+        else:
+            console.print(f"[red]Merging {len(group)} findings failed; they are dropped from this level.[/red]")
+    if not merged:
+        return None
+    return await reduce_to_prompt(provider, merged, prompt, models, limit, level + 1)
+
+async def reduce_summaries(
+    provider: Provider,
+    summaries: list[str],
+    prompt: str,
+    models: list[str],
+    limit: int,
+) -> str | None:
+    """
+    Reduces map findings to the final answer (see reduce_to_prompt).
+    """
+    with telemetry.span("phase", name="reduce"):
+        final_prompt = await reduce_to_prompt(provider, summaries, prompt, models, limit)
+        if final_prompt is None:
+            return None
+        console.print("[cyan]Synthesizing final answer...[/cyan]")
+        return await generate_with_fallback_async(provider, final_prompt, models)
+
+def generate_many(
+    prompts: list[str],
+    mode: str = "fast",
+    contexts: list[str | None] | None = None,
+    concurrency: int | None = None,
+) -> list[str | None]:
+    """
+    Runs many independent prompts concurrently from synchronous code.
+    Returns one result per prompt (None where generation failed).
+    """
+    contexts = contexts if contexts is not None else [None] * len(prompts)
+    limit = concurrency or get_scheduler().max_concurrency
+
+    async def run_all() -> list[str | None | BaseException]:
+        return await gather_bounded(
+            (generate_answer_async(p, mode=mode, context=c) for p, c in zip(prompts, contexts)),
+            limit=limit,
+        )
+
+    results = run_async(run_all())
+    return [None if isinstance(r, BaseException) else r for r in results]
+
+def generate_content_stream(
+    prompt: str,
+    mode: str = "fast",
+    context: str | None = None,
+    title: str | None = None,
+    cache_context: bool = False,
+    query: str | None = None,
+) -> str:
+    """
+    Like generate_content, but renders the answer token by token as it
+    arrives and reports time-to-first-token. For large contexts the map and
+    reduce steps run as usual and only the final synthesis is streamed.
+    `title` is printed just before the first token. Returns the full text.
+    With `cache_context`, a context that fits in one request is registered
+    with the server-side context cache and referenced by handle, so repeated
+    questions about the same codebase do not upload it again (skipped for
+    models without context caching, like fast mode's Gemma). `query`
+    enables the relevance prefilter for the map step.
+    """
+    provider = get_provider()
+    models = SMART_MODELS if mode == "smart" else FAST_MODELS
+    safe_limit = SAFE_TOKEN_LIMIT_SMART if mode == "smart" else SAFE_TOKEN_LIMIT_FAST
+
+    total_tokens = estimate_tokens(prompt) + estimate_tokens(context or "")
+    final_prompt: str | None
+    shared_context: str | None = None
+    if context and total_tokens > safe_limit:
+        console.print(f"[yellow]Large context detected (~{total_tokens} tokens). Engaging Smart Chunking with {models[0]}...[/yellow]")
+
+        async def map_reduce() -> str | None:
+            summaries = await map_chunks(provider, context, prompt, models, safe_limit, query=query)
+            if not summaries:
+                return None
+            with telemetry.span("phase", name="reduce"):
+                return await reduce_to_prompt(provider, summaries, prompt, models, safe_limit)
+
+        final_prompt = run_async(map_reduce())
+    elif context and cache_context and any(supports_context_cache(m) for m in models) and estimate_tokens(context) >= MIN_CACHED_TOKENS:
+        final_prompt, shared_context = prompt, context
+    else:
+        final_prompt = f"{prompt}\n\nCONTEXT:\n{context}" if context else prompt
+
+    result = stream_with_fallback(provider, final_prompt, models, title=title, context=shared_context) if final_prompt else None
+    if not result:
+        if title:
+            console.print(title)
+        result = NO_ANSWER
+        console.print(result)
+    return result
+
+def stream_with_fallback(
+    provider: Provider,
+    prompt: str,
+    models: list[str],
+    title: str | None = None,
+    context: str | None = None,
+) -> str | None:
+    """
+    Streams a response to the console, trying models in order. A model is
+    only abandoned for the next one if it fails before producing output.
+    `context` is referenced through the server-side context cache where the
+    model supports it, and appended to the prompt otherwise.
+    """
+    full_prompt = f"{prompt}\n\nCONTEXT:\n{context}" if context else prompt
+    context_cache = get_context_cache() if context else None
+    cache = get_response_cache()
+    cache_key = make_cache_key(models, full_prompt) if cache else ""
+    if cache:
+        cached = lookup_cache(cache, cache_key)
+        if cached is not None:
+            if title:
+                console.print(title)
+            console.print(cached, markup=False, highlight=False)
+            console.print("[gray]Served from response cache.[/gray]")
+            return cached
+
+    scheduler = get_scheduler()
+    breaker = get_breaker()
+    prompt_tokens = estimate_tokens(full_prompt)
+    rendering = 0.0
+    for attempt, model_name in enumerate(breaker.available(models)):
+        parts: list[str] = []
+        handle = context_cache.handle(provider, model_name, context) if context_cache and context else None
+        with scheduler.slot(model_name, prompt_tokens) as ticket, \
+                telemetry.span("model", model=model_name, attempt=attempt, est_tokens=prompt_tokens, stream=True,
+                               cached_context=handle is not None) as call:
+            start = time.perf_counter()
+            first_token_at: float | None = None
+            last_chunk: Completion | None = None
+            complete = False
+            try:
+                console.print(f"[gray]Streaming from {model_name}...[/gray]")
+                stream = provider.stream(model_name, prompt, cached_content=handle) if handle else provider.stream(model_name, full_prompt)
+                for chunk in stream:
+                    text = chunk.text
+                    if not text:
+                        continue
+                    if first_token_at is None:
+                        first_token_at = time.perf_counter()
+                        if title:
+                            console.print(title)
+                    parts.append(text)
+                    last_chunk = chunk
+                    render_start = time.perf_counter()
+                    console.print(text, end="", markup=False, highlight=False, soft_wrap=True)
+                    rendering += time.perf_counter() - render_start
+                complete = True
+            except Exception as e:
+                err_msg = str(e)
+                if not parts:
+                    if is_quota_error(err_msg):
+                        ticket.throttled = True
+                        call.set(outcome="quota")
+                        cooldown = breaker.record_quota_error(model_name, err_msg)
+                        console.print(f"[yellow]Quota/TPM hit for {model_name} (cooling down {cooldown:.0f}s). Trying next...[/yellow]")
+                    else:
+                        breaker.record_failure(model_name)
+                        call.set(outcome="error")
+                        console.print(f"[red]Error with {model_name}:[/red] {err_msg}")
+                        if handle and context_cache:
+                            # Possibly expired or deleted server-side; re-register next time
+                            context_cache.invalidate(handle)
+                    continue
+                # Output already reached the user: keep the partial answer
+                call.set(outcome="interrupted")
+                console.print(f"\n[red]Stream interrupted:[/red] {err_msg}")
+            if not parts:
+                call.set(outcome="empty")
+            call.set(
+                ttft_ms=round((first_token_at - start) * 1000, 2) if first_token_at else None,
+                prompt_tokens=last_chunk.prompt_tokens if last_chunk else None,
+                output_tokens=last_chunk.output_tokens if last_chunk else None,
+            )
+
+        if parts:
+            end = time.perf_counter()
+            console.print()
+            console.print(f"[gray]Time to first token: {(first_token_at or end) - start:.2f}s, total: {end - start:.2f}s[/gray]")
+            text = "".join(parts)
+            telemetry.get_tracer().record("phase", rendering, name="rendering")
+            breaker.record_success(model_name)
+            if last_chunk:
+                record_response_usage(full_prompt, last_chunk)
+            if cache and complete:
+                cache.set(cache_key, text)
+            return text
+
+    console.print("[bold red]Critical:[/bold red] All models exhausted or failed.")
+    return None
@@ -7,6 +7,7 @@ from rich.console import Console
 from rich.prompt import Confirm
 from .core import generate_content
 from .utils import run_shell, check_gh_auth, parse_json_response
+from .git_session import get_git_session
 
 console = Console()
 
@@ -30,18 +31,15 @@ def get_open_issues() -> str:
 def get_branch_diff(base_branch: str = "master") -> Tuple[Optional[str], str]:
     """Gets the diff between the current branch and the base branch."""
     try:
+        git = get_git_session()
         # If base_branch is not provided or invalid, try to detect it
         if not base_branch:
-             remote_info = run_shell("git remote show origin", check=False)
-             if remote_info:
-                 for line in remote_info.splitlines():
-                     if "HEAD branch" in line:
-                         base_branch = line.split(":")[-1].strip()
-                         break
-             if not base_branch:
-                 base_branch = "master"
-             
-        return run_shell(f"git diff {base_branch}...HEAD", check=False), base_branch
+             base_branch = git.default_branch() or "master"
+
+        # Fall back to the remote-tracking branch when there is no local copy
+        if not git.resolve(base_branch) and git.resolve(f"origin/{base_branch}"):
+            return git.diff(f"origin/{base_branch}...HEAD"), base_branch
+        return git.diff(f"{base_branch}...HEAD"), base_branch
     except Exception:
         return None, "master"
 
@@ -50,7 +48,8 @@ def handle_uncommitted_changes(mode: str = "fast") -> bool:
     Checks for uncommitted changes, creates a branch, and commits them.
     Returns True if a new branch was created and changes committed.
     """
-    status = run_shell("git status --porcelain", check=False)
+    git = get_git_session()
+    status = git.status()
     if not status:
         return False
 
@@ -61,14 +60,14 @@ def handle_uncommitted_changes(mode: str = "fast") -> bool:
     new_branch = f"forge-{timestamp}"
     
     # Create and switch to new branch
-    run_shell(f"git checkout -b {new_branch}")
+    git.run("checkout", "-b", new_branch)
     console.print(f"[green]Switched to new branch: {new_branch}[/green]")
     
     # Stage all changes
-    run_shell("git add .")
+    git.run("add", ".")
     
     # Generate commit message
-    diff = run_shell("git diff --staged", check=False)
+    diff = git.diff("--staged")
     if not diff:
         # Fallback if diff is somehow empty or large binary
         commit_msg = f"wip: auto-commit changes {timestamp}"
@@ -93,7 +92,7 @@ Constraint: Max 70 characters. No quotes. Start with a verb (e.g., 'fix:', 'feat
             commit_msg = f"wip: auto-commit changes {timestamp}"
 
     # Commit
-    run_shell(f'git commit -m "{commit_msg}"')
+    git.run("commit", "-m", commit_msg)
     console.print(f"[green]Committed changes:[/green] {commit_msg}")
     
     return True
@@ -111,17 +110,9 @@ def forge_pr(mode: str = "fast") -> None:
     handle_uncommitted_changes(mode=mode)
 
     # Detect base branch
-    base_branch = None
-    remote_info = run_shell("git remote show origin", check=False)
-    if remote_info:
-        for line in remote_info.splitlines():
-            if "HEAD branch" in line:
-                base_branch = line.split(":")[-1].strip()
-                break
-    
-    if not base_branch:
-        base_branch = "master"
-    
+    git = get_git_session()
+    base_branch = git.default_branch() or "master"
+
     diff, base = get_branch_diff(base_branch)
     
     if not diff:
@@ -132,7 +123,10 @@ def forge_pr(mode: str = "fast") -> None:
     
     # Fetch context
     open_issues = get_open_issues()
-    current_branch = run_shell("git rev-parse --abbrev-ref HEAD")
+    current_branch = git.current_branch()
+    if current_branch is None or current_branch == "HEAD":
+        console.print("[red]Could not determine the current branch (detached HEAD?). Check out a branch and try again.[/red]")
+        return
     
     prompt = f"""
 Task: Generate a professional GitHub Pull Request title and technical description.
@@ -194,7 +188,7 @@ Example Output:
         if os.getenv("FORGE_NO_CONFIRM") or Confirm.ask("Forge and open this PR on GitHub?"):
             # Ensure branch is pushed
             console.print(f"[gray]Pushing {current_branch} to origin...[/gray]")
-            run_shell(f"git push -u origin {current_branch} --force")
+            git.run("push", "-u", "origin", current_branch, "--force")
             
             # Create PR
             cmd = f'gh pr create --title "{title}" --body "{body}\n\n> Forged by Git-Alchemist ⚗️"'
@@ -209,12 +203,12 @@ Example Output:
             try:
                 # Ensure we have the latest base branch
                 console.print(f"[gray]Returning to {base.strip()}...[/gray]")
-                run_shell(f"git checkout {base.strip()}")
-                run_shell(f"git pull origin {base.strip()}", check=False)
+                git.run("checkout", base.strip())
+                git.run("pull", "origin", base.strip())
                 
                 if current_branch != base.strip():
                     console.print(f"[gray]Deleting local branch {current_branch}...[/gray]")
-                    run_shell(f"git branch -D {current_branch}")
+                    git.run("branch", "-D", current_branch)
                     console.print(f"[green]Cleanup complete: Switched to {base.strip()} and deleted {current_branch}.[/green]")
             except Exception as cleanup_error:
                  console.print(f"[yellow]Warning: Cleanup failed ({cleanup_error}). You may still be on the forge branch.[/yellow]")
@@ -0,0 +1,197 @@
+import atexit
+import os
+import subprocess
+import sys
+import threading
+from typing import IO
+from . import telemetry
+
+# Subcommands that never move refs or touch the index; anything else makes
+# the long-lived cat-file readers restart so they see the new state
+READ_ONLY = {"diff", "status", "rev-parse", "log", "show", "ls-files", "cat-file"}
+
+class GitError(RuntimeError):
+    pass
+
+class _BatchReader:
+    """A `git cat-file --batch[-check]` process answering one query per line."""
+
+    def __init__(self, session: "GitSession", option: str) -> None:
+        self.process = session._spawn(["cat-file", option], stdin=subprocess.PIPE)
+
+    def query(self, name: str) -> tuple[str, str, int] | None:
+        """(sha, type, size) for `name`, or None if it does not resolve."""
+        stdin: IO[bytes] = self.process.stdin  # type: ignore[assignment]
+        stdout: IO[bytes] = self.process.stdout  # type: ignore[assignment]
+        stdin.write(name.encode("utf-8") + b"\n")
+        stdin.flush()
+        line = stdout.readline().decode("utf-8", "replace").rstrip("\n")
+        if not line:
+            raise GitError(f"git cat-file exited while reading {name!r}")
+        # "<name> missing" splits into three fields too when the name has a space
+        if line.endswith((" missing", " ambiguous")):
+            return None
+        sha, kind, size = line.split(" ")
+        return sha, kind, int(size)
+
+    def read(self, size: int) -> bytes:
+        stdout: IO[bytes] = self.process.stdout  # type: ignore[assignment]
+        data = stdout.read(size)
+        stdout.read(1)  # trailing newline
+        return data
+
+    def close(self) -> None:
+        if self.process.poll() is None:
+            self.process.stdin.close()  # type: ignore[union-attr]
+            self.process.wait()
+
+class GitSession:
+    """
+    Git access for one repository that avoids a process per question:
+    object and ref lookups go through long-lived `git cat-file --batch`
+    readers, the current and default branch are read straight from the git
+    directory, and everything else runs through one argv-based runner (no
+    shell, no shlex). `spawned` counts the git processes started.
+    """
+
+    def __init__(self, cwd: str | None = None) -> None:
+        self.cwd = os.path.abspath(cwd or os.getcwd())
+        self.spawned = 0
+        self._lock = threading.Lock()
+        self._check: _BatchReader | None = None
+        self._batch: _BatchReader | None = None
+        self._dirs: tuple[str, str] | None = None
+        self._default_branch: str | None = None
+
+    def _spawn(self, args: list[str], **kwargs) -> subprocess.Popen:
+        self.spawned += 1
+        telemetry.get_tracer().record("subprocess", 0, tool="git", subcommand=args[0], persistent=True)
+        return subprocess.Popen(["git", *args], cwd=self.cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, **kwargs)
+
+    def run(self, *args: str, check: bool = False, quiet: bool = False) -> str:
+        """
+        Runs `git <args>` and returns its stripped stdout. A failure's stderr
+        is printed (like run_shell) unless `quiet`; with `check` it raises
+        GitError instead.
+        """
+        self.spawned += 1
+        with telemetry.span("subprocess", tool="git", subcommand=args[0] if args else None) as span:
+            result = subprocess.run(
+                ["git", *args], cwd=self.cwd, capture_output=True, text=True, encoding="utf-8", errors="replace"
+            )
+            if result.returncode != 0:
+                span.set(outcome="error", exit_code=result.returncode)
+        if args and args[0] not in READ_ONLY:
+            self._restart()
+        if result.returncode != 0:
+            if check:
+                raise GitError(f"git {' '.join(args)} failed: {result.stderr.strip()}")
+            if result.stderr and not quiet:
+                print(f"[Git Error] git {' '.join(args)}: {result.stderr.strip()}", file=sys.stderr)
+        return result.stdout.strip()
+
+    def diff(self, *args: str) -> str:
+        """`git diff <args>`, e.g. diff("--cached") or diff("main...HEAD")."""
+        return self.run("diff", *args)
+
+    def status(self) -> str:
+        """Porcelain status; empty when the tree is clean."""
+        return self.run("status", "--porcelain")
+
+    def resolve(self, name: str) -> str | None:
+        """The object id `name` (a ref, sha or rev:path) points at, like rev-parse."""
+        with self._lock:
+            if self._check is None:
+                self._check = _BatchReader(self, "--batch-check")
+            found = self._check.query(name)
+        return found[0] if found else None
+
+    def read(self, name: str) -> bytes | None:
+        """Contents of the object `name` (e.g. "HEAD:src/app.py"), or None."""
+        with self._lock:
+            if self._batch is None:
+                self._batch = _BatchReader(self, "--batch")
+            found = self._batch.query(name)
+            return self._batch.read(found[2]) if found else None
+
+    def _git_dirs(self) -> tuple[str, str] | None:
+        """(git dir, common dir), or None outside a repository."""
+        if self._dirs is None:
+            lines = self.run("rev-parse", "--absolute-git-dir", "--git-common-dir", quiet=True).splitlines()
+            if len(lines) != 2:
+                return None
+            self._dirs = (lines[0], os.path.join(self.cwd, lines[1]))
+        return self._dirs
+
+    def _symref(self, path: str) -> str | None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                value = f.read().strip()
+        except OSError:
+            return None
+        return value[len("ref: "):] if value.startswith("ref: ") else None
+
+    def current_branch(self) -> str | None:
+        """
+        The checked-out branch name, "HEAD" when detached (like rev-parse
+        --abbrev-ref), or None outside a repository.
+        """
+        dirs = self._git_dirs()
+        if dirs is None:
+            return None
+        ref = self._symref(os.path.join(dirs[0], "HEAD"))
+        return ref.removeprefix("refs/heads/") if ref and ref.startswith("refs/heads/") else "HEAD"
+
+    def default_branch(self, remote: str = "origin") -> str | None:
+        """
+        The remote's default branch from refs/remotes/<remote>/HEAD; only if
+        that symref is missing does it ask the remote (`git remote show`).
+        """
+        dirs = self._git_dirs()
+        if dirs is None:
+            return None
+        if self._default_branch is None:
+            ref = self._symref(os.path.join(dirs[1], "refs", "remotes", remote, "HEAD"))
+            if ref:
+                self._default_branch = ref.removeprefix(f"refs/remotes/{remote}/")
+            else:
+                for line in self.run("remote", "show", remote, quiet=True).splitlines():
+                    if "HEAD branch" in line:
+                        self._default_branch = line.split(":")[-1].strip()
+                        break
+        return self._default_branch
+
+    def _restart(self) -> None:
+        with self._lock:
+            for reader in (self._check, self._batch):
+                if reader:
+                    reader.close()
+            self._check = self._batch = None
+        self._default_branch = None
+
+    def close(self) -> None:
+        self._restart()
+
+_session: GitSession | None = None
+_session_lock = threading.Lock()
+
+def get_git_session() -> GitSession:
+    """Returns the session for the current working directory."""
+    global _session
+    cwd = os.path.abspath(os.getcwd())
+    with _session_lock:
+        if _session is None or _session.cwd != cwd:
+            if _session is not None:
+                _session.close()
+            _session = GitSession(cwd)
+        return _session
+
+def reset_git_session() -> None:
+    """Closes the current session's git processes."""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+atexit.register(reset_git_session)
@@ -0,0 +1,369 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+from typing import Any, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+from .git_session import get_git_session
+from .http_cache import CachedResponse, ConditionalCache, get_http_cache, make_request_key
+from . import telemetry
+
+DEFAULT_API_URL = "https://api.github.com"
+API_VERSION = "2022-11-28"
+# Connections kept alive per host; matches the widest fan-out (issue uploads)
+POOL_SIZE = 8
+# Idempotent requests (GET, PUT, DELETE...) are retried on these statuses;
+# POST and PATCH are not, so an issue is never created twice
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+RETRIES = 3
+BACKOFF = 0.5
+TIMEOUT = 30
+# Repositories per GraphQL page; README texts make pages heavier
+REPO_PAGE_SIZE = 100
+REPO_PAGE_SIZE_WITH_README = 25
+# Cached GraphQL results are validated indirectly (see _repos_validator),
+# which misses deletions and renames; this bounds how long those linger
+GRAPHQL_TTL_SECONDS = 10 * 60
+# README paths tried in order (GraphQL has no "the readme" field)
+README_PATHS = ("README.md", "readme.md", "Readme.md", "README.rst", "README.txt", "README")
+TOPICS_PER_REPO = 20
+# Colour for labels created without one (gh picks a random colour)
+DEFAULT_LABEL_COLOR = "ededed"
+
+_REMOTE_RE = re.compile(r"github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$")
+
+_README_FIELDS = "\n        ".join(
+    f'readme{i}: object(expression: "HEAD:{path}") @include(if: $readme) {{ ... on Blob {{ text }} }}'
+    for i, path in enumerate(README_PATHS)
+)
+REPOS_QUERY = f"""
+query($first: Int!, $after: String, $privacy: RepositoryPrivacy, $readme: Boolean!) {{
+  viewer {{
+    repositories(first: $first, after: $after, privacy: $privacy, ownerAffiliations: OWNER,
+                 orderBy: {{field: PUSHED_AT, direction: DESC}}) {{
+      pageInfo {{ hasNextPage endCursor }}
+      nodes {{
+        name description url isPrivate isArchived stargazerCount
+        repositoryTopics(first: {TOPICS_PER_REPO}) {{ nodes {{ topic {{ name }} }} }}
+        {_README_FIELDS}
+      }}
+    }}
+  }}
+}}
+"""
+
+class GitHubError(RuntimeError):
+    def __init__(self, message: str, status: int | None = None) -> None:
+        super().__init__(message)
+        self.status = status
+
+def get_token() -> str | None:
+    """
+    GH_TOKEN or GITHUB_TOKEN, otherwise the token the gh CLI is logged in
+    with (`gh auth token`, run once per process).
+    """
+    token = os.getenv("GH_TOKEN") or os.getenv("GITHUB_TOKEN")
+    if token:
+        return token
+    try:
+        result = subprocess.run(["gh", "auth", "token"], capture_output=True, text=True, encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip() or None
+
+def repo_from_remote(url: str) -> tuple[str, str] | None:
+    """(owner, name) of a github.com remote URL (https or ssh)."""
+    match = _REMOTE_RE.search(url.strip())
+    return (match.group(1), match.group(2)) if match else None
+
+def _repo_record(repo: dict[str, Any]) -> dict[str, Any]:
+    """A REST repository in the shape RepoMetadata.from_dict expects (gh's --json names)."""
+    return {
+        "name": repo["name"],
+        "description": repo.get("description"),
+        "url": repo.get("html_url", ""),
+        "isPrivate": bool(repo.get("private")),
+        "isArchived": bool(repo.get("archived")),
+        "stargazerCount": repo.get("stargazers_count", 0),
+        "repositoryTopics": [{"name": t} for t in repo.get("topics") or []],
+        "licenseInfo": repo.get("license"),
+    }
+
+def _graphql_record(node: dict[str, Any]) -> dict[str, Any]:
+    record = {k: node.get(k) for k in ("name", "description", "url", "isPrivate", "isArchived", "stargazerCount")}
+    record["repositoryTopics"] = [{"name": t["topic"]["name"]} for t in (node.get("repositoryTopics") or {}).get("nodes", [])]
+    blobs = (node.get(f"readme{i}") for i in range(len(README_PATHS)))
+    record["readme"] = next((b["text"] for b in blobs if b and b.get("text") is not None), None)
+    return record
+
+def _from_cache(entry: CachedResponse, url: str) -> requests.Response:
+    """A 200 response rebuilt from a stored body (after a 304 or a sweep hit)."""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = entry.body
+    response.encoding = "utf-8"
+    response.headers = CaseInsensitiveDict({"Content-Type": entry.content_type})
+    if entry.etag:
+        response.headers["ETag"] = entry.etag
+    return response
+
+class GitHubClient:
+    """
+    In-process GitHub REST client: one pooled keep-alive requests.Session
+    authenticated with the gh token, with retries for idempotent requests.
+    With a `cache`, GETs are sent as conditional requests and 304s are
+    answered from it. Every request is traced as a "github" span, and the
+    latest rate-limit headers are kept per resource in `rate_limits`.
+    """
+
+    def __init__(
+        self, token: str | None, base_url: str = DEFAULT_API_URL, session: requests.Session | None = None,
+        retries: int = RETRIES, backoff: float = BACKOFF, cache: ConditionalCache | None = None,
+    ) -> None:
+        self.token = token
+        self.base_url = base_url.rstrip("/")
+        self.cache = cache
+        self.rate_limits: dict[str, dict[str, int]] = {}
+        # Cache entries are per account, never shared between tokens
+        self._identity = hashlib.sha256((token or "").encode()).hexdigest()[:16]
+        self.session = session or requests.Session()
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES, respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, max_retries=retry)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": API_VERSION,
+            "User-Agent": "git-alchemist",
+        })
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def request(self, method: str, path: str, ok: tuple[int, ...] = (), **kwargs: Any) -> requests.Response:
+        """
+        Sends one request to `path` (relative to the API root). Raises
+        GitHubError on a 4xx/5xx unless its status is listed in `ok`.
+        """
+        url = path if path.startswith("http") else f"{self.base_url}/{path.lstrip('/')}"
+        kwargs.setdefault("timeout", TIMEOUT)
+        key = entry = None
+        if self.cache is not None and method == "GET":
+            headers = dict(kwargs.pop("headers", None) or {})
+            prepared = requests.Request(method, url, params=kwargs.get("params")).prepare()
+            key = make_request_key(self._identity, method, prepared.url or url, headers.get("Accept", ""))
+            entry = self.cache.get(key)
+            if entry and entry.etag:
+                headers["If-None-Match"] = entry.etag
+            elif entry and entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+            kwargs["headers"] = headers
+        with telemetry.span("github", method=method, endpoint=path.split("?")[0]) as span:
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.RequestException as e:
+                span.set(outcome="error")
+                raise GitHubError(f"{method} {path} failed: {e}") from e
+            span.set(status=response.status_code)
+            self._note_rate_limit(response, span)
+            if key is not None and self.cache is not None:
+                if response.status_code == 304 and entry is not None:
+                    response = _from_cache(entry, url)
+                    span.set(cache="hit")
+                    self.cache.record(hit=True)
+                else:
+                    span.set(cache="miss")
+                    self.cache.record(hit=False)
+                    etag, modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+                    if response.status_code == 200 and (etag or modified):
+                        content_type = response.headers.get("Content-Type", "application/json")
+                        self.cache.set(key, CachedResponse(etag, modified, content_type, response.content))
+            if response.status_code >= 400 and response.status_code not in ok:
+                span.set(outcome="error")
+                try:
+                    message = response.json().get("message", response.text)
+                except ValueError:
+                    message = response.text
+                raise GitHubError(f"{method} {path} returned {response.status_code}: {message}", response.status_code)
+        return response
+
+    def _note_rate_limit(self, response: requests.Response, span: telemetry.Span) -> None:
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+        resource = response.headers.get("X-RateLimit-Resource", "core")
+        try:
+            limits = {
+                "remaining": int(remaining),
+                "limit": int(response.headers.get("X-RateLimit-Limit", 0)),
+                "reset": int(response.headers.get("X-RateLimit-Reset", 0)),
+            }
+        except ValueError:
+            return
+        self.rate_limits[resource] = limits
+        span.set(rate_resource=resource, rate_remaining=limits["remaining"])
+        if self.cache is not None:
+            self.cache.note_rate_limit(resource, limits["remaining"], limits["limit"], limits["reset"])
+
+    def get_json(self, path: str, **params: Any) -> Any:
+        return self.request("GET", path, params=params or None).json()
+
+    def user(self) -> dict[str, Any]:
+        """The authenticated user."""
+        return self.get_json("user")
+
+    def graphql(self, query: str, variables: dict[str, Any], validator: str | None = None) -> dict[str, Any]:
+        """
+        Runs a GraphQL query and returns its `data`; GraphQL errors raise
+        GitHubError. GitHub sends no ETags for GraphQL, so a result is only
+        reused when the caller passes a `validator` (see _repos_validator)
+        that matches the one it was stored under.
+        """
+        body = json.dumps({"query": query, "variables": variables}, sort_keys=True)
+        key = None
+        if self.cache is not None and validator:
+            key = make_request_key(self._identity, "POST", f"{self.base_url}/graphql", validator, body)
+            entry = self.cache.get(key, ttl=GRAPHQL_TTL_SECONDS)
+            if entry is not None:
+                self.cache.record(hit=True)
+                telemetry.get_tracer().record("github", 0, method="POST", endpoint="graphql", cache="hit")
+                return json.loads(entry.body)["data"]
+        payload = self.request("POST", "graphql", data=body, headers={"Content-Type": "application/json"}).json()
+        if payload.get("errors"):
+            raise GitHubError("GraphQL: " + "; ".join(e.get("message", "") for e in payload["errors"]))
+        if key is not None and self.cache is not None:
+            self.cache.record(hit=False)
+            self.cache.set(key, CachedResponse(None, None, "application/json", json.dumps(payload).encode()))
+        return payload["data"]
+
+    def _repos_validator(self) -> str | None:
+        """
+        ETags of the owner's most recently pushed and most recently updated
+        repository (conditional, so free against the rate limit when
+        unchanged). A push, a metadata edit or a new repository changes one
+        of them; deleting or renaming an older repository does not, so it
+        can linger in a cached sweep for up to GRAPHQL_TTL_SECONDS.
+        """
+        if self.cache is None:
+            return None
+        etags: list[str] = []
+        for sort in ("pushed", "updated"):
+            try:
+                response = self.request("GET", "user/repos", params={"affiliation": "owner", "sort": sort, "per_page": 1})
+            except GitHubError:
+                return None
+            etag = response.headers.get("ETag")
+            if not etag:
+                # Without both validators a cached sweep could never be revalidated
+                return None
+            etags.append(etag)
+        return "|".join(etags)
+
+    def iter_repos(self, visibility: str | None = "public", readme: bool = False) -> Iterator[dict[str, Any]]:
+        """
+        Every repository the authenticated user owns (like `gh repo list`,
+        newest push first, but with no cap), one GraphQL request per page.
+        Records use gh's --json names, so RepoMetadata.from_dict takes them
+        as they are; with `readme` each also carries its README text.
+        Pages are yielded as they arrive. With a cache, an unchanged account
+        (see _repos_validator) is served without any GraphQL request.
+        """
+        first = REPO_PAGE_SIZE_WITH_README if readme else REPO_PAGE_SIZE
+        privacy = visibility.upper() if visibility else None
+        validator = self._repos_validator()
+        after = None
+        while True:
+            variables = {"first": first, "after": after, "privacy": privacy, "readme": readme}
+            page = self.graphql(REPOS_QUERY, variables, validator)["viewer"]["repositories"]
+            for node in page["nodes"]:
+                yield _graphql_record(node)
+            if not page["pageInfo"]["hasNextPage"]:
+                return
+            after = page["pageInfo"]["endCursor"]
+
+    def get_repo(self, owner: str, name: str) -> dict[str, Any]:
+        return _repo_record(self.get_json(f"repos/{owner}/{name}"))
+
+    def readme(self, owner: str, name: str) -> str | None:
+        """The repository's README as raw text, or None if it has none."""
+        response = self.request("GET", f"repos/{owner}/{name}/readme", ok=(404,), headers={"Accept": "application/vnd.github.raw"})
+        return response.text if response.status_code != 404 else None
+
+    def edit_repo(self, owner: str, name: str, **fields: Any) -> dict[str, Any]:
+        """Updates repository settings, e.g. description="..."."""
+        return self.request("PATCH", f"repos/{owner}/{name}", json=fields).json()
+
+    def set_topics(self, owner: str, name: str, topics: list[str]) -> list[str]:
+        """Replaces the repository's topics (GitHub requires lowercase names)."""
+        names = list(dict.fromkeys(t.lower() for t in topics))
+        return self.request("PUT", f"repos/{owner}/{name}/topics", json={"names": names}).json().get("names", names)
+
+    def create_label(self, owner: str, name: str, label: str, color: str = DEFAULT_LABEL_COLOR) -> bool:
+        """
+        Creates a label; returns False if it already exists. Other validation
+        failures (a bad colour, a name that is too long) raise GitHubError.
+        """
+        path = f"repos/{owner}/{name}/labels"
+        response = self.request("POST", path, ok=(422,), json={"name": label, "color": color})
+        if response.status_code != 422:
+            return True
+        try:
+            errors = response.json().get("errors") or []
+        except ValueError:
+            errors = []
+        if any(isinstance(e, dict) and e.get("code") == "already_exists" for e in errors):
+            return False
+        details = "; ".join(
+            f"{e.get('field', '?')} {e.get('code', '?')}" if isinstance(e, dict) else str(e) for e in errors
+        )
+        raise GitHubError(f"POST {path} returned 422: Validation Failed" + (f" ({details})" if details else ""), 422)
+
+    def create_issue(self, owner: str, name: str, title: str, body: str, labels: list[str] | None = None) -> str:
+        """Opens an issue and returns its URL."""
+        payload = {"title": title, "body": body, "labels": labels or []}
+        return self.request("POST", f"repos/{owner}/{name}/issues", json=payload).json()["html_url"]
+
+    def create_pull(self, owner: str, name: str, title: str, body: str, head: str, base: str | None = None) -> str:
+        """Opens a pull request from `head` (into the default branch unless `base`) and returns its URL."""
+        base = base or self.get_json(f"repos/{owner}/{name}")["default_branch"]
+        payload = {"title": title, "body": body, "head": head, "base": base}
+        return self.request("POST", f"repos/{owner}/{name}/pulls", json=payload).json()["html_url"]
+
+    def close(self) -> None:
+        self.session.close()
+
+_client: GitHubClient | None = None
+_client_lock = threading.Lock()
+
+def get_github() -> GitHubClient:
+    """
+    Returns the process-wide client. ALCHEMIST_GITHUB_API_URL points it at
+    another API root (GitHub Enterprise, or a local fake in tests).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = GitHubClient(get_token(), os.getenv("ALCHEMIST_GITHUB_API_URL") or DEFAULT_API_URL, cache=get_http_cache())
+        return _client
+
+def set_github(client: GitHubClient | None) -> None:
+    """Installs a client (None restores the default on next use)."""
+    global _client
+    with _client_lock:
+        if _client is not None and _client is not client:
+            _client.close()
+        _client = client
+
+def current_repo() -> tuple[str, str] | None:
+    """(owner, name) of the current directory's origin remote, if it is on GitHub."""
+    url = get_git_session().run("remote", "get-url", "origin", quiet=True)
+    return repo_from_remote(url) if url else None
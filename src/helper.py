@@ -1,7 +1,7 @@
 from rich.console import Console
 from rich.prompt import Prompt
-from .core import generate_content
-from .utils import get_codebase_context
+from .core import generate_content_stream
+from .utils import get_codebase_context, get_codebase_fingerprint
 
 console = Console()
 
@@ -35,9 +35,8 @@ def run_helper(mode: str = "fast") -> None:
     
     # 1. Gather Context
     with console.status("[cyan]Reading directory context...[/cyan]"):
-        code_context = get_codebase_context()
-        if not code_context:
-            code_context = "No code found in repository."
+        fingerprint = get_codebase_fingerprint()
+        code_context = get_codebase_context() or "No code found in repository."
 
     # 2. Interactive Input
     while True:
@@ -50,6 +49,13 @@ def run_helper(mode: str = "fast") -> None:
         if not user_query.strip():
             continue
 
+        # Re-read only if files changed; a new context replaces the cached one
+        current = get_codebase_fingerprint()
+        if current != fingerprint:
+            with console.status("[cyan]Files changed, re-reading directory context...[/cyan]"):
+                fingerprint = current
+                code_context = get_codebase_context() or "No code found in repository."
+
         # 3. Construct Prompt (Without huge context inside)
         prompt = f"""
 {ALCHEMIST_MANUAL}
@@ -63,10 +69,14 @@ Instructions:
 3. Be helpful, concise, and technical.
 """
 
-        # 4. Generate Answer (Pass context separately)
-        with console.status("[magenta]Thinking...[/magenta]"):
-            response = generate_content(prompt, mode=mode, context=code_context)
-
-        if response:
-            console.print("\n[bold cyan]Alchemist Helper:[/bold cyan]")
-            console.print(response)
\ No newline at end of file
+        # 4. Stream Answer (Pass context separately)
+        console.print("[magenta]Thinking...[/magenta]")
+        # The context is uploaded once and referenced by handle on later turns
+        generate_content_stream(
+            prompt,
+            mode=mode,
+            context=code_context,
+            title="\n[bold cyan]Alchemist Helper:[/bold cyan]",
+            cache_context=True,
+            query=user_query,
+        )
\ No newline at end of file
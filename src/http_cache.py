@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from .cache import DEFAULT_TTL_SECONDS, SQLiteStore, cache_enabled, get_cache_dir
+
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+def make_request_key(identity: str, method: str, url: str, accept: str, body: str = "") -> str:
+    """
+    Key of one cacheable request. `identity` (a token hash) keeps different
+    accounts from sharing entries; `accept` separates raw and JSON reads.
+    """
+    digest = hashlib.sha256()
+    for part in (identity, method, url, accept, body):
+        data = part.encode("utf-8", "replace")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    content_type: str
+    body: bytes
+
+class ConditionalCache(SQLiteStore):
+    """
+    GitHub API responses with their validators (ETag and Last-Modified),
+    so repeated reads become conditional requests that GitHub answers with
+    a body-less 304 that does not count against the rate limit. Hits are
+    recorded by the client (a stored entry is only a hit once revalidated).
+    Also keeps the last rate-limit headers seen per resource, across runs.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL_SECONDS) -> None:
+        super().__init__(path, max_bytes=max_bytes, ttl=ttl)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_limits ("
+            "resource TEXT PRIMARY KEY, remaining INTEGER NOT NULL, lim INTEGER NOT NULL, reset INTEGER NOT NULL, seen REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, ttl: float | None = None) -> CachedResponse | None:
+        """The stored response for `key`, or None (see SQLiteStore.lookup for `ttl`)."""
+        value = self.lookup(key, ttl)
+        if not isinstance(value, bytes):
+            return None
+        # One JSON header line with the validators, then the raw body
+        header, _, body = value.partition(b"\n")
+        meta = json.loads(header)
+        return CachedResponse(meta["etag"], meta["last_modified"], meta["content_type"], body)
+
+    def set(self, key: str, response: CachedResponse) -> None:
+        header = json.dumps({"etag": response.etag, "last_modified": response.last_modified, "content_type": response.content_type})
+        self.store(key, header.encode("utf-8") + b"\n" + response.body)
+
+    def note_rate_limit(self, resource: str, remaining: int, limit: int, reset: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?)", (resource, remaining, limit, reset, time.time())
+            )
+            self._conn.commit()
+
+    def rate_limits(self) -> dict[str, dict[str, int]]:
+        """Last seen {"remaining", "limit", "reset"} per rate-limit resource (core, graphql...)."""
+        with self._lock:
+            rows = self._conn.execute("SELECT resource, remaining, lim, reset FROM rate_limits").fetchall()
+        return {r[0]: {"remaining": r[1], "limit": r[2], "reset": r[3]} for r in rows}
+
+_http_cache: ConditionalCache | None = None
+_http_cache_lock = threading.Lock()
+
+def get_http_cache() -> ConditionalCache | None:
+    """
+    Returns the process-wide GitHub response store, or None when caching is
+    disabled (--no-cache, ALCHEMIST_NO_CACHE) or the directory is not writable.
+    ALCHEMIST_GITHUB_CACHE_MAX_MB bounds its size.
+    """
+    global _http_cache
+    if not cache_enabled():
+        return None
+    with _http_cache_lock:
+        if _http_cache is None:
+            try:
+                max_bytes = int(float(os.getenv("ALCHEMIST_GITHUB_CACHE_MAX_MB", DEFAULT_MAX_BYTES / (1024 * 1024))) * 1024 * 1024)
+                _http_cache = ConditionalCache(os.path.join(get_cache_dir(), "github.sqlite3"), max_bytes=max_bytes)
+            except (OSError, ValueError, sqlite3.Error):
+                return None
+        return _http_cache
+
+def reset_http_cache() -> None:
+    """Forgets the process-wide store (the next call reopens it)."""
+    global _http_cache
+    with _http_cache_lock:
+        _http_cache = None
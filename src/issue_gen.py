@@ -1,13 +1,42 @@
+import asyncio
 import json
-import tempfile
-import os
 from typing import Literal
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell, get_codebase_context
+from .core import generate_content, gather_bounded, run_async
+from .utils import iter_codebase_files
+from .github import GitHubError, current_repo, get_github
 
 console = Console()
 
+# Concurrent uploads (requests share the GitHub client's connection pool)
+UPLOAD_CONCURRENCY = 4
+
+def upload_issue(issue: dict, repo: tuple[str, str]) -> bool:
+    """
+    Creates one draft issue (and its labels) on GitHub. Returns True on success.
+    """
+    title = f"[DRAFT] {issue.get('title')}"
+    body = f"{issue.get('body')}\n\n> Automated by Git-Alchemist"
+    label = issue.get('label', 'enhancement')
+    labels = ["status: draft", "automated", label]
+    github = get_github()
+
+    console.print(f"[yellow]Uploading Draft: {title}[/yellow]")
+
+    try:
+        # Create the issue-specific label if it doesn't exist
+        github.create_label(*repo, label)
+        if issue.get('easy'):
+            github.create_label(*repo, "good first issue", color="7057ff")
+            labels.append("good first issue")
+        url = github.create_issue(*repo, title=title, body=body, labels=labels)
+    except GitHubError as e:
+        console.print(f"[red]Failed to create issue: {title}[/red] [dim]{e}[/dim]")
+        return False
+
+    console.print(f"[dim]Created: {url}[/dim]")
+    return True
+
 def create_issue(idea: str, mode: Literal["fast", "smart"] = "fast") -> None:
     """
     Translates an idea into technical GitHub issue(s).
@@ -15,10 +44,11 @@ def create_issue(idea: str, mode: Literal["fast", "smart"] = "fast") -> None:
     # Heuristic: If the user wants to "find", "search", or "scan", we need context.
     needs_context = any(kw in idea.lower() for kw in ["find", "search", "scan", "identify", "check", "issues", "bugs", "todos", "fixme"])
     
-    context = None
+    files = None
     if needs_context:
         console.print("[cyan]Scanning codebase context for analysis...[/cyan]")
-        context = get_codebase_context()
+        # Streamed: files are read, chunked and mapped as the scan proceeds
+        files = iter_codebase_files()
 
     console.print(f"[cyan]Drafting technical issue(s) for: {idea} ({mode} mode)...[/cyan]")
     
@@ -51,7 +81,7 @@ Example Output:
 No markdown blocks.
 """
 
-    result = generate_content(prompt, mode=mode, context=context)
+    result = generate_content(prompt, mode=mode, files=files)
     if not result: return
 
     try:
@@ -72,51 +102,24 @@ No markdown blocks.
 
         console.print(f"[green]Generated {len(issues)} issue(s). Uploading...[/green]")
 
-        success_count = 0
-        for issue in issues:
-            title = f"[DRAFT] {issue.get('title')}"
-            body = f"{issue.get('body')}\n\n> Automated by Git-Alchemist"
-            label = issue.get('label', 'enhancement')
-            
-            console.print(f"[yellow]Uploading Draft: {title}[/yellow]")
-            
-            # Create labels if they don't exist
-            run_shell('gh label create "automated" --color "505050"', check=False, suppress_errors=True)
-            run_shell('gh label create "status: draft" --color "333333"', check=False, suppress_errors=True)
-            run_shell(f'gh label create "{label}"', check=False, suppress_errors=True)
-
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.md', delete=False) as tf:
-                tf.write(body)
-                temp_name = tf.name
-
-            cmd = [
-                'gh',
-                'issue',
-                'create',
-                '--title',
-                f'"{title}"',
-                '--body-file',
-                f'"{temp_name}"',
-                '--label',
-                '"status: draft"',
-                '--label',
-                '"automated"',
-                '--label',
-                f'"{label}"'
-            ]
-            
-            if issue.get('easy'):
-                run_shell('gh label create "good first issue" --color "7057ff"', check=False, suppress_errors=True)
-                cmd.extend(['--label', '"good first issue"'])
+        repo = current_repo()
+        if not repo:
+            console.print("[red]The origin remote is not a GitHub repository; cannot upload issues.[/red]")
+            return
 
-            output = run_shell(" ".join(cmd))
-            os.unlink(temp_name)
-            
-            if output and output.startswith("http"):
-                success_count += 1
-                console.print(f"[dim]Created: {output}[/dim]")
-            else:
-                console.print(f"[red]Failed to create issue: {title}[/red]")
+        # Shared labels only need creating once
+        github = get_github()
+        for name, color in (("automated", "505050"), ("status: draft", "333333")):
+            try:
+                github.create_label(*repo, name, color=color)
+            except GitHubError as e:
+                # One bad shared label must not stop the issues themselves being filed
+                console.print(f"[yellow]Could not create label '{name}':[/yellow] [dim]{e}[/dim]")
+
+        async def upload_all() -> list[bool | BaseException]:
+            return await gather_bounded((asyncio.to_thread(upload_issue, issue, repo) for issue in issues), limit=UPLOAD_CONCURRENCY)
+
+        success_count = sum(1 for ok in run_async(upload_all()) if ok is True)
         
         if success_count > 0:
             console.print(f"[green]Success! {success_count}/{len(issues)} issues created.[/green]")
@@ -23,6 +23,7 @@ class RepoMetadata:
     isArchived: bool = False
     stargazerCount: int = 0
     repositoryTopics: Optional[List[Topic]] = None
+    readme: Optional[str] = None
 
     @classmethod
     def from_dict(cls, data: Any) -> 'RepoMetadata':
@@ -61,6 +62,10 @@ class RepoMetadata:
                 raise TypeError("Repository 'repositoryTopics' must be a list if provided")
             topics = [Topic.from_dict(t) for t in raw_topics]
 
+        readme = data.get('readme')
+        if readme is not None and not isinstance(readme, str):
+            raise TypeError("Repository 'readme' must be a string if provided")
+
         return cls(
             name=name,
             description=description,
@@ -68,5 +73,17 @@ class RepoMetadata:
             isPrivate=isPrivate,
             isArchived=isArchived,
             stargazerCount=stargazerCount,
-            repositoryTopics=topics
+            repositoryTopics=topics,
+            readme=readme
         )
+
+@dataclass
+class FileRecord:
+    path: str
+    content: str
+
+    def render(self) -> str:
+        """Formats the record the way it appears in the codebase context."""
+        if not self.path:
+            return self.content
+        return f"--- FILE: {self.path} ---\n{self.content}\n"
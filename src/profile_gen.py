@@ -1,41 +1,31 @@
 import os
-import json
 import tempfile
 import shutil
 import re
 from pathlib import Path
-from typing import List, Literal, Dict, Any
+from typing import Iterable, Iterator, List, Literal, Dict, Any
 from rich.console import Console
 from rich.prompt import Confirm
 from .core import generate_content
 from .utils import run_shell, check_gh_auth, get_user_email
+from .github import GitHubError, get_github
 from .models import RepoMetadata
 
 console = Console()
 
-def fetch_repos(username: str) -> List[RepoMetadata]:
+def fetch_repos(username: str) -> Iterator[RepoMetadata]:
     """
-    Fetches public repositories for the user.
+    Streams every public repository of the user, page by page.
     """
     console.print("[cyan]Fetching repositories...[/cyan]")
-    cmd = 'gh repo list --visibility=public --limit 100 --json name,description,url,isPrivate,isArchived,stargazerCount'
     try:
-        output = run_shell(cmd)
-        if output is None:
-            console.print("[red]Failed to fetch repositories: gh command returned None[/red]")
-            return []
-            
-        raw_data = json.loads(output)
-        if not isinstance(raw_data, list):
-            raise ValueError("Unexpected JSON structure from gh CLI: expected a list")
-        
-        return [RepoMetadata.from_dict(item) for item in raw_data]
+        for item in get_github().iter_repos(visibility="public"):
+            yield RepoMetadata.from_dict(item)
     except Exception as e:
         console.print(f"[red]Error fetching or parsing repos:[/red] {e}")
-        return []
 
 def filter_repos(
-    repos: List[RepoMetadata], 
+    repos: Iterable[RepoMetadata], 
     username: str, 
     strategy: Literal["FULL_GEN", "SMART_UPDATE"]="FULL_GEN", 
     existing_content: str = ""
@@ -90,13 +80,13 @@ def generate_profile(
     
     try:
         console.print("[cyan]Checking for existing profile...[/cyan]")
-        current_content = run_shell(f'gh api "repos/{username}/{username}/readme" --headers "Accept: application/vnd.github.raw"', check=False)
+        current_content = get_github().readme(username, username)
         if current_content and len(current_content) > 200 and not force:
             console.print("[green]Found existing robust profile. Switching to SMART_UPDATE.[/green]")
             strategy = "SMART_UPDATE"
         else:
              console.print("[yellow]Profile basic or missing. Using FULL_GEN.[/yellow]")
-    except:
+    except GitHubError:
         pass
 
     # Fetch & Filter
@@ -201,7 +191,12 @@ def deploy_profile(username: str, content: str) -> None:
         run_shell(f'git push -u origin {branch_name} --force')
         
         console.print("[green]Opening PR...[/green]")
-        run_shell(f'gh pr create --title "AI Profile Update" --body "Automated profile update generated by Git-Alchemist. Added missing repo links and organized new projects."')
+        url = get_github().create_pull(
+            username, username, "AI Profile Update",
+            "Automated profile update generated by Git-Alchemist. Added missing repo links and organized new projects.",
+            head=branch_name,
+        )
+        console.print(f"[dim]{url}[/dim]")
         
         os.chdir(cwd)
         
@@ -0,0 +1,67 @@
+import cProfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator
+from .telemetry import get_tracer
+
+class PhaseProfiler:
+    """
+    Collects per-phase timings for one command from telemetry spans:
+    explicit phases (context scan, chunking, map, reduce, rendering),
+    model calls, GitHub API requests, and git / gh / other subprocesses.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.wall = 0.0
+        self.phases: dict[str, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, entry: dict[str, Any]) -> None:
+        kind = entry.get("kind")
+        if kind == "phase":
+            name = str(entry.get("name", "phase"))
+        elif kind == "model":
+            name = "model calls"
+        elif kind == "subprocess":
+            tool = entry.get("tool")
+            name = f"{tool} calls" if tool in ("git", "gh") else "other subprocesses"
+        elif kind == "github":
+            name = "GitHub API calls"
+        else:
+            return
+        with self._lock:
+            self.phases.setdefault(name, []).append(float(entry.get("latency_ms", 0.0)) / 1000)
+
+    def stop(self) -> None:
+        self.wall = time.perf_counter() - self.started
+
+    def report(self) -> list[tuple[str, int, float]]:
+        """(phase, count, total seconds) rows, slowest first."""
+        with self._lock:
+            rows = [(name, len(times), sum(times)) for name, times in self.phases.items()]
+        return sorted(rows, key=lambda row: -row[2])
+
+@contextmanager
+def profiled(dump_path: str | None = None, profiler: PhaseProfiler | None = None) -> Iterator[PhaseProfiler]:
+    """
+    Profiles the enclosed block. With `dump_path`, the main thread also runs
+    under cProfile and the stats are written there (readable with pstats or
+    snakeviz).
+    """
+    profiler = profiler or PhaseProfiler()
+    tracer = get_tracer()
+    tracer.listeners.append(profiler.observe)
+    cprofile = cProfile.Profile() if dump_path else None
+    if cprofile:
+        cprofile.enable()
+    try:
+        yield profiler
+    finally:
+        if cprofile:
+            cprofile.disable()
+            if dump_path:
+                cprofile.dump_stats(dump_path)
+        tracer.listeners.remove(profiler.observe)
+        profiler.stop()
@@ -0,0 +1,197 @@
+import asyncio
+import hashlib
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+@dataclass
+class Completion:
+    """One response (or one streamed piece of a response) from a provider."""
+    text: str
+    prompt_tokens: int | None = None
+    output_tokens: int | None = None
+
+class Provider(ABC):
+    """
+    Backend that turns a prompt into text for a given model name. The engine
+    in core.py (fallback, scheduling, chunking) only talks to this interface.
+    """
+    name = "provider"
+
+    # `cached_content` is a handle from create_context_cache(); the engine
+    # only passes it to providers that returned one.
+    @abstractmethod
+    def generate(self, model: str, prompt: str, cached_content: str | None = None) -> Completion: ...
+
+    @abstractmethod
+    async def generate_async(self, model: str, prompt: str, cached_content: str | None = None) -> Completion: ...
+
+    @abstractmethod
+    def stream(self, model: str, prompt: str, cached_content: str | None = None) -> Iterator[Completion]: ...
+
+    @abstractmethod
+    def count_tokens(self, model: str, prompt: str) -> int: ...
+
+    def create_context_cache(self, model: str, context: str, ttl: float) -> str | None:
+        """
+        Uploads `context` once for later prompts to reference by handle.
+        Returns None if the provider or model has no server-side caching.
+        """
+        return None
+
+    def delete_context_cache(self, handle: str) -> None:
+        return None
+
+def _usage(response: Any) -> tuple[int | None, int | None]:
+    usage = getattr(response, "usage_metadata", None)
+    prompt_tokens = getattr(usage, "prompt_token_count", None)
+    output_tokens = getattr(usage, "candidates_token_count", None)
+    return (
+        prompt_tokens if isinstance(prompt_tokens, int) else None,
+        output_tokens if isinstance(output_tokens, int) else None,
+    )
+
+def _config(cached_content: str | None) -> dict[str, Any]:
+    return {"config": {"cached_content": cached_content}} if cached_content else {}
+
+class GeminiProvider(Provider):
+    """Google Gemini / Gemma models through the google-genai client."""
+    name = "gemini"
+
+    def __init__(self, client: Any) -> None:
+        self.client = client
+
+    def generate(self, model: str, prompt: str, cached_content: str | None = None) -> Completion:
+        response = self.client.models.generate_content(model=model, contents=prompt, **_config(cached_content))
+        return Completion(response.text or "", *_usage(response)) if response else Completion("")
+
+    async def generate_async(self, model: str, prompt: str, cached_content: str | None = None) -> Completion:
+        response = await self.client.aio.models.generate_content(model=model, contents=prompt, **_config(cached_content))
+        return Completion(response.text or "", *_usage(response)) if response else Completion("")
+
+    def stream(self, model: str, prompt: str, cached_content: str | None = None) -> Iterator[Completion]:
+        for chunk in self.client.models.generate_content_stream(model=model, contents=prompt, **_config(cached_content)):
+            yield Completion(getattr(chunk, "text", None) or "", *_usage(chunk))
+
+    def count_tokens(self, model: str, prompt: str) -> int:
+        return int(self.client.models.count_tokens(model=model, contents=prompt).total_tokens)
+
+    def create_context_cache(self, model: str, context: str, ttl: float) -> str | None:
+        cached = self.client.caches.create(
+            model=model,
+            config={"contents": [context], "ttl": f"{int(ttl)}s", "display_name": "git-alchemist codebase"},
+        )
+        return getattr(cached, "name", None)
+
+    def delete_context_cache(self, handle: str) -> None:
+        self.client.caches.delete(name=handle)
+
+class FakeProvider(Provider):
+    """
+    Deterministic offline stand-in for load-testing the engine. Simulates
+    request latency, output token throughput and injected 429 errors; the
+    text of a response depends only on (model, prompt).
+    """
+    name = "fake"
+
+    def __init__(
+        self,
+        latency: float = 0.05,
+        tokens_per_second: float = 500.0,
+        output_tokens: int = 64,
+        quota_error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.quota_error_rate = quota_error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.quota_errors = 0
+        # Characters of prompt text sent per request (cached context excluded)
+        self.sent_chars = 0
+        # Local stand-in for server-side context caches: handle -> context
+        self.context_caches: dict[str, str] = {}
+        self.context_caches_created = 0
+
+    @classmethod
+    def from_env(cls) -> "FakeProvider":
+        """Builds a fake backend from ALCHEMIST_FAKE_* environment variables."""
+        return cls(
+            latency=float(os.getenv("ALCHEMIST_FAKE_LATENCY", "0.05")),
+            tokens_per_second=float(os.getenv("ALCHEMIST_FAKE_TPS", "500")),
+            output_tokens=int(os.getenv("ALCHEMIST_FAKE_OUTPUT_TOKENS", "64")),
+            quota_error_rate=float(os.getenv("ALCHEMIST_FAKE_429_RATE", "0")),
+            seed=int(os.getenv("ALCHEMIST_FAKE_SEED", "0")),
+        )
+
+    def _admit(self, prompt: str, cached_content: str | None) -> str:
+        """Counts the request, injects 429s and returns the effective prompt."""
+        with self._lock:
+            self.calls += 1
+            self.sent_chars += len(prompt)
+            throttled = self._rng.random() < self.quota_error_rate
+            if throttled:
+                self.quota_errors += 1
+            context = self.context_caches.get(cached_content) if cached_content else None
+        if throttled:
+            raise RuntimeError("429 RESOURCE_EXHAUSTED (fake provider). Please retry in 1s.")
+        if cached_content and context is None:
+            raise RuntimeError(f"404 NOT_FOUND: cached content {cached_content} not found (fake provider)")
+        # Same effective prompt as sending "prompt\n\nCONTEXT:\n..." inline
+        return f"{prompt}\n\n{context}" if context is not None else prompt
+
+    def _words(self, model: str, prompt: str) -> list[str]:
+        digest = hashlib.sha256(f"{model}\0{prompt}".encode("utf-8", "replace")).hexdigest()
+        words = [f"[fake:{model}]"]
+        for i in range(1, self.output_tokens):
+            words.append(digest[(i * 2) % 64:(i * 2) % 64 + 6])
+        return words
+
+    def _completion(self, model: str, prompt: str, words: list[str]) -> Completion:
+        return Completion(" ".join(words), prompt_tokens=max(1, len(prompt) // 4), output_tokens=len(words))
+
+    def generate(self, model: str, prompt: str, cached_content: str | None = None) -> Completion:
+        prompt = self._admit(prompt, cached_content)
+        words = self._words(model, prompt)
+        time.sleep(self.latency + len(words) / self.tokens_per_second)
+        return self._completion(model, prompt, words)
+
+    async def generate_async(self, model: str, prompt: str, cached_content: str | None = None) -> Completion:
+        prompt = self._admit(prompt, cached_content)
+        words = self._words(model, prompt)
+        await asyncio.sleep(self.latency + len(words) / self.tokens_per_second)
+        return self._completion(model, prompt, words)
+
+    def stream(self, model: str, prompt: str, cached_content: str | None = None) -> Iterator[Completion]:
+        prompt = self._admit(prompt, cached_content)
+        words = self._words(model, prompt)
+        time.sleep(self.latency)
+        for i, word in enumerate(words):
+            time.sleep(1 / self.tokens_per_second)
+            last = i == len(words) - 1
+            yield Completion(
+                word + ("" if last else " "),
+                prompt_tokens=max(1, len(prompt) // 4) if last else None,
+                output_tokens=len(words) if last else None,
+            )
+
+    def count_tokens(self, model: str, prompt: str) -> int:
+        return max(1, len(prompt) // 4) if prompt else 0
+
+    def create_context_cache(self, model: str, context: str, ttl: float) -> str | None:
+        with self._lock:
+            self.context_caches_created += 1
+            handle = f"cachedContents/fake-{self.context_caches_created}"
+            self.context_caches[handle] = context
+        return handle
+
+    def delete_context_cache(self, handle: str) -> None:
+        with self._lock:
+            self.context_caches.pop(handle, None)
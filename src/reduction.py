@@ -0,0 +1,267 @@
+import hashlib
+import json
+import os
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+from rich.console import Console
+from .models import FileRecord
+from .tokens import DEFAULT_CHARS_PER_TOKEN
+from . import telemetry
+
+console = Console()
+
+# Passes run by default; ALCHEMIST_REDUCE overrides ("off", "all", or a comma list).
+# Only lossless drops run by default: every other pass rewrites or replaces
+# file content (license headers, JSON layout, near-duplicate and
+# header-marker matches), so they only run when asked for.
+DEFAULT_PASSES = ("duplicates", "generated")
+ALL_PASSES = ("duplicates", "near-duplicates", "generated", "generated-markers", "license", "comments", "whitespace")
+
+# Dependency lockfiles: machine-written and rarely useful to a model
+LOCKFILES = {
+    "package-lock.json", "npm-shrinkwrap.json", "pnpm-lock.yaml", "yarn.lock", "composer.lock",
+    "Pipfile.lock", "poetry.lock", "Cargo.lock", "Gemfile.lock", "bun.lock", "uv.lock",
+}
+GENERATED_SUFFIXES = ("_pb2.py", "_pb2_grpc.py", ".pb.go", ".min.js", ".min.css", ".generated.ts")
+# Markers of generated code, looked for near the top of a file (generated-markers)
+GENERATED_RE = re.compile(r"@generated|do not edit|auto-?generated|generated by", re.IGNORECASE)
+GENERATED_SCAN_LINES = 5
+LICENSE_RE = re.compile(r"copyright|licen[cs]e|spdx-license-identifier|all rights reserved", re.IGNORECASE)
+# Used to turn removed characters into the report's token estimate
+REPORT_CHARS_PER_TOKEN = DEFAULT_CHARS_PER_TOKEN["code"]
+
+# Near-duplicate detection: MinHash over distinct lines, banded for lookup
+NEAR_DUPLICATE_JACCARD = 0.9
+NEAR_DUPLICATE_MIN_LINES = 20
+MINHASH_BANDS = 8
+MINHASH_ROWS = 4
+
+_LINE_COMMENT = {
+    ".py": "#", ".sh": "#", ".ps1": "#", ".yml": "#", ".yaml": "#", ".toml": "#",
+    ".js": "//", ".ts": "//", ".c": "//", ".cpp": "//", ".h": "//",
+}
+
+def get_passes() -> tuple[str, ...]:
+    """Reduction passes selected by ALCHEMIST_REDUCE (default DEFAULT_PASSES)."""
+    value = os.getenv("ALCHEMIST_REDUCE", "").strip().lower()
+    if not value:
+        return DEFAULT_PASSES
+    if value in ("off", "0", "none", "false"):
+        return ()
+    if value == "all":
+        return ALL_PASSES
+    return tuple(p for p in ALL_PASSES if p in {v.strip() for v in value.split(",")})
+
+@dataclass
+class ReductionReport:
+    files_in: int = 0
+    files_out: int = 0
+    bytes_in: int = 0
+    bytes_out: int = 0
+    chars_per_token: float = REPORT_CHARS_PER_TOKEN
+    # Pass name -> files it changed or replaced
+    files: dict[str, int] = field(default_factory=dict)
+    # Pass name -> characters it removed
+    saved: dict[str, int] = field(default_factory=dict)
+
+    def count(self, name: str, before: str, after: str) -> str:
+        if after != before:
+            self.files[name] = self.files.get(name, 0) + 1
+            self.saved[name] = self.saved.get(name, 0) + len(before) - len(after)
+        return after
+
+    @property
+    def tokens_saved(self) -> int:
+        """Rough estimate from the characters removed; no text is re-tokenized."""
+        return int((self.bytes_in - self.bytes_out) / self.chars_per_token)
+
+    def summary(self) -> str:
+        passes = ", ".join(f"{name} {self.files[name]} files/{self.saved[name] / 1e3:.1f} KB" for name in self.files)
+        return (
+            f"Context reduction: {self.bytes_in / 1e3:.1f} KB -> {self.bytes_out / 1e3:.1f} KB "
+            f"({self.files_in - self.files_out} files dropped), ~{self.tokens_saved} tokens saved"
+            + (f"; {passes}" if passes else "")
+        )
+
+def is_generated(record: FileRecord, markers: bool = False) -> bool:
+    """
+    Lockfiles and well-known generated file names; with `markers`, also
+    files whose first lines say they are generated ("Code generated by ...").
+    """
+    name = os.path.basename(record.path)
+    if name in LOCKFILES or name.endswith(GENERATED_SUFFIXES):
+        return True
+    if not markers:
+        return False
+    end = -1
+    for _ in range(GENERATED_SCAN_LINES):
+        end = record.content.find("\n", end + 1)
+        if end == -1:
+            break
+    return GENERATED_RE.search(record.content, 0, end if end != -1 else len(record.content)) is not None
+
+def strip_license_header(text: str, ext: str) -> str:
+    """
+    Removes a leading comment block (line comments or /* ... */) that
+    mentions a copyright or license; a shebang line is kept.
+    """
+    shebang = ""
+    if text.startswith("#!"):
+        cut = text.find("\n") + 1 or len(text)
+        shebang, text = text[:cut], text[cut:]
+    body = text.lstrip("\n")
+    if body.startswith("/*"):
+        close = body.find("*/")
+        header, rest = (body[:close], body[close + 2:]) if close != -1 else (body, "")
+    else:
+        # Walks the leading comment lines only; the rest of the file is never split
+        prefix = _LINE_COMMENT.get(ext)
+        end = 0
+        while prefix and end < len(body):
+            newline = body.find("\n", end)
+            stop = newline if newline != -1 else len(body)
+            if not body[end:stop].lstrip().startswith(prefix):
+                break
+            end = stop + 1
+        header, rest = body[:end], body[end:]
+    if not header or not LICENSE_RE.search(header):
+        return shebang + text
+    return shebang + rest.lstrip("\n")
+
+def strip_comments(text: str, ext: str) -> str:
+    """Drops whole-line comments (code with trailing comments is left alone)."""
+    prefix = _LINE_COMMENT.get(ext)
+    if not prefix:
+        return text
+    lines = text.split("\n")
+    return "\n".join(
+        line for i, line in enumerate(lines)
+        if not line.lstrip().startswith(prefix) or (i == 0 and line.startswith("#!"))
+    )
+
+def collapse_whitespace(text: str, ext: str) -> str:
+    """
+    Strips trailing whitespace and collapses runs of blank lines; JSON is
+    re-serialized compactly when it parses.
+    """
+    if ext == ".json":
+        try:
+            return json.dumps(json.loads(text), ensure_ascii=False, separators=(",", ":")) + "\n"
+        except ValueError:
+            pass
+    # Substring checks are far cheaper than a regex pass over clean files
+    # ("\t" alone is a memchr, so the common tab-free file skips the pair search)
+    if " \n" in text or ("\t" in text and "\t\n" in text):
+        text = re.sub(r"[ \t]+\n", "\n", text)
+    if "\n\n\n" in text:
+        text = re.sub(r"\n{3,}", "\n\n", text)
+    return text
+
+def _fingerprint(text: str) -> tuple[int, int, int]:
+    """
+    Exact-duplicate key: length plus two independent hashes (~96 bits), a
+    fraction of the cost of sha256 on every scanned file.
+    """
+    return len(text), hash(text), zlib.crc32(text.encode("utf-8", "replace"))
+
+def _line_set(text: str) -> set[str]:
+    return {line.strip() for line in text.split("\n") if line.strip()}
+
+def _minhash(lines: set[str]) -> list[int]:
+    hashes = [int.from_bytes(hashlib.blake2b(line.encode("utf-8", "replace"), digest_size=8).digest(), "big") for line in lines]
+    signature = []
+    for seed in range(MINHASH_BANDS * MINHASH_ROWS):
+        # Cheap permutations: xor with a per-seed constant, then a multiplicative hash
+        mask = (seed + 1) * 0x9E3779B97F4A7C15 & 0xFFFFFFFFFFFFFFFF
+        signature.append(min(((h ^ mask) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF for h in hashes))
+    return signature
+
+class Reducer:
+    """
+    Incremental context reduction: records are reduced one at a time, so it
+    works on a stream as well as a list. The first copy of a file wins;
+    later exact duplicates (and near duplicates, when that pass is on)
+    become a one-line note pointing at it.
+    """
+
+    def __init__(self, passes: Iterable[str] | None = None, chars_per_token: float = REPORT_CHARS_PER_TOKEN) -> None:
+        self.passes = set(get_passes() if passes is None else passes)
+        self.report = ReductionReport(chars_per_token=chars_per_token)
+        self._exact: dict[tuple[int, int, int], str] = {}
+        self._bands: dict[tuple[int, tuple[int, ...]], list[str]] = {}
+        self._lines: dict[str, set[str]] = {}
+
+    def reduce(self, record: FileRecord) -> FileRecord | None:
+        """The reduced record, or None if it is dropped entirely."""
+        report = self.report
+        report.files_in += 1
+        report.bytes_in += len(record.content)
+        result = self._reduce(record)
+        if result is not None:
+            report.files_out += 1
+            report.bytes_out += len(result.content)
+        return result
+
+    def _reduce(self, record: FileRecord) -> FileRecord | None:
+        report = self.report
+        ext = os.path.splitext(record.path)[1]
+        if "generated" in self.passes and is_generated(record, markers="generated-markers" in self.passes):
+            report.count("generated", record.content, "")
+            return None
+        text = record.content
+        if "license" in self.passes:
+            text = report.count("license", text, strip_license_header(text, ext))
+        if "comments" in self.passes:
+            text = report.count("comments", text, strip_comments(text, ext))
+        if "whitespace" in self.passes:
+            text = report.count("whitespace", text, collapse_whitespace(text, ext))
+        if "duplicates" in self.passes or "near-duplicates" in self.passes:
+            original = self._duplicate_of(record.path, text)
+            note = f"(duplicate of {original})\n"
+            # Tiny files (empty __init__.py) cost less than the note would
+            if original and len(note) < len(text):
+                report.count("duplicates", text, note)
+                return FileRecord(record.path, note)
+        return record if text == record.content else FileRecord(record.path, text)
+
+    def _duplicate_of(self, path: str, text: str) -> str | None:
+        if "duplicates" in self.passes:
+            fingerprint = _fingerprint(text)
+            if fingerprint in self._exact:
+                return self._exact[fingerprint]
+            self._exact[fingerprint] = path
+        if "near-duplicates" not in self.passes:
+            return None
+        # Lossy: lines that differ from the first copy are dropped with the file
+        lines = _line_set(text)
+        if len(lines) < NEAR_DUPLICATE_MIN_LINES:
+            return None
+        signature = _minhash(lines)
+        keys = [(b, tuple(signature[b * MINHASH_ROWS:(b + 1) * MINHASH_ROWS])) for b in range(MINHASH_BANDS)]
+        for candidate in dict.fromkeys(p for key in keys for p in self._bands.get(key, ())):
+            other = self._lines[candidate]
+            if len(lines & other) / len(lines | other) >= NEAR_DUPLICATE_JACCARD:
+                return candidate
+        for key in keys:
+            self._bands.setdefault(key, []).append(path)
+        self._lines[path] = lines
+        return None
+
+    def reduce_all(self, records: Iterable[FileRecord]) -> Iterator[FileRecord]:
+        for record in records:
+            reduced = self.reduce(record)
+            if reduced is not None:
+                yield reduced
+
+    def finish(self, seconds: float) -> ReductionReport:
+        """Records the run's reduction phase and prints its report."""
+        report = self.report
+        telemetry.get_tracer().record(
+            "phase", seconds, name="context reduction", files=report.files_in, dropped=report.files_in - report.files_out,
+            bytes_saved=report.bytes_in - report.bytes_out, tokens_saved=report.tokens_saved, passes=report.files or None,
+        )
+        if report.bytes_in != report.bytes_out:
+            console.print(f"[dim]{report.summary()}[/dim]")
+        return report
@@ -1,13 +1,22 @@
 import json
 import time
-from typing import Optional, Literal, List
+from typing import Iterator, Optional, Literal, List
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell, check_gh_auth
+from .core import generate_many
+from .utils import check_gh_auth
+from .github import GitHubClient, GitHubError, get_github
 from .models import RepoMetadata
 
 console = Console()
 
+def _stream_repos(github: GitHubClient, readme: bool = False) -> Iterator[RepoMetadata]:
+    """Every public repository, page by page; a failed page ends the listing with a message."""
+    try:
+        for item in github.iter_repos(visibility="public", readme=readme):
+            yield RepoMetadata.from_dict(item)
+    except GitHubError as e:
+        console.print(f"[red]Failed to fetch repositories:[/red] {e}")
+
 def optimize_topics(user: Optional[str] = None, mode: Literal["fast", "smart"] = "fast") -> None:
     """
     Analyzes repositories and adds relevant topics using Gemini.
@@ -18,19 +27,12 @@ def optimize_topics(user: Optional[str] = None, mode: Literal["fast", "smart"] =
         return
 
     console.print(f"[cyan]Optimizing topics for {username} ({mode} mode)...[/cyan]")
-    repos_raw = run_shell('gh repo list --visibility=public --limit 100 --json name,description,repositoryTopics')
-    if repos_raw is None:
-        console.print("[red]Failed to fetch repositories: gh command returned None[/red]")
-        return
-    
-    raw_data = json.loads(repos_raw)
-    if not isinstance(raw_data, list):
-        raise ValueError("Unexpected JSON structure from gh CLI: expected a list")
-    
-    repos: List[RepoMetadata] = [RepoMetadata.from_dict(item) for item in raw_data]
+    github = get_github()
 
-    count = 0
-    for repo in repos:
+    # Build every prompt first so the model calls can overlap
+    pending = []
+    prompts = []
+    for repo in _stream_repos(github):
         name = repo.name
         desc = repo.description or "No description provided"
         
@@ -54,7 +56,13 @@ Return ONLY a JSON array of strings (max 5 total topics).
 Focus on technical keywords like 'python', 'api', 'automation', 'cli'.
 Output Example: ["python", "automation"]
 """
-        result = generate_content(prompt, mode=mode)
+        pending.append((name, existing))
+        prompts.append(prompt)
+
+    results = generate_many(prompts, mode=mode)
+
+    count = 0
+    for (name, existing), result in zip(pending, results):
         if not result: continue
 
         try:
@@ -66,12 +74,12 @@ Output Example: ["python", "automation"]
             
             if to_add:
                 tag_str = ",".join(to_add)
-                console.print(f"  [green]Adding tags:[/green] {tag_str}")
-                res = run_shell(f'gh repo edit {username}/{name} --add-topic "{tag_str}"')
-                if res is None:
-                    console.print(f"  [red]Failed to add topics to {name}[/red]")
-                else:
+                console.print(f"  [green]Adding tags to {name}:[/green] {tag_str}")
+                try:
+                    github.set_topics(username, name, existing + to_add)
                     count += 1
+                except GitHubError:
+                    console.print(f"  [red]Failed to add topics to {name}[/red]")
                 time.sleep(0.5)
         except json.JSONDecodeError:
             console.print(f"  [red]Failed to parse topics for {name}[/red]")
@@ -86,32 +94,22 @@ def generate_descriptions(user: Optional[str] = None, mode: Literal["fast", "sma
     if not username: return
 
     console.print(f"[cyan]Generating descriptions for {username} ({mode} mode)...[/cyan]")
-    repos_raw = run_shell('gh repo list --visibility=public --limit 100 --json name,description')
-    if repos_raw is None:
-        console.print("[red]Failed to fetch repositories: gh command returned None[/red]")
-        return
-
-    raw_data = json.loads(repos_raw)
-    if not isinstance(raw_data, list):
-        raise ValueError("Unexpected JSON structure from gh CLI: expected a list")
-        
-    repos: List[RepoMetadata] = [RepoMetadata.from_dict(item) for item in raw_data]
-
-    count = 0
-    for repo in repos:
+    github = get_github()
+
+    # Build every prompt first so the model calls can overlap
+    names = []
+    prompts = []
+    contexts: List[Optional[str]] = []
+    # READMEs come with the listing pages instead of one request per repo
+    for repo in _stream_repos(github, readme=True):
         name = repo.name
         if name == username: continue # Skip profile repo
         if repo.description: continue # Skip if already has desc
 
         console.print(f"[white]Analyzing {name}...[/white]")
         
-        # Fetch Readme
-        try:
-            # We fetch the whole readme now, allowing the engine to chunk if needed
-            readme = run_shell(f'gh repo view {username}/{name} --json body -q .body', check=False)
-            context = readme if readme else "No readme available."
-        except:
-            context = "No readme available."
+        # The whole readme is passed, allowing the engine to chunk if needed
+        context = repo.readme or "No readme available."
 
         prompt = f"""
 Task: Generate a GitHub repository description for project "{name}". 
@@ -119,18 +117,25 @@ Constraint: Max 20 words. Start with an action verb.
 Output ONLY the description. No quotes.
 """
         # Pass readme as context
-        result = generate_content(prompt, mode=mode, context=context)
+        names.append(name)
+        prompts.append(prompt)
+        contexts.append(context)
+
+    results = generate_many(prompts, mode=mode, contexts=contexts)
+
+    count = 0
+    for name, result in zip(names, results):
         if not result: continue
 
         new_desc = result.strip().replace('"', '').replace("'", "")
         if len(new_desc) > 200: new_desc = new_desc[:197] + "..."
 
-        console.print(f"  [green]New Desc:[/green] {new_desc}")
-        res = run_shell(f'gh repo edit {username}/{name} --description "{new_desc}"')
-        if res is None:
-             console.print(f"  [red]Failed to update description for {name}[/red]")
-        else:
-             count += 1
+        console.print(f"  [green]New Desc for {name}:[/green] {new_desc}")
+        try:
+            github.edit_repo(username, name, description=new_desc)
+            count += 1
+        except GitHubError:
+            console.print(f"  [red]Failed to update description for {name}[/red]")
         time.sleep(0.5)
 
     console.print(f"[cyan]Done! Updated {count} descriptions.[/cyan]")
\ No newline at end of file
@@ -0,0 +1,133 @@
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+from .chunking import group_blocks, parse_context_records
+from .models import FileRecord
+
+# BM25 parameters (the usual defaults)
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Small consecutive blocks are merged into segments of up to this many characters
+SEGMENT_CHARS = 2000
+# Path terms are repeated so a file named after the topic ranks well
+PATH_WEIGHT = 3
+
+# Identifier parts: "parseJSONResponse" -> parse, json, response; snake_case splits on "_"
+_TERM_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by do does for from how i if in is it of on or self the this to what when where which who why "
+    "with def return import none true false".split()
+)
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased identifier and word parts, minus stopwords and single letters."""
+    return [t for t in (m.lower() for m in _TERM_RE.findall(text)) if len(t) > 1 and t not in _STOPWORDS]
+
+@dataclass
+class Segment:
+    path: str
+    text: str
+    position: int  # order within the file
+
+class BM25Index:
+    """
+    Okapi BM25 over code segments (a top-level definition, or a run of
+    small ones). Building it tokenizes the context once; queries are cheap.
+    """
+
+    def __init__(self, segments: list[Segment]) -> None:
+        self.segments = segments
+        self.term_freqs: list[Counter[str]] = []
+        self.lengths: list[int] = []
+        self.doc_freq: Counter[str] = Counter()
+        for segment in segments:
+            terms = tokenize(segment.text) + tokenize(segment.path) * PATH_WEIGHT
+            freqs = Counter(terms)
+            self.term_freqs.append(freqs)
+            self.lengths.append(len(terms))
+            self.doc_freq.update(freqs.keys())
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def scores(self, query: str) -> list[float]:
+        """BM25 score of every segment for `query` (0 where no term matches)."""
+        terms = set(tokenize(query))
+        n = len(self.segments)
+        idf = {t: math.log(1 + (n - self.doc_freq[t] + 0.5) / (self.doc_freq[t] + 0.5)) for t in terms if self.doc_freq[t]}
+        results = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length) if self.avg_length else BM25_K1
+            for term, weight in idf.items():
+                tf = freqs.get(term, 0)
+                if tf:
+                    score += weight * tf * (BM25_K1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+def segment_records(records: list[FileRecord]) -> list[Segment]:
+    """Splits file records into definition-level segments."""
+    segments = []
+    for record in records:
+        for i, text in enumerate(group_blocks(record.content, SEGMENT_CHARS)):
+            segments.append(Segment(record.path, text, i))
+    return segments
+
+_index_cache: tuple[str, BM25Index] | None = None
+_index_lock = threading.Lock()
+
+def get_index(context: str) -> BM25Index:
+    """
+    Builds (or reuses, for the same context) the BM25 index of a rendered
+    codebase context, so follow-up questions in one session skip indexing.
+    """
+    global _index_cache
+    digest = hashlib.sha256(context.encode("utf-8", "replace")).hexdigest()
+    with _index_lock:
+        if _index_cache and _index_cache[0] == digest:
+            return _index_cache[1]
+    index = BM25Index(segment_records(parse_context_records(context)))
+    with _index_lock:
+        _index_cache = (digest, index)
+    return index
+
+def prefilter_context(context: str, query: str, budget: int, estimate: Callable[[str], int]) -> tuple[str, int, int]:
+    """
+    Keeps the segments that score best against `query`, up to `budget`
+    tokens, and re-renders them as a context (files and segments in their
+    original order, "..." marking skipped code). Returns the context plus
+    kept and total segment counts; the input is returned unchanged if no
+    segment matches the query.
+    """
+    index = get_index(context)
+    scores = index.scores(query)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: -scores[i])
+    if not ranked:
+        return context, len(index.segments), len(index.segments)
+
+    kept: set[int] = set()
+    used = 0
+    for i in ranked:
+        size = estimate(index.segments[i].text)
+        if kept and used + size > budget:
+            continue
+        kept.add(i)
+        used += size
+
+    files: dict[str, list[Segment]] = {}
+    for i in sorted(kept):
+        files.setdefault(index.segments[i].path, []).append(index.segments[i])
+    records = []
+    for path, segments in files.items():
+        parts = []
+        previous = -1
+        for segment in segments:
+            if segment.position != previous + 1:
+                parts.append("...\n")
+            parts.append(segment.text)
+            previous = segment.position
+        records.append(FileRecord(path, "".join(parts)))
+    return "\n".join(r.render() for r in records), len(kept), len(index.segments)
@@ -1,22 +1,35 @@
 import os
 from rich.console import Console
-from .core import generate_content
-from .utils import run_shell, get_codebase_context
+from .core import SAFE_TOKEN_LIMIT_FAST, SAFE_TOKEN_LIMIT_SMART, estimate_tokens, generate_content_stream
+from .skeleton import defined_symbols, fit_skeleton, mentioned_symbols
+from .utils import run_shell, get_codebase_context, get_codebase_files
 
 console = Console()
 
-def ask_sage(question: str, mode: str = "fast") -> None:
+def get_skeleton_context(question: str, budget: int, expand: list[str] | None = None) -> str:
     """
-    Queries Gemini using the aggregated codebase as context.
+    The codebase with Python files reduced to skeletons, at the most
+    detailed level that fits in `budget` tokens. Symbols passed in `expand`
+    or named in the question (e.g. `split_context`, Class.method) keep their
+    full bodies.
+    """
+    records = get_codebase_files()
+    wanted = set(expand or ()) | mentioned_symbols(question, defined_symbols(records))
+    skeleton, level = fit_skeleton(records, budget, estimate_tokens, wanted)
+    full_tokens = sum(estimate_tokens(r.render()) for r in records)
+    console.print(
+        f"[cyan]Skeleton context ({level}): ~{estimate_tokens(skeleton)} tokens (full source ~{full_tokens})"
+        + (f", expanded: {', '.join(sorted(wanted))}" if wanted else "") + "[/cyan]"
+    )
+    return skeleton
+
+def ask_sage(question: str, mode: str = "fast", skeleton: bool = False, expand: list[str] | None = None) -> None:
+    """
+    Queries Gemini using the aggregated codebase as context. With `skeleton`,
+    Python files are sent as signatures and docstrings (see get_skeleton_context).
     """
     console.print("[cyan]The Sage is meditating on your codebase...[/cyan]")
     
-    code_context = get_codebase_context()
-    
-    if not code_context:
-        console.print("[yellow]Warning: No source files found to analyze.[/yellow]")
-        code_context = "No code found in repository."
-
     # Prompt focuses only on the persona and the question
     prompt = f"""
 You are "The Sage", an expert software architect and technical lead. 
@@ -31,10 +44,27 @@ Instructions:
 3. If the answer isn't in the code, say so.
 """
 
-    # Pass code_context separately to trigger smart chunking if needed
-    result = generate_content(prompt, mode=mode, context=code_context)
+    if skeleton:
+        # Aim for a single request: whatever the prompt leaves of the mode's limit
+        limit = SAFE_TOKEN_LIMIT_SMART if mode == "smart" else SAFE_TOKEN_LIMIT_FAST
+        code_context = get_skeleton_context(question, limit - estimate_tokens(prompt), expand)
+    else:
+        code_context = get_codebase_context()
+
+    if not code_context:
+        console.print("[yellow]Warning: No source files found to analyze.[/yellow]")
+        code_context = "No code found in repository."
+
+    # Pass code_context separately to trigger smart chunking if needed (or
+    # reuse the server-side context cache); the answer is rendered as it streams in
+    result = generate_content_stream(
+        prompt,
+        mode=mode,
+        context=code_context,
+        title="\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]",
+        cache_context=True,
+        query=question,
+    )
     
     if result:
-        console.print("\n[bold fuchsia]--- The Sage's Wisdom ---[/bold fuchsia]")
-        console.print(result)
         console.print("[bold fuchsia]-----------------------[/bold fuchsia]")
\ No newline at end of file
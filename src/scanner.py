@@ -0,0 +1,314 @@
+import os
+import re
+import subprocess
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, TypeVar
+from .models import FileRecord
+from .snapshot import Snapshot
+
+T = TypeVar("T")
+
+# Extensions to include
+EXTENSIONS = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile', '.json', '.toml'}
+# Folders to ignore (on top of .gitignore)
+IGNORE_DIRS = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs', 'dist', 'build', '.gemini', '.alchemist'}
+
+# Files above this size are skipped (generated data, bundles, fixtures)
+DEFAULT_MAX_FILE_BYTES = 512 * 1024
+# Bytes inspected for NUL bytes and line length
+SNIFF_BYTES = 8192
+# A sample with longer lines than this on average is treated as minified
+MINIFIED_LINE_LENGTH = 500
+# Files handed to a reader thread at a time
+READ_BATCH = 64
+
+@dataclass
+class ScanStats:
+    source: str = "git"
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    reused: int = 0  # files taken from the snapshot without reading them
+    skipped: dict[str, int] = field(default_factory=dict)
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds else 0.0
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        skipped = ", ".join(f"{count} {reason}" for reason, count in sorted(self.skipped.items()))
+        return (
+            f"Scanned {self.files} files ({self.bytes / 1e6:.1f} MB) in {self.seconds:.2f}s via {self.source}: "
+            f"{self.files_per_second:.0f} files/s, {self.bytes_per_second / 1e6:.1f} MB/s"
+            + (f"; {self.reused} unchanged since the last scan" if self.reused else "")
+            + (f"; skipped {skipped}" if skipped else "")
+        )
+
+def _translate(pattern: str) -> str:
+    """Translates the glob part of a gitignore pattern into a regex."""
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("/**", i) and i + 3 == len(pattern):
+            out.append("/.*")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 1:]:
+            end = pattern.index("]", i + 1)
+            body = pattern[i + 1:end].replace("\\", "\\\\")
+            out.append("[" + ("^" + body[1:] if body.startswith("!") else body) + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+class GitignoreMatcher:
+    """
+    Evaluates .gitignore rules (negation, directory-only, anchored and
+    ** patterns) for paths relative to the scan root. Used when git itself
+    is unavailable; the last matching rule wins, as in git.
+    """
+
+    def __init__(self) -> None:
+        self._rules: list[tuple[str, re.Pattern[str], bool, bool]] = []
+
+    def add_patterns(self, lines: list[str], base: str = "") -> None:
+        """Adds rules from a .gitignore located in directory `base` ("" for the root)."""
+        for raw in lines:
+            line = raw.rstrip("\n").rstrip("\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            line = line.rstrip() if not line.endswith("\\ ") else line
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:]
+            elif line.startswith("\\"):
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            anchored = "/" in line
+            body = _translate(line.lstrip("/"))
+            regex = re.compile(f"^{body}$" if anchored else f"^(?:.*/)?{body}$")
+            self._rules.append((base, regex, negate, dir_only))
+
+    def add_file(self, path: str, base: str = "") -> None:
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                self.add_patterns(f.readlines(), base)
+        except OSError:
+            pass
+
+    def ignored(self, rel_path: str, is_dir: bool = False) -> bool:
+        result = False
+        for base, regex, negate, dir_only in self._rules:
+            if dir_only and not is_dir:
+                continue
+            if base:
+                if not rel_path.startswith(base + "/"):
+                    continue
+                candidate = rel_path[len(base) + 1:]
+            else:
+                candidate = rel_path
+            if regex.match(candidate):
+                result = not negate
+        return result
+
+def git_ls_files(root: str = ".") -> list[str] | None:
+    """
+    Tracked plus untracked-but-not-ignored files, relative to `root`, or
+    None if `root` is not inside a git work tree (or git is missing).
+    """
+    try:
+        result = subprocess.run(
+            ["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+            cwd=root, capture_output=True, check=False,
+        )
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    paths = result.stdout.decode("utf-8", "replace").split("\0")
+    # ls-files still lists tracked files that were deleted from the work tree
+    return sorted({p for p in paths if p and os.path.isfile(os.path.join(root, p))})
+
+def walk_files(root: str = ".") -> list[str]:
+    """os.walk fallback honouring every .gitignore below `root`."""
+    matcher = GitignoreMatcher()
+    paths: list[str] = []
+    for current, dirs, files in os.walk(root):
+        rel_dir = os.path.relpath(current, root).replace(os.sep, "/")
+        rel_dir = "" if rel_dir == "." else rel_dir
+        if ".gitignore" in files:
+            matcher.add_file(os.path.join(current, ".gitignore"), rel_dir)
+        prefix = f"{rel_dir}/" if rel_dir else ""
+        dirs[:] = sorted(d for d in dirs if d != ".git" and not matcher.ignored(prefix + d, is_dir=True))
+        paths.extend(prefix + f for f in sorted(files) if not matcher.ignored(prefix + f))
+    return paths
+
+def list_source_files(root: str = ".") -> tuple[list[str], str]:
+    """
+    Candidate source files (relative, "/"-separated) and how they were
+    listed: "git" (ls-files) or "walk" (gitignore fallback).
+    """
+    listed = git_ls_files(root)
+    source = "git"
+    if listed is None:
+        listed, source = walk_files(root), "walk"
+    selected = []
+    for path in listed:
+        parts = path.split("/")
+        if any(part in IGNORE_DIRS for part in parts[:-1]):
+            continue
+        if os.path.splitext(parts[-1])[1] in EXTENSIONS:
+            selected.append(path)
+    return selected, source
+
+def iter_source_paths(root: str = ".") -> Iterator[str]:
+    """Scanned paths as rendered in the context ("./src/cli.py")."""
+    for path in list_source_files(root)[0]:
+        yield os.path.join(root, path)
+
+def read_source(path: str, max_bytes: int) -> tuple[str | None, str, int]:
+    """Returns (text, "", size in bytes), or (None, reason, 0) for skipped files."""
+    try:
+        with open(path, "rb") as f:
+            # One read past the limit tells us the file is too large without a stat
+            data = f.read(max_bytes + 1)
+    except OSError:
+        return None, "unreadable", 0
+    if len(data) > max_bytes:
+        return None, "too large", 0
+    sample = data[:SNIFF_BYTES]
+    if b"\0" in sample:
+        return None, "binary", 0
+    if len(sample) >= SNIFF_BYTES and len(sample) / (sample.count(b"\n") + 1) > MINIFIED_LINE_LENGTH:
+        return None, "minified", 0
+    try:
+        text = data.decode("utf-8")
+    except UnicodeDecodeError:
+        return None, "binary", 0
+    if "\r" in text:
+        # Same newline handling as reading in text mode
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text, "", len(data)
+
+def get_max_file_bytes() -> int:
+    try:
+        return int(float(os.getenv("ALCHEMIST_SCAN_MAX_KB", "0")) * 1024) or DEFAULT_MAX_FILE_BYTES
+    except ValueError:
+        return DEFAULT_MAX_FILE_BYTES
+
+def _read_ahead(read_batch: Callable[[list[str]], list[T]], batches: list[list[str]], workers: int) -> Iterator[tuple[list[str], list[T]]]:
+    """Yields (batch, results) in order, reading up to two batches per worker ahead."""
+    if workers <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield batch, read_batch(batch)
+        return
+    pool = ThreadPoolExecutor(max_workers=min(workers, len(batches)))
+    pending: deque[tuple[list[str], Future[list[T]]]] = deque()
+    try:
+        for batch in batches:
+            pending.append((batch, pool.submit(read_batch, batch)))
+            if len(pending) >= workers * 2:
+                done, future = pending.popleft()
+                yield done, future.result()
+        while pending:
+            done, future = pending.popleft()
+            yield done, future.result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def iter_codebase(
+    root: str = ".",
+    max_bytes: int | None = None,
+    workers: int | None = None,
+    snapshot: Snapshot | None = None,
+    stats: ScanStats | None = None,
+) -> Iterator[FileRecord]:
+    """
+    Lists source files (git ls-files, else a gitignore-aware walk) and yields
+    their records in listing order as they are read, skipping binaries,
+    minified bundles and files above `max_bytes` (ALCHEMIST_SCAN_MAX_KB).
+    Reads run on a thread pool a few batches ahead of the consumer, so only
+    those batches are held in memory. With a `snapshot`, files whose mtime
+    and size are unchanged are taken from it instead of being reread, and
+    the snapshot is updated once the listing is exhausted. `stats` is filled
+    in as records are produced (`seconds` excludes time spent by the consumer).
+    """
+    resumed = time.perf_counter()
+    stats = stats if stats is not None else ScanStats()
+    max_bytes = max_bytes or get_max_file_bytes()
+    # Reads release the GIL but decoding does not, so more threads than cores only adds contention
+    workers = workers or int(os.getenv("ALCHEMIST_SCAN_WORKERS", "0")) or min(16, os.cpu_count() or 1)
+    paths, stats.source = list_source_files(root)
+
+    def read(rel_path: str) -> tuple[str | None, str, int, os.stat_result | None, bool]:
+        """(text, skip reason, bytes, stat to store in the snapshot, reused)"""
+        full_path = os.path.join(root, rel_path)
+        if snapshot is None:
+            return (*read_source(full_path, max_bytes), None, False)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None, "unreadable", 0, None, False
+        if stat.st_size > max_bytes:
+            return None, "too large", 0, None, False
+        entry = snapshot.lookup(rel_path, stat)
+        if entry:
+            return snapshot.content(entry), entry["reason"], stat.st_size, None, True
+        return (*read_source(full_path, max_bytes), stat, False)
+
+    def read_batch(batch: list[str]) -> list[tuple[str | None, str, int, os.stat_result | None, bool]]:
+        return [read(p) for p in batch]
+
+    # Batches keep per-future overhead well below the cost of a (cached) read
+    batches = [paths[i:i + READ_BATCH] for i in range(0, len(paths), READ_BATCH)]
+    for batch, results in _read_ahead(read_batch, batches, workers):
+        for path, (text, reason, size, stat, reused) in zip(batch, results):
+            if snapshot is not None and stat is not None and reason not in ("too large", "unreadable"):
+                snapshot.update(path, stat, text, reason)
+            stats.reused += reused
+            if text is None:
+                stats.skipped[reason] = stats.skipped.get(reason, 0) + 1
+                continue
+            stats.files += 1
+            stats.bytes += size
+            stats.seconds += time.perf_counter() - resumed
+            yield FileRecord(path=os.path.join(root, path), content=text)
+            resumed = time.perf_counter()
+    if snapshot is not None:
+        snapshot.retain(set(paths))
+        snapshot.save()
+    stats.seconds += time.perf_counter() - resumed
+
+def scan_codebase(
+    root: str = ".", max_bytes: int | None = None, workers: int | None = None, snapshot: Snapshot | None = None
+) -> tuple[list[FileRecord], ScanStats]:
+    """All records of iter_codebase at once, with the scan statistics."""
+    stats = ScanStats()
+    records = list(iter_codebase(root, max_bytes, workers, snapshot, stats))
+    return records, stats
@@ -0,0 +1,201 @@
+import asyncio
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterator
+
+@dataclass
+class ModelLimits:
+    rpm: int
+    tpm: int
+
+# Published free-tier quotas; anything unknown falls back to DEFAULT_MODEL_LIMITS
+MODEL_LIMITS: dict[str, ModelLimits] = {
+    "gemini-3-flash": ModelLimits(rpm=10, tpm=250000),
+    "gemini-2.5-flash": ModelLimits(rpm=10, tpm=250000),
+    "gemini-2.5-flash-lite": ModelLimits(rpm=15, tpm=250000),
+    "gemma-3-27b-it": ModelLimits(rpm=30, tpm=15000),
+    "gemma-3-12b-it": ModelLimits(rpm=30, tpm=15000),
+    "gemma-3-4b-it": ModelLimits(rpm=30, tpm=15000),
+}
+DEFAULT_MODEL_LIMITS = ModelLimits(rpm=10, tpm=250000)
+
+DEFAULT_MAX_CONCURRENCY = 8
+
+class TokenBucket:
+    """
+    Classic token bucket: refills continuously at `rate` per second up to `capacity`.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)."""
+        self._refill()
+        amount = min(amount, self.capacity)  # Oversized requests only need a full bucket
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+    def drain(self) -> None:
+        """Empties the bucket, e.g. after the server reports exhaustion."""
+        self._refill()
+        self.tokens = 0.0
+
+class Ticket:
+    """Handed out by RequestScheduler.slot(); set `throttled` if the call hit a 429."""
+
+    def __init__(self, model: str) -> None:
+        self.model = model
+        self.throttled = False
+
+class RequestScheduler:
+    """
+    Admits model requests against per-model RPM/TPM budgets and an adaptive
+    concurrency limit (additive increase on success, halved on every 429).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        limits: dict[str, ModelLimits] | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(self.max_concurrency)
+        self.in_flight = 0
+        self.throttle_count = 0
+        self._limits = limits if limits is not None else MODEL_LIMITS
+        self._clock = clock
+        self._buckets: dict[str, tuple[TokenBucket, TokenBucket]] = {}
+        self._cond = threading.Condition()
+
+    def _model_buckets(self, model: str) -> tuple[TokenBucket, TokenBucket]:
+        if model not in self._buckets:
+            limits = self._limits.get(model, DEFAULT_MODEL_LIMITS)
+            self._buckets[model] = (
+                TokenBucket(limits.rpm / 60.0, limits.rpm, self._clock),
+                TokenBucket(limits.tpm / 60.0, limits.tpm, self._clock),
+            )
+        return self._buckets[model]
+
+    def try_admit(self, model: str, tokens: int) -> float:
+        """
+        Non-blocking admission. Returns 0 and reserves budget plus a concurrency
+        slot if the request may start now, else the suggested wait in seconds.
+        """
+        with self._cond:
+            if self.in_flight >= int(self.concurrency):
+                return 0.05
+            requests_bucket, tokens_bucket = self._model_buckets(model)
+            delay = max(requests_bucket.wait_time(1), tokens_bucket.wait_time(tokens))
+            if delay > 0:
+                return delay
+            requests_bucket.take(1)
+            tokens_bucket.take(tokens)
+            self.in_flight += 1
+            return 0.0
+
+    def acquire(self, model: str, tokens: int) -> None:
+        """Blocks until the request is admitted."""
+        while True:
+            delay = self.try_admit(model, tokens)
+            if delay <= 0:
+                return
+            with self._cond:
+                self._cond.wait(timeout=delay)
+
+    async def acquire_async(self, model: str, tokens: int) -> None:
+        """Awaits admission without blocking the event loop."""
+        while True:
+            delay = self.try_admit(model, tokens)
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
+    async def acquire_any_async(self, models: list[str], tokens: int, on_wait: Callable[[float], None] | None = None) -> str:
+        """
+        Tries `models` in order without blocking and returns the first one
+        admitted. Only when none of them can start does it sleep, for the
+        shortest suggested wait; `on_wait` is called with that delay first.
+        """
+        while True:
+            delays = []
+            for model in models:
+                delay = self.try_admit(model, tokens)
+                if delay <= 0:
+                    return model
+                delays.append(delay)
+            delay = min(delays)
+            if on_wait:
+                on_wait(delay)
+            await asyncio.sleep(delay)
+
+    def release(self, model: str, throttled: bool = False) -> None:
+        """Frees a concurrency slot and adapts the limit to the observed outcome."""
+        with self._cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if throttled:
+                self.throttle_count += 1
+                self.concurrency = max(1.0, self.concurrency / 2)
+                for bucket in self._model_buckets(model):
+                    bucket.drain()
+            else:
+                self.concurrency = min(float(self.max_concurrency), self.concurrency + 1.0 / self.concurrency)
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, model: str, tokens: int) -> Iterator[Ticket]:
+        """Context manager around acquire()/release()."""
+        self.acquire(model, tokens)
+        ticket = Ticket(model)
+        try:
+            yield ticket
+        finally:
+            self.release(model, throttled=ticket.throttled)
+
+_scheduler: RequestScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler() -> RequestScheduler:
+    """
+    Returns the process-wide scheduler. ALCHEMIST_MAX_CONCURRENCY caps the
+    number of simultaneous model requests.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            try:
+                max_concurrency = int(os.getenv("ALCHEMIST_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+            except ValueError:
+                max_concurrency = DEFAULT_MAX_CONCURRENCY
+            _scheduler = RequestScheduler(max_concurrency=max_concurrency)
+        return _scheduler
+
+def set_scheduler(scheduler: RequestScheduler) -> None:
+    """Installs a custom scheduler for the process (e.g. benchmark limits)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = scheduler
+
+def reset_scheduler() -> None:
+    """Forgets the process-wide scheduler (the next call builds a fresh one)."""
+    global _scheduler
+    with _scheduler_lock:
+        _scheduler = None
@@ -0,0 +1,175 @@
+import ast
+import re
+from typing import Callable, Iterable
+from .models import FileRecord
+
+# Constant values longer than this (unparsed) are elided to "..."
+MAX_CONSTANT_CHARS = 80
+# Detail levels, most detailed first: "docstrings" keeps imports and
+# docstring summaries, "signatures" keeps only module and class docstrings,
+# "no tests" also leaves out test modules
+LEVELS = ("docstrings", "signatures", "no tests")
+
+_IDENTIFIER_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*")
+
+def _docstring(node: ast.AST) -> list[ast.stmt]:
+    """The docstring statement cut to its first paragraph, if there is one."""
+    body = getattr(node, "body", [])
+    if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) and isinstance(body[0].value.value, str):
+        summary = body[0].value.value.strip().split("\n\n")[0]
+        return [ast.Expr(ast.Constant(" ".join(summary.split())))]
+    return []
+
+def _private(name: str) -> bool:
+    return name.startswith("_") and not name.startswith("__")
+
+def _elide(node: ast.expr) -> ast.expr:
+    return ast.Constant(...) if len(ast.unparse(node)) > MAX_CONSTANT_CHARS else node
+
+def _ellipsis() -> ast.stmt:
+    return ast.Expr(ast.Constant(...))
+
+def _constant(node: ast.Assign | ast.AnnAssign) -> ast.stmt | None:
+    targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+    if all(isinstance(t, ast.Name) and _private(t.id) for t in targets):
+        return None
+    if node.value is not None:
+        node.value = _elide(node.value)
+    return node
+
+class _Skeletonizer:
+    def __init__(self, expand: set[str], level: str) -> None:
+        self.expand = expand
+        self.docstrings = level == "docstrings"
+
+    def wanted(self, qualname: str) -> bool:
+        return qualname in self.expand or qualname.rsplit(".", 1)[-1] in self.expand
+
+    def function(self, node: ast.FunctionDef | ast.AsyncFunctionDef, qualname: str) -> ast.stmt | None:
+        if self.wanted(qualname):
+            return node
+        if _private(node.name):
+            return None
+        # Long decorator arguments (test parametrizations) and defaults add little
+        node.decorator_list = [
+            ast.Call(d.func, [ast.Constant(...)], []) if isinstance(d, ast.Call) and len(ast.unparse(d)) > MAX_CONSTANT_CHARS else d
+            for d in node.decorator_list
+        ]
+        node.args.defaults = [_elide(d) for d in node.args.defaults]
+        node.args.kw_defaults = [_elide(d) if d is not None else None for d in node.args.kw_defaults]
+        node.body = (_docstring(node) if self.docstrings else []) + [_ellipsis()]
+        return node
+
+    def cls(self, node: ast.ClassDef, qualname: str) -> ast.stmt | None:
+        if self.wanted(qualname):
+            return node
+        if _private(node.name):
+            return None
+        body = _docstring(node)
+        for child in node.body[len(body):]:
+            if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kept = self.function(child, f"{qualname}.{child.name}")
+            elif isinstance(child, ast.ClassDef):
+                kept = self.cls(child, f"{qualname}.{child.name}")
+            elif isinstance(child, (ast.Assign, ast.AnnAssign)):
+                kept = _constant(child)
+            else:
+                kept = None
+            if kept is not None:
+                body.append(kept)
+        node.body = body or [_ellipsis()]
+        return node
+
+    def module(self, tree: ast.Module) -> ast.Module:
+        body = _docstring(tree)
+        for node in tree.body[len(body):]:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                kept: ast.stmt | None = node if self.docstrings else None
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+                kept = _constant(node)
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                kept = self.function(node, node.name)
+            elif isinstance(node, ast.ClassDef):
+                kept = self.cls(node, node.name)
+            else:
+                kept = None
+            if kept is not None:
+                body.append(kept)
+        tree.body = body
+        return tree
+
+def skeletonize(source: str, expand: Iterable[str] = (), level: str = LEVELS[0]) -> str | None:
+    """
+    Reduces Python source to its skeleton: module docstring, imports,
+    constants, class hierarchies, public signatures and the first paragraph
+    of docstrings, with every body replaced by "..." and private (_name)
+    helpers dropped; see LEVELS for terser variants. Functions, methods
+    ("Class.method") or classes named in `expand` keep their full source.
+    Returns None if the source does not parse (callers then keep the
+    original text).
+    """
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    return ast.unparse(_Skeletonizer(set(expand), level).module(tree)) + "\n"
+
+def defined_symbols(records: Iterable[FileRecord]) -> set[str]:
+    """Names of the functions, classes and methods defined in .py records."""
+    names: set[str] = set()
+    for record in records:
+        if not record.path.endswith(".py"):
+            continue
+        try:
+            tree = ast.parse(record.content)
+        except (SyntaxError, ValueError):
+            continue
+        for node in tree.body:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                names.add(node.name)
+            if isinstance(node, ast.ClassDef):
+                names.update(f"{node.name}.{child.name}" for child in node.body
+                             if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)))
+    return names
+
+def mentioned_symbols(text: str, symbols: set[str]) -> set[str]:
+    """
+    The `symbols` that `text` (e.g. a question) names explicitly. Only
+    code-like words count (backticked, snake_case, CamelCase, dotted or
+    called), so plain English such as "run" or "main" expands nothing.
+    """
+    words = set(re.findall(r"`([^`]+)`", text))
+    for match in _IDENTIFIER_RE.finditer(text):
+        word = match.group()
+        if "_" in word or "." in word or word[1:] != word[1:].lower() or text[match.end():match.end() + 1] == "(":
+            words.add(word)
+    words.update(w.rsplit(".", 1)[-1] for w in list(words))
+    return {s for s in symbols if s in words or s.rsplit(".", 1)[-1] in words}
+
+def _is_test(path: str) -> bool:
+    parts = path.replace("\\", "/").split("/")
+    return "tests" in parts[:-1] or "test" in parts[:-1] or parts[-1].startswith("test_") or parts[-1] == "conftest.py"
+
+def skeleton_records(records: Iterable[FileRecord], expand: Iterable[str] = (), level: str = LEVELS[0]) -> list[FileRecord]:
+    """Skeletonizes every .py record; other files pass through unchanged."""
+    expand = set(expand)
+    result = []
+    for record in records:
+        if level == "no tests" and _is_test(record.path):
+            continue
+        skeleton = skeletonize(record.content, expand, level) if record.path.endswith(".py") else None
+        result.append(FileRecord(record.path, skeleton) if skeleton is not None else record)
+    return result
+
+def fit_skeleton(
+    records: list[FileRecord], budget: int, estimate: Callable[[str], int], expand: Iterable[str] = ()
+) -> tuple[str, str]:
+    """
+    Renders the most detailed skeleton level that fits in `budget` tokens.
+    Returns the context and the level used (the tersest one if none fits).
+    """
+    for level in LEVELS:
+        context = "\n".join(r.render() for r in skeleton_records(records, expand, level))
+        if estimate(context) <= budget:
+            break
+    return context, level
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+from typing import Any, Callable
+
+# Workspace-local directory for state derived from the working tree
+SNAPSHOT_DIR = ".alchemist"
+SNAPSHOT_VERSION = 1
+# Files modified this recently may change again within the same mtime tick,
+# so their contents are not trusted on the next run (git's "racy" check)
+RACY_WINDOW_NS = 2_000_000_000
+# Memoized token counts kept per estimator
+MAX_TOKEN_ENTRIES = 50000
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+
+class Snapshot:
+    """
+    On-disk index of the scanned tree keyed by path, mtime and size, with
+    each file's content hash and text (or the reason it was skipped), so a
+    rescan only rereads files that changed. Also memoizes token counts per
+    estimator and content hash, which keeps chunk packing from re-estimating
+    unchanged files.
+
+    The index is JSON; file texts live in one UTF-8 blob next to it that is
+    memory-mapped and sliced per file, so loading costs one open instead of
+    one per source file and the texts stay out of the heap until used.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._files: dict[str, dict[str, Any]] = {}
+        self._tokens: dict[str, dict[str, int]] = {}
+        self._blob: mmap.mmap | bytes = b""
+        self._blob_name: str | None = None
+        self._dirty = False
+        self._load()
+
+    def lookup(self, rel_path: str, stat: os.stat_result) -> dict[str, Any] | None:
+        """The stored entry for `rel_path` if its mtime and size are unchanged."""
+        entry = self._files.get(rel_path)
+        if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            return entry
+        return None
+
+    def content(self, entry: dict[str, Any]) -> str | None:
+        """The stored text of an entry (None for skipped files)."""
+        if "content" in entry:
+            return entry["content"]
+        if entry.get("offset") is None:
+            return None
+        return self._blob[entry["offset"]:entry["offset"] + entry["length"]].decode("utf-8")
+
+    def update(self, rel_path: str, stat: os.stat_result, text: str | None, reason: str = "") -> None:
+        """Stores a freshly read file (`text` None with a skip `reason`)."""
+        if time.time_ns() - stat.st_mtime_ns < RACY_WINDOW_NS:
+            with self._lock:
+                self._dirty |= self._files.pop(rel_path, None) is not None
+            return
+        entry = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": content_hash(text) if text is not None else None,
+            "reason": reason,
+            "content": text,
+        }
+        with self._lock:
+            self._files[rel_path] = entry
+            self._dirty = True
+
+    def retain(self, rel_paths: set[str]) -> None:
+        """Drops entries for files that are no longer listed."""
+        with self._lock:
+            stale = [p for p in self._files if p not in rel_paths]
+            for path in stale:
+                del self._files[path]
+            self._dirty |= bool(stale)
+
+    def memo_estimate(self, estimate: Callable[[str], int], signature: str) -> Callable[[str], int]:
+        """
+        Wraps `estimate` with the persistent token-count memo for one
+        estimator `signature` (counts from different ratios never mix).
+        """
+        with self._lock:
+            counts = self._tokens.setdefault(signature, {})
+
+        def memoized(text: str) -> int:
+            key = content_hash(text)
+            count = counts.get(key)
+            if count is None:
+                count = estimate(text)
+                with self._lock:
+                    counts[key] = count
+                    self._dirty = True
+            return count
+        return memoized
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            for counts in self._tokens.values():
+                # Oldest first (insertion order); trimmed in place for live memo wrappers
+                for key in list(counts)[:max(0, len(counts) - MAX_TOKEN_ENTRIES)]:
+                    del counts[key]
+            index_files = {}
+            blob_name = f"contents-{os.getpid()}-{time.time_ns()}.bin"
+            directory = os.path.dirname(self.path)
+            tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                _make_ignored_dir(directory)
+                # The blob goes first: the index only ever names a complete blob
+                offset = 0
+                with open(os.path.join(directory, blob_name), "wb") as f:
+                    for rel_path, entry in self._files.items():
+                        record = {k: v for k, v in entry.items() if k not in ("content", "offset", "length")}
+                        if "content" in entry:
+                            data = entry["content"].encode("utf-8") if entry["content"] is not None else None
+                        elif entry.get("offset") is not None:
+                            data = self._blob[entry["offset"]:entry["offset"] + entry["length"]]
+                        else:
+                            data = None
+                        if data is not None:
+                            record.update(offset=offset, length=len(data))
+                            f.write(data)
+                            offset += len(data)
+                        index_files[rel_path] = record
+                index = {"version": SNAPSHOT_VERSION, "blob": blob_name, "files": index_files, "tokens": self._tokens}
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self.path)
+            except OSError:
+                return
+            old_blob_name = self._blob_name
+            self._close_blob()
+            self._files = index_files
+            try:
+                self._open_blob(blob_name)
+            except OSError:
+                # Offsets are meaningless without the blob: start over next scan
+                self._files = {}
+            self._dirty = False
+        if old_blob_name and old_blob_name != blob_name:
+            try:
+                os.remove(os.path.join(directory, old_blob_name))
+            except OSError:
+                pass
+
+    def _open_blob(self, name: str) -> None:
+        with open(os.path.join(os.path.dirname(str(self.path)), name), "rb") as f:
+            # mmap rejects empty files
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+        self._blob_name = name
+
+    def _close_blob(self) -> None:
+        if isinstance(self._blob, mmap.mmap):
+            self._blob.close()
+        self._blob, self._blob_name = b"", None
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if not isinstance(index, dict) or index.get("version") != SNAPSHOT_VERSION:
+                return
+            self._open_blob(index["blob"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return
+        self._files = index.get("files", {})
+        self._tokens = index.get("tokens", {})
+
+def _make_ignored_dir(directory: str) -> None:
+    """
+    Creates the snapshot directory with a `.gitignore` of `*`, so the copy
+    of the scanned sources never shows up in (or gets committed from) the
+    user's work tree.
+    """
+    os.makedirs(directory, exist_ok=True)
+    ignore = os.path.join(directory, ".gitignore")
+    if not os.path.exists(ignore):
+        with open(ignore, "w", encoding="utf-8") as f:
+            f.write("*\n")
+
+_snapshot: Snapshot | None = None
+_snapshot_lock = threading.Lock()
+
+def get_snapshot_dir() -> str:
+    """ALCHEMIST_SNAPSHOT_DIR, otherwise .alchemist/ in the working directory."""
+    return os.getenv("ALCHEMIST_SNAPSHOT_DIR") or os.path.join(os.getcwd(), SNAPSHOT_DIR)
+
+def get_snapshot() -> Snapshot | None:
+    """
+    Returns the snapshot of the current workspace, or None when disabled
+    with ALCHEMIST_NO_SNAPSHOT.
+    """
+    global _snapshot
+    if os.getenv("ALCHEMIST_NO_SNAPSHOT"):
+        return None
+    path = os.path.join(get_snapshot_dir(), "snapshot.json")
+    with _snapshot_lock:
+        if _snapshot is None or _snapshot.path != path:
+            _snapshot = Snapshot(path)
+        return _snapshot
+
+def reset_snapshot() -> None:
+    """Forgets the in-memory snapshot (the next call reloads it from disk)."""
+    global _snapshot
+    with _snapshot_lock:
+        _snapshot = None
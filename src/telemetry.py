@@ -0,0 +1,212 @@
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterator
+from .cache import get_cache_dir
+
+# Rotate the trace file once it grows past this many bytes
+DEFAULT_TRACE_MAX_BYTES = 5 * 1024 * 1024
+# Rotated files kept next to trace.jsonl (trace.jsonl.1 is the newest)
+TRACE_BACKUPS = 3
+
+class Span:
+    """
+    One timed operation. Attributes set while the span is open are written
+    with it; `outcome` defaults to "ok", or "error" if the block raised.
+    """
+
+    def __init__(self, kind: str, attrs: dict[str, Any]) -> None:
+        self.kind = kind
+        self.attrs = attrs
+        self.start = time.perf_counter()
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+class Tracer:
+    """
+    Appends spans as JSON lines to a size-rotated trace file. Each process is
+    one run; `command` tags spans with the CLI command that produced them.
+    """
+
+    def __init__(self, path: str | None, max_bytes: int = DEFAULT_TRACE_MAX_BYTES, backups: int = TRACE_BACKUPS) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.run = uuid.uuid4().hex[:12]
+        self.command = ""
+        # Called with every finished span, even when writing is disabled
+        self.listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, kind: str, **attrs: Any) -> Iterator[Span]:
+        span = Span(kind, attrs)
+        try:
+            yield span
+        except BaseException:
+            span.attrs.setdefault("outcome", "error")
+            raise
+        finally:
+            self.record(kind, time.perf_counter() - span.start, **span.attrs)
+
+    def record(self, kind: str, latency: float, **attrs: Any) -> None:
+        """Writes a finished span; `latency` is in seconds."""
+        if not self.path and not self.listeners:
+            return
+        entry = {
+            "ts": round(time.time(), 3),
+            "run": self.run,
+            "command": self.command,
+            "kind": kind,
+            "latency_ms": round(latency * 1000, 2),
+            "outcome": "ok",
+        }
+        entry.update({k: v for k, v in attrs.items() if v is not None})
+        for listener in list(self.listeners):
+            listener(entry)
+        if not self.path:
+            return
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) + len(line) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError:
+                pass
+
+    def _rotate(self) -> None:
+        # Caller holds the lock
+        assert self.path
+        for i in range(self.backups - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def files(self) -> list[str]:
+        """Trace files, oldest first."""
+        if not self.path:
+            return []
+        candidates = [f"{self.path}.{i}" for i in range(self.backups, 0, -1)] + [self.path]
+        return [p for p in candidates if os.path.exists(p)]
+
+    def load(self) -> list[dict[str, Any]]:
+        spans = []
+        for path in self.files():
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            spans.append(json.loads(line))
+                        except ValueError:
+                            continue
+            except OSError:
+                continue
+        return spans
+
+    def clear(self) -> None:
+        with self._lock:
+            for path in self.files():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+def summarize(spans: list[dict[str, Any]]) -> dict[str, dict[str, float]]:
+    """
+    Aggregates spans per command: runs, model calls with p50/p95 latency,
+    fallback hops, quota failures, token spend, cache hits, subprocesses,
+    and GitHub API requests with their conditional-cache hits and the
+    lowest rate-limit remainder seen.
+    """
+    by_command: dict[str, list[dict[str, Any]]] = {}
+    for span in spans:
+        by_command.setdefault(span.get("command") or "(none)", []).append(span)
+
+    summary: dict[str, dict[str, float]] = {}
+    for command, rows in sorted(by_command.items()):
+        calls = [r for r in rows if r.get("kind") == "model"]
+        lookups = [r for r in rows if r.get("kind") == "cache"]
+        subprocesses = [r for r in rows if r.get("kind") == "subprocess"]
+        github = [r for r in rows if r.get("kind") == "github"]
+        remaining = [r["rate_remaining"] for r in github if "rate_remaining" in r]
+        latencies = [float(r.get("latency_ms", 0.0)) for r in calls]
+        summary[command] = {
+            "runs": len({r.get("run") for r in rows}),
+            "calls": len(calls),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "fallbacks": sum(1 for r in calls if r.get("attempt", 0) > 0),
+            "quota_failures": sum(1 for r in calls if r.get("outcome") == "quota"),
+            "errors": sum(1 for r in calls if r.get("outcome") in ("error", "timeout")),
+            "estimated_tokens": sum(r.get("est_tokens", 0) for r in calls),
+            "prompt_tokens": sum(r.get("prompt_tokens", 0) for r in calls),
+            "output_tokens": sum(r.get("output_tokens", 0) for r in calls),
+            "chunks": sum(1 for r in rows if r.get("kind") == "chunk"),
+            "cache_hits": sum(1 for r in lookups if r.get("outcome") == "hit"),
+            "cache_lookups": len(lookups),
+            "subprocesses": len(subprocesses),
+            "subprocess_ms": sum(float(r.get("latency_ms", 0.0)) for r in subprocesses),
+            "github_calls": len(github),
+            "github_cache_hits": sum(1 for r in github if r.get("cache") == "hit"),
+            "github_cache_lookups": sum(1 for r in github if r.get("cache")),
+            "rate_remaining": min(remaining) if remaining else -1,
+        }
+    return summary
+
+_tracer: Tracer | None = None
+_tracer_lock = threading.Lock()
+
+def get_tracer() -> Tracer:
+    """
+    Returns the process-wide tracer writing to trace.jsonl in the cache
+    directory. ALCHEMIST_NO_TRACE disables writing; ALCHEMIST_TRACE_MAX_MB
+    sets the rotation size.
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            path: str | None = None
+            if not os.getenv("ALCHEMIST_NO_TRACE"):
+                try:
+                    path = os.path.join(get_cache_dir(), "trace.jsonl")
+                except OSError:
+                    path = None
+            try:
+                max_bytes = int(float(os.getenv("ALCHEMIST_TRACE_MAX_MB", "0")) * 1024 * 1024) or DEFAULT_TRACE_MAX_BYTES
+            except ValueError:
+                max_bytes = DEFAULT_TRACE_MAX_BYTES
+            _tracer = Tracer(path, max_bytes=max_bytes)
+        return _tracer
+
+def reset_tracer() -> None:
+    """Forgets the process-wide tracer (the next call starts a new run)."""
+    global _tracer
+    with _tracer_lock:
+        _tracer = None
+
+def set_command(command: str) -> None:
+    """Tags every later span of this process with the CLI command name."""
+    get_tracer().command = command
+
+def span(kind: str, **attrs: Any) -> ContextManager[Span]:
+    """Shorthand for get_tracer().span(...)."""
+    return get_tracer().span(kind, **attrs)
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Protocol
+from .cache import get_cache_dir
+
+# Characters per token for each content type (calibrated against Gemini/Gemma tokenizers)
+DEFAULT_CHARS_PER_TOKEN: dict[str, float] = {
+    "prose": 4.0,
+    "code": 3.2,
+    "json": 2.6,
+}
+# CJK ideographs and kana are close to one token per character
+CJK_TOKENS_PER_CHAR = 1.0
+
+# Samples per content type needed before calibration overrides the defaults
+MIN_CALIBRATION_SAMPLES = 20
+# Newest samples used for calibration
+MAX_CALIBRATION_SAMPLES = 2000
+# calibration.jsonl is rotated to calibration.jsonl.1 past this size; a
+# sample line is ~80 bytes, so the two files always hold the newest samples
+CALIBRATION_MAX_BYTES = 256 * 1024
+
+_CJK_RE = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯豈-﫿]")
+_CODE_CHARS = "{}()[];=<>+-*/&|!:"
+_CODE_KEYWORDS = re.compile(r"^\s*(def|class|import|from|return|if|for|while|function|const|let|var|public|private|#include)\b", re.MULTILINE)
+
+def classify_content(text: str) -> str:
+    """
+    Guesses the content type of a text sample: 'cjk', 'json', 'code' or 'prose'.
+    """
+    sample = text[:4000]
+    if not sample.strip():
+        return "prose"
+    cjk = len(_CJK_RE.findall(sample))
+    if cjk / len(sample) > 0.2:
+        return "cjk"
+    stripped = sample.lstrip()
+    if stripped[:1] in ("{", "[") and sample.count('"') / len(sample) > 0.03:
+        return "json"
+    symbols = sum(sample.count(c) for c in _CODE_CHARS)
+    if symbols / len(sample) > 0.05 or len(_CODE_KEYWORDS.findall(sample)) >= 3:
+        return "code"
+    return "prose"
+
+class TokenEstimator(Protocol):
+    def estimate(self, text: str) -> int: ...
+
+class HeuristicEstimator:
+    """
+    Character-ratio estimator with a separate ratio per content type.
+    CJK characters are counted individually; the rest uses the type's ratio.
+    """
+
+    def __init__(self, chars_per_token: dict[str, float] | None = None) -> None:
+        self.chars_per_token = dict(DEFAULT_CHARS_PER_TOKEN)
+        if chars_per_token:
+            self.chars_per_token.update(chars_per_token)
+        # Identifies these ratios for persisted token counts (src/snapshot.py)
+        self.signature = "heuristic:" + ",".join(f"{k}={v:.4f}" for k, v in sorted(self.chars_per_token.items()))
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        content_type = classify_content(text)
+        cjk = len(_CJK_RE.findall(text)) if content_type == "cjk" else 0
+        ratio = self.chars_per_token.get(content_type if content_type != "cjk" else "prose", 4.0)
+        return int((len(text) - cjk) / ratio + cjk * CJK_TOKENS_PER_CHAR)
+
+class ApiTokenCounter:
+    """
+    Exact counts from the API's count-tokens endpoint, memoized by content
+    hash. Falls back to the heuristic estimator if the call fails.
+    """
+
+    def __init__(self, provider: Any, model: str, fallback: TokenEstimator | None = None, max_entries: int = 4096) -> None:
+        self.provider = provider
+        self.model = model
+        self.fallback = fallback or HeuristicEstimator()
+        self.max_entries = max_entries
+        self.signature = f"api:{getattr(provider, 'name', 'unknown')}:{model}"
+        self._memo: OrderedDict[str, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def estimate(self, text: str) -> int:
+        if not text:
+            return 0
+        key = hashlib.sha256(text.encode("utf-8", "replace")).hexdigest()
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        try:
+            count = self.provider.count_tokens(self.model, text)
+        except Exception:
+            return self.fallback.estimate(text)
+        with self._lock:
+            self._memo[key] = count
+            if len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return count
+
+_estimator: TokenEstimator | None = None
+_estimator_lock = threading.Lock()
+_calibration_lock = threading.Lock()
+
+def get_estimator() -> TokenEstimator:
+    """
+    Returns the active estimator. ALCHEMIST_TOKEN_ESTIMATOR=api switches to the
+    count-tokens endpoint; otherwise the heuristic uses any stored calibration.
+    """
+    global _estimator
+    with _estimator_lock:
+        if _estimator is None:
+            heuristic = HeuristicEstimator(load_calibrated_ratios())
+            if os.getenv("ALCHEMIST_TOKEN_ESTIMATOR") == "api":
+                from .core import get_provider, SMART_MODELS
+                _estimator = ApiTokenCounter(get_provider(), SMART_MODELS[1], fallback=heuristic)
+            else:
+                _estimator = heuristic
+        return _estimator
+
+def set_estimator(estimator: TokenEstimator | None) -> None:
+    """Installs a custom estimator (None restores the default on next use)."""
+    global _estimator
+    with _estimator_lock:
+        _estimator = estimator
+
+def _calibration_path() -> str:
+    return os.path.join(get_cache_dir(), "calibration.jsonl")
+
+def record_usage(text: str, actual_tokens: int) -> None:
+    """
+    Stores an (estimate, actual) sample taken from a response's usage metadata.
+    """
+    if not text or actual_tokens <= 0:
+        return
+    sample = {
+        "type": classify_content(text),
+        "chars": len(text),
+        "estimated": HeuristicEstimator().estimate(text),
+        "actual": actual_tokens,
+    }
+    line = json.dumps(sample) + "\n"
+    path = _calibration_path()
+    with _calibration_lock:
+        try:
+            if os.path.exists(path) and os.path.getsize(path) + len(line) > CALIBRATION_MAX_BYTES:
+                os.replace(path, f"{path}.1")
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        except OSError:
+            pass
+
+def load_samples() -> list[dict[str, Any]]:
+    """The newest MAX_CALIBRATION_SAMPLES samples (rotated file first)."""
+    path = _calibration_path()
+    lines: list[str] = []
+    for name in (f"{path}.1", path):
+        try:
+            with open(name, "r", encoding="utf-8") as f:
+                lines.extend(f.readlines())
+        except OSError:
+            continue
+    lines = lines[-MAX_CALIBRATION_SAMPLES:]
+    samples = []
+    for line in lines:
+        try:
+            samples.append(json.loads(line))
+        except ValueError:
+            continue
+    return samples
+
+def calibration_report() -> dict[str, dict[str, float]]:
+    """
+    Compares default-heuristic estimates with actual token usage per content type.
+    `error` is the mean relative error of the estimate; `chars_per_token` is
+    the ratio that would have matched the observed usage.
+    """
+    report: dict[str, dict[str, float]] = {}
+    by_type: dict[str, list[dict[str, Any]]] = {}
+    for sample in load_samples():
+        by_type.setdefault(sample["type"], []).append(sample)
+    for content_type, samples in sorted(by_type.items()):
+        chars = sum(s["chars"] for s in samples)
+        estimated = sum(s["estimated"] for s in samples)
+        actual = sum(s["actual"] for s in samples)
+        report[content_type] = {
+            "samples": len(samples),
+            "estimated": estimated,
+            "actual": actual,
+            "error": (estimated - actual) / actual if actual else 0.0,
+            "chars_per_token": chars / actual if actual else 0.0,
+        }
+    return report
+
+def load_calibrated_ratios() -> dict[str, float]:
+    """Calibrated chars-per-token for content types with enough samples."""
+    return {
+        content_type: row["chars_per_token"]
+        for content_type, row in calibration_report().items()
+        if content_type in DEFAULT_CHARS_PER_TOKEN
+        and row["samples"] >= MIN_CALIBRATION_SAMPLES
+        and row["chars_per_token"] > 0
+    }
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import shlex
 import shutil
@@ -5,7 +6,13 @@ import subprocess
 import sys
 import json
 import re
-from typing import Any
+import time
+from typing import Any, Iterator
+from .models import FileRecord
+from .reduction import Reducer
+from .scanner import ScanStats, iter_codebase, iter_source_paths, scan_codebase
+from .snapshot import get_snapshot
+from . import telemetry
 
 def run_shell(command: str, suppress_errors: bool = False, **kwargs: Any) -> str | None:
     """
@@ -34,7 +41,14 @@ def run_shell(command: str, suppress_errors: bool = False, **kwargs: Any) -> str
         else:
             cmd = shlex.split(command, posix=(os.name != 'nt'))
 
-        result = subprocess.run(cmd, shell=use_shell, capture_output=True, text=True, **kwargs)
+        # Trace only the tool (and git/gh subcommand); arguments may carry secrets
+        words = command.split()
+        tool = os.path.basename(words[0]) if words else ""
+        subcommand = words[1] if tool in ("git", "gh") and len(words) > 1 else None
+        with telemetry.span("subprocess", tool=tool, subcommand=subcommand) as span:
+            result = subprocess.run(cmd, shell=use_shell, capture_output=True, text=True, **kwargs)
+            if result.returncode != 0:
+                span.set(outcome="error", exit_code=result.returncode)
 
         if result.returncode != 0 and result.stderr and not suppress_errors:
              # Print error to stderr so the user can see it even if we return stdout
@@ -77,50 +91,90 @@ def parse_json_response(result: str | None) -> Any | None:
         print(f"[JSON Parse Error] Failed to parse: {str(result)[:100]}...", file=sys.stderr)
         return None
 
+def get_codebase_files() -> list[FileRecord]:
+    """
+    Scans the repository and returns one record per source file. Unchanged
+    files come from the .alchemist/ snapshot instead of being reread; the
+    reduction passes (src/reduction.py) run before anything is returned.
+    """
+    with telemetry.span("phase", name="context scan") as span:
+        records, stats = scan_codebase(snapshot=get_snapshot())
+        span.set(**_scan_attrs(stats))
+    reducer = Reducer()
+    start = time.perf_counter()
+    records = list(reducer.reduce_all(records))
+    reducer.finish(time.perf_counter() - start)
+    return records
+
+def iter_codebase_files() -> Iterator[FileRecord]:
+    """
+    Lazy counterpart of get_codebase_files: yields records as they are read,
+    so a consumer that processes them incrementally never holds the whole
+    repository in memory.
+    """
+    stats = ScanStats()
+    reducer = Reducer()
+    reduce_seconds = 0.0
+    for record in iter_codebase(snapshot=get_snapshot(), stats=stats):
+        start = time.perf_counter()
+        reduced = reducer.reduce(record)
+        reduce_seconds += time.perf_counter() - start
+        if reduced is not None:
+            yield reduced
+    # Scan time only: the consumer's work between records is excluded
+    telemetry.get_tracer().record("phase", stats.seconds, name="context scan", streamed=True, **_scan_attrs(stats))
+    reducer.finish(reduce_seconds)
+
+def _scan_attrs(stats: ScanStats) -> dict[str, Any]:
+    return {
+        "files": stats.files,
+        "reused": stats.reused,
+        "bytes": stats.bytes,
+        "source": stats.source,
+        "skipped": stats.skipped or None,
+        "files_per_s": round(stats.files_per_second),
+        "mb_per_s": round(stats.bytes_per_second / 1e6, 2),
+    }
+
+def get_codebase_fingerprint() -> str:
+    """
+    Cheap change detector for the scanned files: hashes every path with its
+    size and modification time without reading contents.
+    """
+    digest = hashlib.sha256()
+    for path in iter_source_paths():
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8", "replace"))
+    return digest.hexdigest()
+
 def get_codebase_context() -> str:
     """
     Scans the repository and aggregates source code into a single context string.
+    Prefer iter_codebase_files when the consumer can work file by file.
     """
-    context = []
-    # Extensions to include
-    extensions = {'.py', '.md', '.ps1', '.sh', '.js', '.ts', '.c', '.cpp', '.h', '.yml', '.yaml', '.Dockerfile', '.json', '.toml'}
-    # Folders to ignore
-    ignore_dirs = {'__pycache__', '.git', 'venv', 'node_modules', '.tmp', 'docs', 'dist', 'build', '.gemini'}
-
-    for root, dirs, files in os.walk("."):
-        # Filter directories in-place
-        dirs[:] = [d for d in dirs if d not in ignore_dirs]
-        
-        for file in files:
-            ext = os.path.splitext(file)[1]
-            if ext in extensions:
-                path = os.path.join(root, file)
-                try:
-                    with open(path, "r", encoding="utf-8") as f:
-                        content = f.read()
-                        context.append(f"--- FILE: {path} ---\n{content}\n")
-                except Exception:
-                    continue
-                    
-    return "\n".join(context)
+    return "\n".join(record.render() for record in get_codebase_files())
 
 def check_gh_auth() -> str | None:
     """
-    Checks if the user is authenticated with GitHub CLI.
+    Checks if the user is authenticated with GitHub (gh token or GH_TOKEN).
     Returns the username if authenticated, else None.
     """
+    # Imported here: requests is only needed by commands that talk to GitHub
+    from .github import GitHubError, get_github
     try:
-        user_login = run_shell('gh api user -q ".login"')
-        return user_login
-    except:
+        return get_github().user().get("login") or None
+    except GitHubError:
         return None
 
 def get_user_email() -> str | None:
     """
-    Gets the user email from GitHub CLI.
+    Gets the user's public email from GitHub.
     """
+    from .github import GitHubError, get_github
     try:
-        email = run_shell('gh api user -q ".email"', check=False)
-        return email if email else None
-    except:
+        return get_github().user().get("email") or None
+    except GitHubError:
         return None
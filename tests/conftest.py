@@ -0,0 +1,191 @@
+import hashlib
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from src import breaker, cache, context_cache, core, git_session, github, http_cache, scheduler, snapshot, telemetry, tokens
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep every test's on-disk state out of the user's real cache directory."""
+    monkeypatch.setenv("ALCHEMIST_CACHE_DIR", str(tmp_path / "alchemist-cache"))
+    monkeypatch.setenv("ALCHEMIST_SNAPSHOT_DIR", str(tmp_path / "alchemist-snapshot"))
+    cache.reset_response_cache()
+    cache.set_cache_enabled(True)
+    scheduler.reset_scheduler()
+    breaker.reset_breaker()
+    tokens.set_estimator(None)
+    core.set_provider(None)
+    telemetry.reset_tracer()
+    context_cache.reset_context_cache()
+    snapshot.reset_snapshot()
+    git_session.reset_git_session()
+    http_cache.reset_http_cache()
+    github.set_github(None)
+    yield
+    cache.reset_response_cache()
+    git_session.reset_git_session()
+    github.set_github(None)
+
+
+class FakeGitHub:
+    """
+    Minimal in-memory GitHub API for tests: the authenticated user, their
+    repositories (topics, readme, description), labels, issues and the
+    repository GraphQL query. GETs carry ETags and honour If-None-Match;
+    responses other than 304 spend `remaining` rate limit.
+    `requests` logs (method, path, headers) of everything received.
+    """
+
+    def __init__(self, login: str = "octo", token: str = "test-token") -> None:
+        self.login = login
+        self.token = token
+        self.email: str | None = "octo@example.com"
+        self.repos: dict[str, dict] = {}
+        self.readmes: dict[str, str] = {}
+        self.labels: dict[str, set[str]] = {}
+        self.issues: list[dict] = []
+        self.pulls: list[dict] = []
+        self.requests: list[tuple[str, str, dict]] = []
+        # Status codes returned (and consumed) before handling the next requests
+        self.failures: list[int] = []
+        self.connections = 0
+        self.remaining = {"core": 5000, "graphql": 5000}
+        # Bumped by every change, standing in for updated_at
+        self.version = 0
+
+    def add_repo(self, name: str, description: str | None = None, topics: list[str] | None = None, readme: str | None = None, **extra) -> None:
+        self.version += 1
+        self.repos[name] = {"updated": self.version,
+            "name": name, "description": description, "topics": topics or [], "private": False, "archived": False,
+            "html_url": f"https://github.com/{self.login}/{name}", "stargazers_count": 0, "license": None,
+            "default_branch": "main", **extra,
+        }
+        if readme is not None:
+            self.readmes[name] = readme
+
+    def repositories_page(self, variables: dict) -> dict:
+        """Answers the viewer.repositories query (cursors are list offsets)."""
+        start = int(variables.get("after") or 0)
+        repos = [r for r in self.repos.values() if variables.get("privacy") != "PUBLIC" or not r["private"]]
+        nodes = []
+        for repo in repos[start:start + variables["first"]]:
+            node = {
+                "name": repo["name"], "description": repo["description"], "url": repo["html_url"],
+                "isPrivate": repo["private"], "isArchived": repo["archived"], "stargazerCount": repo["stargazers_count"],
+                "repositoryTopics": {"nodes": [{"topic": {"name": t}} for t in repo["topics"]]},
+            }
+            if variables["readme"]:
+                text = self.readmes.get(repo["name"])
+                node.update({"readme0": None, "readme1": {"text": text} if text is not None else None})
+            nodes.append(node)
+        end = start + len(nodes)
+        page_info = {"hasNextPage": end < len(repos), "endCursor": str(end)}
+        return {"data": {"viewer": {"repositories": {"pageInfo": page_info, "nodes": nodes}}}}
+
+    def handle(self, method: str, path: str, query: dict, body: dict | None) -> tuple[int, object]:
+        parts = path.strip("/").split("/")
+        if parts == ["user"]:
+            return 200, {"login": self.login, "email": self.email}
+        if parts == ["user", "repos"]:
+            newest = sorted(self.repos.values(), key=lambda r: -r["updated"])
+            return 200, newest[:int(query.get("per_page", ["30"])[0])]
+        if parts == ["graphql"]:
+            return 200, self.repositories_page(body["variables"])
+        if len(parts) < 3 or parts[0] != "repos" or parts[2] not in self.repos:
+            return 404, {"message": "Not Found"}
+        repo = self.repos[parts[2]]
+        rest = parts[3:]
+        if not rest and method == "GET":
+            return 200, repo
+        if not rest and method == "PATCH":
+            self.version += 1
+            repo.update(body or {}, updated=self.version)
+            return 200, repo
+        if rest == ["readme"]:
+            text = self.readmes.get(repo["name"])
+            return (200, text) if text is not None else (404, {"message": "Not Found"})
+        if rest == ["topics"] and method == "PUT":
+            self.version += 1
+            repo.update(topics=body["names"], updated=self.version)
+            return 200, {"names": body["names"]}
+        if rest == ["labels"] and method == "POST":
+            labels = self.labels.setdefault(repo["name"], set())
+            if body["name"] in labels:
+                return 422, {"message": "Validation Failed", "errors": [{"resource": "Label", "code": "already_exists", "field": "name"}]}
+            if not re.fullmatch(r"[0-9a-fA-F]{6}", body.get("color", "")):
+                return 422, {"message": "Validation Failed", "errors": [{"resource": "Label", "code": "invalid", "field": "color"}]}
+            labels.add(body["name"])
+            return 201, body
+        if rest == ["issues"] and method == "POST":
+            self.issues.append(body)
+            return 201, {"html_url": f"{repo['html_url']}/issues/{len(self.issues)}"}
+        if rest == ["pulls"] and method == "POST":
+            self.pulls.append(body)
+            return 201, {"html_url": f"{repo['html_url']}/pull/{len(self.pulls)}"}
+        return 404, {"message": "Not Found"}
+
+
+def _handler(fake: FakeGitHub) -> type[BaseHTTPRequestHandler]:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            fake.connections += 1
+
+        def respond(self) -> None:
+            url = urlparse(self.path)
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            fake.requests.append((self.command, url.path, dict(self.headers)))
+            if self.headers.get("Authorization") != f"Bearer {fake.token}":
+                status, payload = 401, {"message": "Bad credentials"}
+            elif fake.failures:
+                status, payload = fake.failures.pop(0), {"message": "Server Error"}
+            else:
+                status, payload = fake.handle(self.command, url.path, parse_qs(url.query), body)
+            raw = payload.encode() if isinstance(payload, str) else json.dumps(payload).encode()
+            etag = f'"{hashlib.sha1(raw).hexdigest()}"' if self.command == "GET" and status == 200 else None
+            if etag and self.headers.get("If-None-Match") == etag:
+                status, raw = 304, b""
+            resource = "graphql" if url.path == "/graphql" else "core"
+            if status != 304:
+                fake.remaining[resource] -= 1
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain" if isinstance(payload, str) else "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.send_header("X-RateLimit-Limit", "5000")
+            self.send_header("X-RateLimit-Remaining", str(fake.remaining[resource]))
+            self.send_header("X-RateLimit-Reset", "1700000000")
+            self.send_header("X-RateLimit-Resource", resource)
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        do_GET = do_POST = do_PUT = do_PATCH = respond
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return Handler
+
+
+@pytest.fixture
+def fake_github():
+    """A FakeGitHub served on localhost, installed as the process-wide client."""
+    fake = FakeGitHub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _handler(fake))
+    threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+    client = github.GitHubClient(fake.token, f"http://127.0.0.1:{server.server_address[1]}", backoff=0, cache=http_cache.get_http_cache())
+    github.set_github(client)
+    yield fake
+    github.set_github(None)
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,174 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src import core
+from src.chunking import OPEN_BINS
+from src.models import FileRecord
+from src.providers import FakeProvider, GeminiProvider
+from src.scheduler import ModelLimits, RequestScheduler, set_scheduler
+
+from src.core import estimate_tokens, gather_bounded, generate_with_fallback_async, generate_many, group_by_budget, reduce_summaries
+
+
+class FakeAsyncClient:
+    """Mimics client.aio.models.generate_content with a canned behaviour per model."""
+
+    def __init__(self, behaviour, delay=0.0):
+        self.behaviour = behaviour
+        self.delay = delay
+        self.calls = []
+        self.aio = MagicMock()
+        self.aio.models.generate_content = self.generate_content
+
+    async def generate_content(self, model, contents):
+        self.calls.append(model)
+        await asyncio.sleep(self.delay)
+        outcome = self.behaviour(model, contents)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = MagicMock()
+        response.text = outcome
+        return response
+
+
+class TestGatherBounded:
+    def test_preserves_order_and_bounds_concurrency(self):
+        running = 0
+        peak = 0
+
+        async def work(i):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+            return i
+
+        results = asyncio.run(gather_bounded((work(i) for i in range(10)), limit=3))
+        assert results == list(range(10))
+        assert peak == 3
+
+    def test_timeouts_and_errors_returned_in_place(self):
+        async def slow():
+            await asyncio.sleep(1)
+
+        async def boom():
+            raise ValueError("bad")
+
+        async def ok():
+            return "ok"
+
+        results = asyncio.run(gather_bounded([slow(), boom(), ok()], limit=3, timeout=0.05))
+        assert isinstance(results[0], asyncio.TimeoutError)
+        assert isinstance(results[1], ValueError)
+        assert results[2] == "ok"
+
+
+class TestGenerateWithFallbackAsync:
+    def test_falls_back_on_quota(self):
+        client = FakeAsyncClient(lambda m, p: Exception("429 RESOURCE_EXHAUSTED") if m == "a" else f"from {m}")
+        result = asyncio.run(generate_with_fallback_async(GeminiProvider(client), "p", ["a", "b"], silent=True))
+        assert result == "from b"
+        assert client.calls == ["a", "b"]
+
+    def test_skips_a_model_without_rate_limit_budget(self):
+        scheduler = RequestScheduler(limits={"a": ModelLimits(rpm=30, tpm=15000), "b": ModelLimits(rpm=30, tpm=15000)})
+        set_scheduler(scheduler)
+        scheduler.try_admit("a", 12000)
+        scheduler.release("a")
+        client = FakeAsyncClient(lambda m, p: f"from {m}")
+        prompt = "x" * 40000
+        result = asyncio.run(generate_with_fallback_async(GeminiProvider(client), prompt, ["a", "b"], silent=True, use_cache=False))
+        assert result == "from b"
+        assert client.calls == ["b"]
+
+    def test_waiting_for_every_model_prints_one_notice(self, capsys, monkeypatch):
+        monkeypatch.setattr(core, "_wait_notice_until", 0.0)
+        core.notify_rate_limit_wait(30)
+        core.notify_rate_limit_wait(29)
+        core.notify_rate_limit_wait(0.05)
+        assert capsys.readouterr().out.count("Waiting 30s for rate limit") == 1
+
+    def test_timeout_moves_to_next_model(self):
+        client = FakeAsyncClient(lambda m, p: m, delay=0.2)
+        result = asyncio.run(generate_with_fallback_async(GeminiProvider(client), "p", ["a"], silent=True, timeout=0.01))
+        assert result is None
+
+
+class TestGenerateMany:
+    def test_runs_all_prompts(self):
+        client = FakeAsyncClient(lambda m, p: p.upper())
+        with patch("src.core.get_provider", return_value=GeminiProvider(client)):
+            results = generate_many(["one", "two", "three"])
+        assert results == ["ONE", "TWO", "THREE"]
+
+    def test_failed_prompts_are_none(self):
+        client = FakeAsyncClient(lambda m, p: Exception("500 INTERNAL") if p == "bad" else p.upper())
+        with patch("src.core.get_provider", return_value=GeminiProvider(client)):
+            results = generate_many(["one", "bad"])
+        # Not the NO_ANSWER placeholder, which callers would publish as a result
+        assert results == ["ONE", None]
+
+
+class TestTreeReduce:
+    def test_group_by_budget_always_makes_progress(self):
+        summaries = ["x" * 400] * 5  # ~100 tokens each
+        assert [len(g) for g in group_by_budget(summaries, 250)] == [2, 2, 1]
+        assert [len(g) for g in group_by_budget(summaries, 10)] == [2, 2, 1]
+
+    def test_reduces_in_multiple_levels(self):
+        prompts = []
+
+        def behaviour(model, prompt):
+            prompts.append(prompt)
+            return "merged finding " + "y" * 1000
+
+        client = FakeAsyncClient(behaviour)
+        summaries = [f"finding {i} " + "x" * 400 for i in range(16)]
+        result = asyncio.run(reduce_summaries(GeminiProvider(client), summaries, "question", ["m"], limit=600))
+        assert result.startswith("merged finding")
+        merges = [p for p in prompts if "do NOT" in p]
+        finals = [p for p in prompts if "answer the original user request" in p]
+        assert len(finals) == 1
+        assert len(merges) == 4 + 2  # level 1: 16 -> 4 groups, level 2: 4 -> 2 groups
+        assert all(estimate_tokens(p) <= 600 for p in merges + finals)
+
+    def test_small_input_goes_straight_to_final_answer(self):
+        client = FakeAsyncClient(lambda m, p: "answer")
+        assert asyncio.run(reduce_summaries(GeminiProvider(client), ["a", "b"], "q", ["m"], limit=10000)) == "answer"
+        assert len(client.calls) == 1
+
+
+class TestStreamedFiles:
+    @pytest.fixture(autouse=True)
+    def fast_scheduler(self):
+        set_scheduler(RequestScheduler(max_concurrency=2, limits={m: ModelLimits(rpm=10000, tpm=10**9) for m in core.FAST_MODELS}))
+
+    def test_small_stream_is_a_single_request(self):
+        provider = FakeProvider(latency=0, tokens_per_second=1e9)
+        core.set_provider(provider)
+        records = [FileRecord("./a.py", "a = 1\n"), FileRecord("./b.py", "b = 2\n")]
+        streamed = core.generate_content("question", files=iter(records))
+        assert provider.calls == 1
+        core.set_provider(FakeProvider(latency=0, tokens_per_second=1e9))
+        assert streamed == core.generate_content("question", context="\n".join(r.render() for r in records))
+
+    def test_large_stream_is_mapped_with_bounded_read_ahead(self):
+        provider = FakeProvider(latency=0.01, tokens_per_second=1e9)
+        core.set_provider(provider)
+        body = "value = compute(value) + 1\n" * 1500
+        read_ahead = []
+
+        def records():
+            for i in range(40):
+                # Files read so far minus chunks already sent to the model
+                read_ahead.append(i - provider.calls)
+                yield FileRecord(f"./f{i}.py", body)
+
+        result = core.generate_content("question", files=records())
+        assert result
+        assert provider.calls > 10  # map chunks plus the reduce
+        # Each file fills most of a chunk: at most the in-flight and open chunks are ahead
+        assert max(read_ahead) <= 2 + OPEN_BINS + 2
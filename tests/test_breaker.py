@@ -0,0 +1,80 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.breaker import CircuitBreaker, parse_retry_after, DEFAULT_QUOTA_COOLDOWN, FAILURE_THRESHOLD
+from src.core import generate_with_fallback
+from src.providers import GeminiProvider
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("429 Too Many Requests. Retry-After: 12", 12.0),
+    ('RESOURCE_EXHAUSTED {"retryDelay": "37s"}', 37.0),
+    ("Quota exceeded. Please retry in 4.5s.", 4.5),
+    ("500 Internal error", None),
+])
+def test_parse_retry_after(message, expected):
+    assert parse_retry_after(message) == expected
+
+
+class TestCircuitBreaker:
+    def test_quota_error_opens_until_cooldown(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(clock=clock)
+        breaker.record_quota_error("a", "retry in 10s")
+        assert breaker.available(["a", "b"]) == ["b"]
+        clock.now += 11
+        assert breaker.available(["a", "b"]) == ["a", "b"]
+
+    def test_default_cooldown_without_hint(self):
+        breaker = CircuitBreaker(clock=FakeClock())
+        assert breaker.record_quota_error("a", "429") == DEFAULT_QUOTA_COOLDOWN
+
+    def test_repeated_errors_open_circuit(self):
+        breaker = CircuitBreaker(clock=FakeClock())
+        for _ in range(FAILURE_THRESHOLD - 1):
+            breaker.record_failure("a")
+        assert not breaker.is_open("a")
+        breaker.record_failure("a")
+        assert breaker.is_open("a")
+
+    def test_all_open_returns_soonest_probe(self):
+        breaker = CircuitBreaker(clock=FakeClock())
+        breaker.record_quota_error("a", "retry in 50s")
+        breaker.record_quota_error("b", "retry in 5s")
+        assert breaker.available(["a", "b"]) == ["b"]
+
+    def test_state_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / "breaker.json")
+        clock = FakeClock()
+        CircuitBreaker(path, clock=clock).record_quota_error("a", "retry in 30s")
+        reloaded = CircuitBreaker(path, clock=clock)
+        assert reloaded.is_open("a")
+        reloaded.record_success("a")
+        assert not CircuitBreaker(path, clock=clock).is_open("a")
+
+
+def test_generate_with_fallback_skips_exhausted_model_on_next_prompt():
+    client = MagicMock()
+    calls = []
+
+    def generate(model, contents):
+        calls.append(model)
+        if model == "a":
+            raise Exception("429 RESOURCE_EXHAUSTED")
+        response = MagicMock()
+        response.text = "ok"
+        return response
+
+    client.models.generate_content.side_effect = generate
+    generate_with_fallback(GeminiProvider(client), "first", ["a", "b"], silent=True)
+    generate_with_fallback(GeminiProvider(client), "second", ["a", "b"], silent=True)
+    assert calls == ["a", "b", "b"]
@@ -0,0 +1,71 @@
+from unittest.mock import MagicMock
+
+from src.cache import ResponseCache, make_cache_key, get_response_cache, set_cache_enabled
+from src.core import generate_with_fallback
+from src.providers import GeminiProvider
+
+
+def _response(text):
+    response = MagicMock()
+    response.text = text
+    return response
+
+
+class TestCacheKey:
+    def test_stable(self):
+        assert make_cache_key(["m1"], "p", "c") == make_cache_key(["m1"], "p", "c")
+
+    def test_parts_do_not_collide(self):
+        assert make_cache_key(["m"], "ab", "c") != make_cache_key(["m"], "a", "bc")
+
+    def test_tier_is_part_of_key(self):
+        assert make_cache_key(["fast"], "p") != make_cache_key(["smart"], "p")
+
+
+class TestResponseCache:
+    def test_roundtrip_and_counters(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "c.sqlite3"))
+        assert cache.get("k") is None
+        cache.set("k", "value")
+        assert cache.get("k") == "value"
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+
+    def test_ttl_expiry(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "c.sqlite3"), ttl=-1)
+        cache.set("k", "value")
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(str(tmp_path / "c.sqlite3"), max_bytes=10)
+        cache.set("a", "12345")
+        cache.set("b", "12345")
+        cache.get("a")  # "b" becomes least recently used
+        cache.set("c", "12345")
+        assert cache.get("b") is None
+        assert cache.get("a") == "12345"
+        assert cache.evictions == 1
+
+    def test_persists_between_instances(self, tmp_path):
+        path = str(tmp_path / "c.sqlite3")
+        ResponseCache(path).set("k", "value")
+        assert ResponseCache(path).get("k") == "value"
+
+
+class TestGenerateWithFallbackCache:
+    def test_second_call_skips_api(self):
+        client = MagicMock()
+        client.models.generate_content.return_value = _response("answer")
+        assert generate_with_fallback(GeminiProvider(client), "prompt", ["m"], silent=True) == "answer"
+        assert generate_with_fallback(GeminiProvider(client), "prompt", ["m"], silent=True) == "answer"
+        assert client.models.generate_content.call_count == 1
+
+    def test_disabled_cache_always_calls_api(self):
+        set_cache_enabled(False)
+        assert get_response_cache() is None
+        client = MagicMock()
+        client.models.generate_content.return_value = _response("answer")
+        generate_with_fallback(GeminiProvider(client), "prompt", ["m"], silent=True)
+        generate_with_fallback(GeminiProvider(client), "prompt", ["m"], silent=True)
+        assert client.models.generate_content.call_count == 2
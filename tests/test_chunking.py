@@ -0,0 +1,89 @@
+from src.chunking import group_blocks, pack_records, pack_stream, parse_context_records, split_record
+from src.core import estimate_tokens, split_context
+from src.models import FileRecord
+
+
+def render_context(records):
+    return "\n".join(r.render() for r in records)
+
+
+class TestParseContextRecords:
+    def test_roundtrip(self):
+        records = [FileRecord("./a.py", "print(1)\n"), FileRecord("./b.md", "# Title")]
+        assert parse_context_records(render_context(records)) == records
+
+    def test_plain_text_is_single_record(self):
+        assert parse_context_records("just text") == [FileRecord("", "just text")]
+
+
+class TestPackRecords:
+    def test_files_are_never_cut_when_they_fit(self):
+        records = [FileRecord(f"./f{i}.md", "word " * 40) for i in range(10)]
+        chunks = pack_records(records, 200, estimate_tokens)
+        for record in records:
+            assert sum(record.render() in chunk for chunk in chunks) == 1
+        assert all(estimate_tokens(chunk) <= 200 for chunk in chunks)
+
+    def test_packs_into_fewest_chunks(self):
+        # Sizes 6,4,6,4 (x10 tokens) fit two per chunk with best-fit decreasing
+        records = [FileRecord("", "x" * n * 40) for n in (6, 4, 6, 4)]
+        assert len(pack_records(records, 100, estimate_tokens)) == 2
+
+    def test_headers_are_never_split(self):
+        big = FileRecord("./big.py", "".join(f"def f{i}():\n    return {i}\n\n" for i in range(300)))
+        for chunk in split_context(big.render(), 200):
+            assert chunk.startswith("--- FILE: ./big.py (part ")
+
+
+class TestPackStream:
+    def test_matches_pack_records_for_whole_files(self):
+        records = [FileRecord(f"./f{i}.md", "word " * (10 + i * 7 % 50)) for i in range(60)]
+        chunks = list(pack_stream(records, 300, estimate_tokens))
+        for record in records:
+            assert sum(record.render() in chunk for chunk in chunks) == 1
+        for chunk in chunks:
+            assert sum(estimate_tokens(r.render()) for r in records if r.render() in chunk) <= 300
+        assert len(chunks) <= len(pack_records(records, 300, estimate_tokens)) + 1
+
+    def test_consumes_input_lazily(self):
+        pulled = []
+
+        def records():
+            for i in range(100):
+                pulled.append(i)
+                yield FileRecord(f"./f{i}.md", "word " * 40)
+
+        stream = pack_stream(records(), 100, estimate_tokens, open_bins=2)
+        next(stream)
+        assert len(pulled) < 10
+
+    def test_oversized_files_are_split(self):
+        big = FileRecord("./big.py", "".join(f"def f{i}():\n    return {i}\n\n" for i in range(300)))
+        chunks = list(pack_stream([FileRecord("./a.py", "a = 1\n"), big], 200, estimate_tokens))
+        assert sum("(part " in chunk for chunk in chunks) > 1
+        assert any("./a.py" in chunk for chunk in chunks)
+
+
+class TestSplitRecord:
+    def test_splits_at_definition_boundaries(self):
+        source = "".join(f"def f{i}():\n    return {i}\n" for i in range(100))
+        parts = split_record(FileRecord("./m.py", source), 60, estimate_tokens)
+        assert len(parts) > 1
+        assert all(part.content.startswith("def f") for part in parts)
+        assert "".join(part.content for part in parts) == source
+
+    def test_decorators_stay_with_definition(self):
+        source = "".join(f"@decorator\ndef f{i}():\n    return {i}\n" for i in range(100))
+        parts = split_record(FileRecord("./m.py", source), 60, estimate_tokens)
+        assert all(part.content.startswith("@decorator\ndef f") for part in parts)
+
+
+class TestGroupBlocks:
+    def test_pieces_hold_whole_blocks(self):
+        source = "".join(f"def f{i}():\n    return {i}\n" for i in range(20))
+        pieces = group_blocks(source, 60)
+        assert len(pieces) > 1
+        assert all(piece.startswith("def f") for piece in pieces)
+        assert "".join(pieces) == source
+        # A block larger than the budget is kept whole
+        assert group_blocks("def big():\n" + "    x = 1\n" * 20, 10) == ["def big():\n" + "    x = 1\n" * 20]
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.cli import COMMANDS, load_command
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyCommands:
+    @pytest.mark.parametrize("name", sorted(COMMANDS))
+    def test_every_command_resolves(self, name):
+        assert callable(load_command(name))
+
+    def test_cli_import_skips_sdk_and_command_modules(self):
+        code = "import sys, src.cli; print(sorted(m for m in ('google.genai', 'src.core', 'src.sage') if m in sys.modules))"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+        assert out.strip() == "[]"
+
+    def test_sdk_loaded_only_for_real_clients(self):
+        code = "import sys, src.sage; print('google.genai' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=ROOT).stdout
+        assert out.strip() == "False"
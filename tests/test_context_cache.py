@@ -0,0 +1,171 @@
+import json
+import os
+
+import pytest
+
+from src import core
+from src.cache import set_cache_enabled
+from src.context_cache import UNSUPPORTED_RECHECK, ContextCache
+from src.providers import FakeProvider
+from src.scheduler import ModelLimits, RequestScheduler, set_scheduler
+from src.utils import get_codebase_fingerprint
+
+CONTEXT = "--- FILE: ./app.py ---\n" + "def handler(value):\n    return value * 2\n" * 800
+
+
+def fake():
+    return FakeProvider(latency=0, tokens_per_second=1e9)
+
+
+class TestContextCache:
+    def test_registers_once_and_reuses_handle(self, tmp_path):
+        provider = fake()
+        cache = ContextCache(str(tmp_path / "handles.json"))
+        first = cache.handle(provider, "m", CONTEXT)
+        assert first and cache.handle(provider, "m", CONTEXT) == first
+        assert provider.context_caches_created == 1
+
+    def test_changed_context_replaces_stale_cache(self, tmp_path):
+        provider = fake()
+        cache = ContextCache(str(tmp_path / "handles.json"))
+        first = cache.handle(provider, "m", CONTEXT)
+        second = cache.handle(provider, "m", CONTEXT + "# edited\n")
+        assert second != first
+        assert list(provider.context_caches) == [second]
+
+    def test_handles_persist_across_runs(self, tmp_path):
+        provider = fake()
+        path = str(tmp_path / "handles.json")
+        handle = ContextCache(path).handle(provider, "m", CONTEXT)
+        assert ContextCache(path).handle(provider, "m", CONTEXT) == handle
+        assert provider.context_caches_created == 1
+
+    def test_expired_handle_is_recreated(self, tmp_path):
+        provider = fake()
+        now = [1000.0]
+        cache = ContextCache(str(tmp_path / "handles.json"), ttl=600, clock=lambda: now[0])
+        first = cache.handle(provider, "m", CONTEXT)
+        now[0] += 580
+        assert cache.handle(provider, "m", CONTEXT) != first
+
+    def test_unsupported_model_is_not_retried(self, tmp_path):
+        class NoCaching(FakeProvider):
+            attempts = 0
+
+            def create_context_cache(self, model, context, ttl):
+                self.attempts += 1
+                raise RuntimeError("400 INVALID_ARGUMENT: model does not support caching")
+
+        provider = NoCaching(latency=0)
+        cache = ContextCache(None)
+        assert cache.handle(provider, "gemma", CONTEXT) is None
+        assert cache.handle(provider, "gemma", CONTEXT) is None
+        assert provider.attempts == 1
+
+    def test_unsupported_models_persist_across_runs(self, tmp_path):
+        class Rejecting(FakeProvider):
+            attempts = 0
+
+            def create_context_cache(self, model, context, ttl):
+                self.attempts += 1
+                raise RuntimeError("400 INVALID_ARGUMENT: Cached content is too small")
+
+        provider = Rejecting(latency=0)
+        path = str(tmp_path / "handles.json")
+        now = [1000.0]
+        # Any non-transient 4xx counts, whatever its wording
+        assert ContextCache(path, clock=lambda: now[0]).handle(provider, "m", CONTEXT) is None
+        assert ContextCache(path, clock=lambda: now[0]).handle(provider, "m", CONTEXT) is None
+        assert provider.attempts == 1
+        now[0] += UNSUPPORTED_RECHECK + 1
+        ContextCache(path, clock=lambda: now[0]).handle(provider, "m", CONTEXT)
+        assert provider.attempts == 2
+
+    def test_gemma_is_never_asked(self):
+        provider = fake()
+        assert ContextCache(None).handle(provider, core.FAST_MODELS[0], CONTEXT) is None
+        assert provider.context_caches_created == 0
+
+    def test_reads_handles_written_by_older_versions(self, tmp_path):
+        path = tmp_path / "handles.json"
+        key = f"fake|m|{os.getcwd()}"
+        path.write_text(json.dumps({key: {"digest": "d", "handle": "cachedContents/old", "expires": 1e12}}))
+        cache = ContextCache(str(path))
+        cache.invalidate("cachedContents/other")
+        assert json.loads(path.read_text())["entries"][key]["handle"] == "cachedContents/old"
+
+    def test_transient_errors_are_retried(self, tmp_path):
+        class Flaky(FakeProvider):
+            errors = ["429 RESOURCE_EXHAUSTED. Please retry in 1s.", "Connection reset by peer", "503 UNAVAILABLE"]
+
+            def create_context_cache(self, model, context, ttl):
+                if self.errors:
+                    raise RuntimeError(self.errors.pop(0))
+                return super().create_context_cache(model, context, ttl)
+
+        provider = Flaky(latency=0)
+        cache = ContextCache(None)
+        for _ in range(3):
+            assert cache.handle(provider, "m", CONTEXT) is None
+        assert cache.handle(provider, "m", CONTEXT) is not None
+
+
+class TestCachedStreaming:
+    @pytest.fixture(autouse=True)
+    def generous_limits(self):
+        set_scheduler(RequestScheduler(limits={m: ModelLimits(rpm=1000, tpm=10**8) for m in core.FAST_MODELS + core.SMART_MODELS}))
+
+    def test_repeated_questions_send_context_once(self):
+        provider = fake()
+        core.set_provider(provider)
+        core.generate_content_stream("question one", mode="smart", context=CONTEXT, cache_context=True)
+        sent_first = provider.sent_chars
+        core.generate_content_stream("question two", mode="smart", context=CONTEXT, cache_context=True)
+        assert provider.context_caches_created == 1
+        assert provider.sent_chars - sent_first < 100
+        assert sent_first < len(CONTEXT)
+
+    def test_answer_matches_inline_context(self):
+        set_cache_enabled(False)
+        core.set_provider(fake())
+        cached = core.generate_content_stream("question", mode="smart", context=CONTEXT, cache_context=True)
+        inline = core.generate_content_stream("question", mode="smart", context=CONTEXT)
+        assert cached == inline
+
+    def test_lost_server_cache_falls_back_and_recovers(self):
+        provider = fake()
+        core.set_provider(provider)
+        core.generate_content_stream("question one", mode="smart", context=CONTEXT, cache_context=True)
+        provider.context_caches.clear()  # e.g. expired server-side
+        # The stale handle fails on the first model; the next model registers its own
+        result = core.generate_content_stream("question two", mode="smart", context=CONTEXT, cache_context=True)
+        assert result.startswith(f"[fake:{core.SMART_MODELS[1]}]")
+        core.generate_content_stream("question three", mode="smart", context=CONTEXT, cache_context=True)
+        assert provider.context_caches_created == 3
+        assert len(provider.context_caches) == 2
+
+    def test_fast_mode_sends_context_inline(self):
+        provider = fake()
+        core.set_provider(provider)
+        core.generate_content_stream("question", context=CONTEXT, cache_context=True)
+        assert provider.context_caches_created == 0
+        assert provider.sent_chars > len(CONTEXT)
+
+    def test_small_context_is_sent_inline(self):
+        provider = fake()
+        core.set_provider(provider)
+        core.generate_content_stream("question", mode="smart", context="tiny context", cache_context=True)
+        assert provider.context_caches_created == 0
+
+
+class TestCodebaseFingerprint:
+    def test_changes_when_a_file_changes(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "a.py").write_text("x = 1\n")
+        before = get_codebase_fingerprint()
+        assert get_codebase_fingerprint() == before
+        (tmp_path / "a.py").write_text("x = 22\n")
+        assert get_codebase_fingerprint() != before
+        (tmp_path / "b.py").write_text("")
+        os.remove(tmp_path / "a.py")
+        assert get_codebase_fingerprint() != before
@@ -1,25 +1,27 @@
 import pytest
-from src.core import estimate_tokens, split_context, CHARS_PER_TOKEN
+from src.core import estimate_tokens, split_context, get_gemini_client, get_pool_size, reset_clients
 
 class TestTokenEstimation:
     @pytest.mark.parametrize("text, expected",[
-        ("A" * (CHARS_PER_TOKEN * 10), 10),                 # Scalable check
+        ("A" * 40, 10),                                     # Scalable check
         ("A" * 7, 1),                                       # Floor division check
         ("A", 0),                                           # Small string check
-        (" " * (CHARS_PER_TOKEN * 5), 5),                   # Whitespace check
+        (" " * 20, 5),                                      # Whitespace check
         ("", 0),                                            # Empty string
         (None, 0),                                          # Null safety
     ])
     def test_estimate_tokens(self, text, expected):
         """
-        Ensure token estimation follows floor division based on CHARS_PER_TOKEN.
+        Ensure token estimation follows floor division by the prose ratio
+        (4 characters per token, see DEFAULT_CHARS_PER_TOKEN).
         """
         assert estimate_tokens(text) == expected
 
 class TestContextSplitting:
     @pytest.mark.parametrize("context, limit, expected", [
         ("ABCDEFGHIJKL", 1, ["ABCD", "EFGH", "IJKL"]),      # The happy path
-        ("AAAAB", 1, ["AAAA", "B"]),                        # Right above the limit
+        ("AAAAB", 1, ["AAAAB"]),                            # Estimated at 1 token, so it fits the limit
+        ("AAAAAAAAB", 1, ["AAAA", "AAAA", "B"]),            # Oversized text is cut at the limit
         ("", 1, []),                                        # Empty string
     ])
     def test_split_context(self, context, limit, expected):
@@ -37,4 +39,27 @@ class TestContextSplitting:
     def test_split_null_fail(self):
         # This documents that the function currently crashes on context=None
         with pytest.raises(TypeError):
-            split_context(None, 1)
\ No newline at end of file
+            split_context(None, 1)
+
+class TestClientRegistry:
+    @pytest.fixture(autouse=True)
+    def fresh_registry(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        monkeypatch.delenv("GEMINI_BASE_URL", raising=False)
+        reset_clients()
+        yield
+        reset_clients()
+
+    def test_client_is_reused(self):
+        assert get_gemini_client() is get_gemini_client()
+
+    def test_pool_size_follows_env(self, monkeypatch):
+        monkeypatch.setenv("ALCHEMIST_POOL_SIZE", "3")
+        assert get_pool_size() == 3
+        monkeypatch.setenv("ALCHEMIST_POOL_SIZE", "bogus")
+        assert get_pool_size() >= 1
+
+    def test_pool_size_change_builds_new_client(self, monkeypatch):
+        first = get_gemini_client()
+        monkeypatch.setenv("ALCHEMIST_POOL_SIZE", "2")
+        assert get_gemini_client() is not first
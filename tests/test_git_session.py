@@ -0,0 +1,111 @@
+import os
+import subprocess
+
+import pytest
+
+from src.committer import get_staged_diff
+from src.forge import get_branch_diff
+from src.git_session import GitError, GitSession, get_git_session
+
+
+def git(root, *args):
+    return subprocess.run(["git", *args], cwd=root, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    git(tmp_path, "config", "user.email", "dev@example.com")
+    git(tmp_path, "config", "user.name", "Dev")
+    (tmp_path / "app.py").write_text("print('v1')\n")
+    git(tmp_path, "add", "app.py")
+    git(tmp_path, "commit", "-q", "-m", "first")
+    return tmp_path
+
+
+class TestGitSession:
+    def test_lookups_share_one_reader(self, repo):
+        session = GitSession(str(repo))
+        head = git(repo, "rev-parse", "HEAD")
+        assert session.resolve("HEAD") == head
+        assert session.resolve("main") == head
+        assert session.resolve("no-such-branch") is None
+        assert session.read("HEAD:app.py") == b"print('v1')\n"
+        assert session.read("HEAD:missing.py") is None
+        # One --batch-check and one --batch process for all of the above
+        assert session.spawned == 2
+        session.close()
+
+    def test_names_with_spaces(self, repo):
+        (repo / "my file.py").write_text("x = 1\n")
+        git(repo, "add", "my file.py")
+        git(repo, "commit", "-q", "-m", "spaced")
+        session = GitSession(str(repo))
+        assert session.read("HEAD:my file.py") == b"x = 1\n"
+        assert session.read("HEAD:not here.py") is None
+        assert session.resolve("HEAD:not here.py") is None
+        assert session.resolve("HEAD:my file.py") == git(repo, "rev-parse", "HEAD:my file.py")
+        session.close()
+
+    def test_writes_restart_the_readers(self, repo):
+        session = GitSession(str(repo))
+        first = session.resolve("HEAD")
+        (repo / "app.py").write_text("print('v2')\n")
+        assert "app.py" in session.status()
+        session.run("commit", "-q", "-am", "second")
+        assert session.resolve("HEAD") != first
+        assert session.read("HEAD:app.py") == b"print('v2')\n"
+        session.close()
+
+    def test_branches(self, repo):
+        session = GitSession(str(repo))
+        assert session.current_branch() == "main"
+        session.run("checkout", "-q", "-b", "feature/x")
+        assert session.current_branch() == "feature/x"
+        session.run("checkout", "-q", "--detach")
+        assert session.current_branch() == "HEAD"
+        git(repo, "update-ref", "refs/remotes/origin/main", "HEAD")
+        git(repo, "symbolic-ref", "refs/remotes/origin/HEAD", "refs/remotes/origin/main")
+        spawned = session.spawned
+        assert session.default_branch() == "main"
+        assert session.spawned == spawned
+        assert GitSession(str(repo.parent)).current_branch() is None
+
+    def test_argv_is_not_reparsed(self, repo):
+        session = GitSession(str(repo))
+        (repo / "app.py").write_text("print('v3')\n")
+        message = 'fix: handle "quoted" $HOME; rm -rf it'
+        session.run("commit", "-q", "-am", message)
+        assert git(repo, "log", "-1", "--format=%s") == message
+        with pytest.raises(GitError):
+            session.run("checkout", "-q", "missing-branch", check=True)
+
+
+class TestCallers:
+    def test_forge_and_committer_use_the_session(self, repo, monkeypatch):
+        monkeypatch.chdir(repo)
+        git(repo, "checkout", "-q", "-b", "work")
+        (repo / "app.py").write_text("print('work')\n")
+        git(repo, "commit", "-q", "-am", "work")
+        (repo / "new.py").write_text("x = 1\n")
+        git(repo, "add", "new.py")
+        diff, base = get_branch_diff("main")
+        assert base == "main"
+        assert "+print('work')" in diff
+        assert "+x = 1" in get_staged_diff()
+        assert get_git_session().cwd == os.path.abspath(repo)
+
+    def test_forge_refuses_a_detached_head(self, repo, monkeypatch, capsys):
+        from src import forge
+        monkeypatch.chdir(repo)
+        git(repo, "checkout", "-q", "-b", "work")
+        (repo / "app.py").write_text("print('work')\n")
+        git(repo, "commit", "-q", "-am", "work")
+        git(repo, "checkout", "-q", "--detach")
+        monkeypatch.setattr(forge, "check_gh_auth", lambda: "octo")
+        monkeypatch.setattr(forge, "handle_uncommitted_changes", lambda mode: False)
+        monkeypatch.setattr(forge, "get_branch_diff", lambda base: ("diff", "main"))
+        monkeypatch.setattr(forge, "get_open_issues", lambda: "")
+        monkeypatch.setattr(forge, "generate_content", lambda *a, **k: pytest.fail("no model call expected"))
+        forge.forge_pr()
+        assert "Could not determine the current branch" in capsys.readouterr().out
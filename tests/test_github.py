@@ -0,0 +1,234 @@
+import subprocess
+
+from src.audit import run_audit
+from src import github
+from src.github import GitHubClient, GitHubError, get_github, repo_from_remote
+from src import issue_gen
+from src.issue_gen import upload_issue
+from src.profile_gen import fetch_repos, filter_repos
+from src.models import RepoMetadata
+from src.repo_tools import generate_descriptions, optimize_topics
+from src.cache import set_cache_enabled
+from src.http_cache import get_http_cache
+from src.telemetry import get_tracer, summarize
+
+import pytest
+
+
+def graphql_calls(fake) -> int:
+    return sum(1 for _, path, _ in fake.requests if path == "/graphql")
+
+
+class TestGitHubClient:
+    def test_requests_share_one_connection(self, fake_github):
+        fake_github.add_repo("alpha")
+        client = get_github()
+        for _ in range(5):
+            assert client.user()["login"] == "octo"
+        client.get_repo("octo", "alpha")
+        assert fake_github.connections == 1
+        headers = fake_github.requests[0][2]
+        assert headers["Accept"] == "application/vnd.github+json"
+        assert headers["X-GitHub-Api-Version"] == "2022-11-28"
+
+    def test_idempotent_requests_are_retried(self, fake_github):
+        fake_github.failures = [502, 503]
+        assert get_github().user()["login"] == "octo"
+        fake_github.failures = [502]
+        with pytest.raises(GitHubError) as error:
+            get_github().create_issue("octo", "alpha", "t", "b")
+        assert error.value.status == 502
+
+    def test_repo_sweep_pages_past_one_hundred(self, fake_github):
+        for i in range(230):
+            fake_github.add_repo(f"repo{i}", description=f"d{i}", topics=["cli"])
+        fake_github.add_repo("secret", private=True)
+        repos = get_github().iter_repos()
+        meta = RepoMetadata.from_dict(next(repos))
+        assert (meta.name, meta.description, meta.url) == ("repo0", "d0", "https://github.com/octo/repo0")
+        assert [t.name for t in meta.repositoryTopics] == ["cli"]
+        assert meta.readme is None
+        # Streamed: only the first page has been requested so far
+        assert graphql_calls(fake_github) == 1
+        assert len(list(repos)) == 229
+        assert graphql_calls(fake_github) == 3
+
+    def test_repo_sweep_with_readmes(self, fake_github):
+        for i in range(30):
+            fake_github.add_repo(f"repo{i}", readme=f"# Repo {i}\n" if i % 2 else None)
+        repos = [RepoMetadata.from_dict(r) for r in get_github().iter_repos(readme=True)]
+        assert [r.readme for r in repos[:3]] == [None, "# Repo 1\n", None]
+        # Smaller pages when READMEs are included
+        assert graphql_calls(fake_github) == 2
+
+    def test_graphql_errors_raise(self, fake_github, monkeypatch):
+        monkeypatch.setattr(fake_github, "repositories_page", lambda variables: {"errors": [{"message": "Something went wrong"}]})
+        with pytest.raises(GitHubError, match="Something went wrong"):
+            list(get_github().iter_repos())
+
+    def test_readme_labels_and_topics(self, fake_github):
+        fake_github.add_repo("alpha", readme="# Alpha\n")
+        fake_github.add_repo("beta")
+        client = get_github()
+        assert client.readme("octo", "alpha") == "# Alpha\n"
+        assert client.readme("octo", "beta") is None
+        assert client.create_label("octo", "alpha", "bug") is True
+        assert client.create_label("octo", "alpha", "bug") is False
+        with pytest.raises(GitHubError, match="color invalid"):
+            client.create_label("octo", "alpha", "docs", color="not-a-colour")
+        assert client.set_topics("octo", "alpha", ["Python", "cli", "python"]) == ["python", "cli"]
+
+    def test_requests_are_traced(self, fake_github):
+        seen = []
+        get_tracer().listeners.append(seen.append)
+        get_github().user()
+        assert [(e["kind"], e["method"], e["endpoint"], e["status"]) for e in seen] == [("github", "GET", "user", 200)]
+
+    def test_unreachable_api(self):
+        client = GitHubClient("token", "http://127.0.0.1:9", retries=0)
+        with pytest.raises(GitHubError):
+            client.user()
+
+    def test_repo_from_remote(self):
+        assert repo_from_remote("git@github.com:octo/alpha.git") == ("octo", "alpha")
+        assert repo_from_remote("https://github.com/octo/alpha") == ("octo", "alpha")
+        assert repo_from_remote("https://gitlab.com/octo/alpha.git") is None
+
+
+class TestCommands:
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, monkeypatch):
+        monkeypatch.setattr("src.repo_tools.time.sleep", lambda s: None)
+
+    def test_optimize_topics_merges_existing(self, fake_github, monkeypatch):
+        fake_github.add_repo("alpha", description="A CLI", topics=["cli"])
+        fake_github.add_repo("full", topics=["a", "b", "c", "d", "e"])
+        monkeypatch.setattr("src.repo_tools.generate_many", lambda prompts, mode: ['["Python", "cli"]'] * len(prompts))
+        optimize_topics(mode="fast")
+        assert fake_github.repos["alpha"]["topics"] == ["cli", "python"]
+        assert fake_github.repos["full"]["topics"] == ["a", "b", "c", "d", "e"]
+
+    def test_generate_descriptions_uses_readmes(self, fake_github, monkeypatch):
+        fake_github.add_repo("alpha", readme="Alpha parses logs.")
+        fake_github.add_repo("described", description="Already here", readme="Described.")
+        fake_github.add_repo("bare")
+        seen = {}
+
+        def fake_generate_many(prompts, mode, contexts):
+            seen["contexts"] = contexts
+            return ["Parses logs quickly"] * len(prompts)
+
+        monkeypatch.setattr("src.repo_tools.generate_many", fake_generate_many)
+        generate_descriptions(mode="fast")
+        assert seen["contexts"] == ["Alpha parses logs.", "No readme available."]
+        assert fake_github.repos["alpha"]["description"] == "Parses logs quickly"
+        # One listing request carries the READMEs; no per-repo fetches
+        assert not any("/readme" in path for _, path, _ in fake_github.requests)
+        assert graphql_calls(fake_github) == 1
+
+    def test_profile_candidates_stream_from_every_page(self, fake_github):
+        for i in range(150):
+            fake_github.add_repo(f"tool{i}", archived=i % 50 == 0)
+        fake_github.add_repo("octo")
+        candidates = filter_repos(fetch_repos("octo"), "octo")
+        assert len(candidates) == 147
+        assert candidates[-1].name == "tool149"
+
+    def test_upload_issue(self, fake_github):
+        fake_github.add_repo("alpha")
+        assert upload_issue({"title": "Fix typo", "body": "In cli.py", "label": "bug", "easy": True}, ("octo", "alpha"))
+        issue = fake_github.issues[0]
+        assert issue["title"] == "[DRAFT] Fix typo"
+        assert issue["labels"] == ["status: draft", "automated", "bug", "good first issue"]
+        assert fake_github.labels["alpha"] == {"bug", "good first issue"}
+        assert not upload_issue({"title": "x", "body": "y"}, ("octo", "missing"))
+
+    def test_shared_label_failure_does_not_stop_uploads(self, fake_github, monkeypatch):
+        fake_github.add_repo("alpha")
+        client = get_github()
+        create_label = client.create_label
+
+        def flaky_create_label(owner, repo, name, color="ededed"):
+            if name == "automated":
+                raise GitHubError("422 Validation Failed")
+            return create_label(owner, repo, name, color=color)
+
+        monkeypatch.setattr(client, "create_label", flaky_create_label)
+        monkeypatch.setattr(issue_gen, "current_repo", lambda: ("octo", "alpha"))
+        monkeypatch.setattr(issue_gen, "generate_content", lambda *a, **k: '[{"title": "Fix typo", "body": "b", "label": "bug"}]')
+        issue_gen.create_issue("add a flag")
+        assert [issue["title"] for issue in fake_github.issues] == ["[DRAFT] Fix typo"]
+        assert "status: draft" in fake_github.labels["alpha"]
+
+    def test_audit_reads_the_origin_repository(self, fake_github, tmp_path, monkeypatch):
+        fake_github.add_repo("alpha", description="Audited", topics=["a", "b", "c"], license={"key": "mit"})
+        subprocess.run(["git", "init", "-q"], cwd=tmp_path, check=True)
+        subprocess.run(["git", "remote", "add", "origin", "git@github.com:octo/alpha.git"], cwd=tmp_path, check=True)
+        monkeypatch.chdir(tmp_path)
+        assert run_audit() == 50
+
+
+class TestConditionalCache:
+    def test_repeated_reads_revalidate(self, fake_github):
+        fake_github.add_repo("alpha", readme="# Alpha\n")
+        client = get_github()
+        assert client.user()["login"] == "octo"
+        spent = fake_github.remaining["core"]
+        assert client.user()["login"] == "octo"
+        assert client.readme("octo", "alpha") == "# Alpha\n"
+        assert client.readme("octo", "alpha") == "# Alpha\n"
+        assert client.get_repo("octo", "alpha")["name"] == "alpha"
+        # Second user() and readme() came back as 304s and cost no rate limit
+        assert fake_github.remaining["core"] == spent - 2
+        assert fake_github.requests[1][2]["If-None-Match"]
+        assert (client.cache.hits, client.cache.misses) == (2, 3)
+        assert client.rate_limits["core"] == {"remaining": spent - 2, "limit": 5000, "reset": 1700000000}
+        assert client.cache.rate_limits()["core"]["remaining"] == spent - 2
+
+    def test_changed_resources_are_refetched(self, fake_github):
+        fake_github.add_repo("alpha", description="old")
+        client = get_github()
+        assert client.get_repo("octo", "alpha")["description"] == "old"
+        client.edit_repo("octo", "alpha", description="new")
+        assert client.get_repo("octo", "alpha")["description"] == "new"
+
+    def test_unchanged_account_skips_the_sweep(self, fake_github):
+        for i in range(120):
+            fake_github.add_repo(f"repo{i}")
+        client = get_github()
+        assert len(list(client.iter_repos())) == 120
+        assert graphql_calls(fake_github) == 2
+        assert len(list(client.iter_repos())) == 120
+        assert graphql_calls(fake_github) == 2
+        client.set_topics("octo", "repo7", ["cli"])
+        repos = list(client.iter_repos())
+        assert graphql_calls(fake_github) == 4
+        assert repos[7]["repositoryTopics"] == [{"name": "cli"}]
+
+    def test_sweep_expires_sooner_than_other_entries(self, fake_github, monkeypatch):
+        fake_github.add_repo("alpha")
+        fake_github.add_repo("beta")
+        client = get_github()
+        assert len(list(client.iter_repos())) == 2
+        # Deleting an older repository leaves the validator probes unchanged
+        del fake_github.repos["alpha"]
+        assert len(list(client.iter_repos())) == 2
+        monkeypatch.setattr(github, "GRAPHQL_TTL_SECONDS", -1)
+        assert [r["name"] for r in client.iter_repos()] == ["beta"]
+
+    def test_summary_reports_hits_and_rate_limit(self, fake_github):
+        seen = []
+        get_tracer().listeners.append(seen.append)
+        get_github().user()
+        get_github().user()
+        row = summarize(seen)["(none)"]
+        assert (row["github_calls"], row["github_cache_hits"], row["github_cache_lookups"]) == (2, 1, 2)
+        assert row["rate_remaining"] == fake_github.remaining["core"]
+
+    def test_no_cache_mode(self, fake_github):
+        set_cache_enabled(False)
+        assert get_http_cache() is None
+        client = GitHubClient(fake_github.token, get_github().base_url, cache=get_http_cache())
+        client.user()
+        client.user()
+        assert "If-None-Match" not in fake_github.requests[-1][2]
@@ -0,0 +1,37 @@
+import pstats
+
+from src import core
+from src.profiling import PhaseProfiler, profiled
+from src.providers import FakeProvider
+from src.telemetry import get_tracer
+from src.utils import run_shell
+
+
+class TestPhaseProfiler:
+    def test_groups_spans_into_phases(self):
+        profiler = PhaseProfiler()
+        profiler.observe({"kind": "phase", "name": "map", "latency_ms": 300})
+        profiler.observe({"kind": "model", "latency_ms": 100})
+        profiler.observe({"kind": "model", "latency_ms": 150})
+        profiler.observe({"kind": "subprocess", "tool": "gh", "latency_ms": 40})
+        profiler.observe({"kind": "subprocess", "tool": "ls", "latency_ms": 5})
+        profiler.observe({"kind": "cache", "latency_ms": 1})
+        assert profiler.report() == [
+            ("map", 1, 0.3),
+            ("model calls", 2, 0.25),
+            ("gh calls", 1, 0.04),
+            ("other subprocesses", 1, 0.005),
+        ]
+
+    def test_profiled_map_reduce_run(self, tmp_path):
+        core.set_provider(FakeProvider(latency=0, tokens_per_second=1e9))
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "x = 1\n" * 2000 + "\n" for i in range(4))
+        dump = tmp_path / "run.pstats"
+        with profiled(str(dump)) as profiler:
+            core.generate_content("question", context=context)
+            run_shell("git --version")
+        phases = {name for name, _, _ in profiler.report()}
+        assert {"chunking", "map", "reduce", "model calls", "git calls"} <= phases
+        assert profiler.wall > 0
+        assert pstats.Stats(str(dump)).total_calls > 0
+        assert get_tracer().listeners == []
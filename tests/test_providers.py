@@ -0,0 +1,52 @@
+import asyncio
+
+from src import core
+from src.providers import FakeProvider
+from src.scheduler import ModelLimits, RequestScheduler, set_scheduler
+
+
+def fast_fake(**kwargs):
+    return FakeProvider(latency=0, tokens_per_second=1e9, **kwargs)
+
+
+class TestFakeProvider:
+    def test_deterministic_per_prompt(self):
+        provider = fast_fake()
+        assert provider.generate("m", "a").text == fast_fake().generate("m", "a").text
+        assert provider.generate("m", "a").text != provider.generate("m", "b").text
+
+    def test_async_and_stream_match_generate(self):
+        provider = fast_fake()
+        text = provider.generate("m", "prompt").text
+        assert asyncio.run(provider.generate_async("m", "prompt")).text == text
+        assert "".join(c.text for c in provider.stream("m", "prompt")) == text
+
+    def test_quota_error_injection(self):
+        provider = fast_fake(quota_error_rate=1.0)
+        try:
+            provider.generate("m", "p")
+        except RuntimeError as e:
+            assert core.is_quota_error(str(e))
+        assert provider.quota_errors == 1
+
+    def test_reports_usage(self):
+        completion = fast_fake(output_tokens=10).generate("m", "x" * 400)
+        assert (completion.prompt_tokens, completion.output_tokens) == (100, 10)
+
+
+class TestEngineWithFakeProvider:
+    def test_selected_from_env(self, monkeypatch):
+        monkeypatch.setenv("ALCHEMIST_PROVIDER", "fake")
+        monkeypatch.setenv("ALCHEMIST_FAKE_LATENCY", "0")
+        assert isinstance(core.get_provider(), FakeProvider)
+        assert core.generate_content("hello").startswith("[fake:gemma-3-27b-it]")
+
+    def test_map_reduce_falls_back_past_injected_429s(self):
+        provider = fast_fake(quota_error_rate=0.3, seed=1)
+        core.set_provider(provider)
+        # Real quotas would make the scheduler wait out 429s for a minute
+        set_scheduler(RequestScheduler(limits={m: ModelLimits(rpm=100000, tpm=10**9) for m in core.FAST_MODELS}))
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "x = 1\n" * 2000 + "\n" for i in range(8))
+        result = core.generate_content("question", context=context)
+        assert result.startswith("[fake:")
+        assert provider.quota_errors > 0
@@ -0,0 +1,100 @@
+from src.models import FileRecord
+from src.reduction import Reducer, collapse_whitespace, get_passes, is_generated, strip_comments, strip_license_header
+from src.telemetry import get_tracer
+from src.utils import get_codebase_files, iter_codebase_files
+
+MODULE = "\n".join(f"def handler_{i}(event):\n    return process(event, {i})\n" for i in range(15))
+
+
+class TestPasses:
+    def test_license_header(self):
+        source = "#!/usr/bin/env python\n# Copyright 2024 Example Inc.\n# Licensed under the MIT License.\n\nimport os\n"
+        assert strip_license_header(source, ".py") == "#!/usr/bin/env python\nimport os\n"
+        block = "/*\n * SPDX-License-Identifier: Apache-2.0\n */\nconst a = 1;\n"
+        assert strip_license_header(block, ".js") == "const a = 1;\n"
+        # An ordinary leading comment stays
+        assert strip_license_header("# Helpers for parsing.\nimport os\n", ".py") == "# Helpers for parsing.\nimport os\n"
+
+    def test_comments(self):
+        source = "#!/bin/sh\n# setup\necho hi  # trailing\n    # indented\n"
+        assert strip_comments(source, ".sh") == "#!/bin/sh\necho hi  # trailing\n"
+        assert strip_comments("# Title\n", ".md") == "# Title\n"
+
+    def test_whitespace(self):
+        assert collapse_whitespace("a = 1   \n\n\n\nb = 2\t\n", ".py") == "a = 1\n\nb = 2\n"
+        assert collapse_whitespace('{\n  "a": [1, 2],\n  "b": "x"\n}\n', ".json") == '{"a":[1,2],"b":"x"}\n'
+        assert collapse_whitespace("{ not json }\n", ".json") == "{ not json }\n"
+
+    def test_generated(self):
+        assert is_generated(FileRecord("./web/package-lock.json", "{}"))
+        assert is_generated(FileRecord("./api/service_pb2.py", "x = 1\n"))
+        marked = FileRecord("./gen.go", "// Code generated by protoc. DO NOT EDIT.\npackage gen\n")
+        assert not is_generated(marked)
+        assert is_generated(marked, markers=True)
+        assert not is_generated(FileRecord("./app.py", "x = 1\n" * 10 + "# generated by hand\n"), markers=True)
+
+    def test_env_selects_passes(self, monkeypatch):
+        monkeypatch.setenv("ALCHEMIST_REDUCE", "off")
+        assert get_passes() == ()
+        monkeypatch.setenv("ALCHEMIST_REDUCE", "comments, whitespace")
+        assert get_passes() == ("comments", "whitespace")
+        monkeypatch.delenv("ALCHEMIST_REDUCE")
+        assert get_passes() == ("duplicates", "generated")
+
+
+class TestReducer:
+    def test_duplicates_point_at_the_first_copy(self):
+        near = MODULE.replace("handler_3(", "handler_three(")
+        records = [
+            FileRecord("./src/app.py", MODULE),
+            FileRecord("./vendor/app.py", MODULE.replace("\n", "   \n")),
+            FileRecord("./lib/app.py", MODULE),
+            FileRecord("./copy/app.py", near),
+            FileRecord("./src/small.py", "x = 1\n"),
+            FileRecord("./src/other.py", "x = 2\n"),
+        ]
+        reducer = Reducer()
+        reduced = list(reducer.reduce_all(records))
+        # Whitespace and near duplicates keep their content unless those passes are asked for
+        assert [r.content for r in reduced] == [MODULE, records[1].content, "(duplicate of ./src/app.py)\n", near, "x = 1\n", "x = 2\n"]
+        assert reducer.report.files == {"duplicates": 1}
+
+        reducer = Reducer(passes=("duplicates", "whitespace"))
+        reduced = list(reducer.reduce_all(records))
+        assert [r.content for r in reduced][:3] == [MODULE, "(duplicate of ./src/app.py)\n", "(duplicate of ./src/app.py)\n"]
+        report = reducer.report
+        assert report.files == {"whitespace": 1, "duplicates": 2}
+        assert report.bytes_in - report.bytes_out == sum(report.saved.values())
+        assert report.tokens_saved == int((report.bytes_in - report.bytes_out) / report.chars_per_token) > 0
+
+        reducer = Reducer(passes=("duplicates", "near-duplicates"))
+        assert reducer.reduce(records[0]) is records[0]
+        assert reducer.reduce(records[3]).content == "(duplicate of ./src/app.py)\n"
+
+    def test_off_keeps_records_untouched(self):
+        records = [FileRecord("./package-lock.json", "{}"), FileRecord("./a.py", "a = 1   \n")]
+        reducer = Reducer(passes=())
+        assert list(reducer.reduce_all(records)) == records
+        assert reducer.report.tokens_saved == 0
+        assert "0 files dropped" in reducer.report.summary()
+
+
+class TestCodebaseFiles:
+    def test_reduction_runs_before_records_are_returned(self, tmp_path, monkeypatch):
+        (tmp_path / "app.py").write_text(MODULE)
+        (tmp_path / "vendored.py").write_text(MODULE)
+        (tmp_path / "package-lock.json").write_text('{"lockfileVersion": 3}')
+        (tmp_path / "config.json").write_text('{\n    "debug": true\n}\n')
+        seen = []
+        get_tracer().listeners.append(seen.append)
+        monkeypatch.chdir(tmp_path)
+        eager = get_codebase_files()
+        assert [r.path for r in eager] == ["./app.py", "./config.json", "./vendored.py"]
+        # Rewriting JSON is opt-in; the default passes only drop files
+        assert eager[1].content == '{\n    "debug": true\n}\n'
+        assert eager[2].content == "(duplicate of ./app.py)\n"
+        assert list(iter_codebase_files()) == eager
+        phases = [e for e in seen if e["kind"] == "phase" and e["name"] == "context reduction"]
+        assert len(phases) == 2
+        assert phases[0]["dropped"] == 1
+        assert phases[0]["tokens_saved"] > 0
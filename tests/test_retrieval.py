@@ -0,0 +1,67 @@
+from src import core
+from src.chunking import parse_context_records
+from src.models import FileRecord
+from src.providers import FakeProvider
+from src.retrieval import BM25Index, Segment, prefilter_context, tokenize
+from src.scheduler import ModelLimits, RequestScheduler, set_scheduler
+
+
+def render(records):
+    return "\n".join(r.render() for r in records)
+
+
+def filler_module(i):
+    return "".join(f"def compute_{i}_{j}(value):\n    return value + {j}\n\n" for j in range(60))
+
+
+class TestTokenize:
+    def test_splits_identifiers(self):
+        assert tokenize("parseJSONResponse get_user_email HTTPClient v2") == [
+            "parse", "json", "response", "get", "user", "email", "http", "client",
+        ]
+
+    def test_drops_stopwords(self):
+        assert tokenize("How does the cache work?") == ["cache", "work"]
+
+
+class TestBM25:
+    def test_ranks_matching_segment_first(self):
+        index = BM25Index([
+            Segment("./a.py", "def add(x, y):\n    return x + y\n", 0),
+            Segment("./breaker.py", "class CircuitBreaker:\n    def trip(self): ...\n", 0),
+            Segment("./c.py", "def breaker_note():\n    pass\n", 0),
+        ])
+        scores = index.scores("how does the circuit breaker trip?")
+        assert scores.index(max(scores)) == 1
+        assert scores[0] == 0
+
+    def test_prefilter_keeps_relevant_code_in_order(self):
+        records = [FileRecord(f"./mod{i}.py", filler_module(i)) for i in range(30)]
+        records[17] = FileRecord("./mod17.py", filler_module(17) + "def rotate_trace_file(path):\n    return path\n")
+        context = render(records)
+        filtered, kept, total = prefilter_context(context, "where is the trace file rotated?", 200, core.estimate_tokens)
+        assert kept < total
+        paths = [r.path for r in parse_context_records(filtered)]
+        assert paths[0] == "./mod17.py"
+        assert "def rotate_trace_file" in filtered
+        assert "...\n" in filtered
+
+    def test_unmatched_query_keeps_context(self):
+        context = render([FileRecord("./a.py", "x = 1\n")])
+        assert prefilter_context(context, "quantum entanglement", 10, core.estimate_tokens)[0] == context
+
+
+class TestMapStepPrefilter:
+    def test_query_cuts_map_calls(self):
+        set_scheduler(RequestScheduler(limits={m: ModelLimits(rpm=10000, tpm=10**9) for m in core.FAST_MODELS}))
+        records = [FileRecord(f"./pkg/mod{i}.py", filler_module(i) * 6) for i in range(150)]
+        records[42] = FileRecord("./pkg/billing.py", "def apply_invoice_discount(invoice):\n    return invoice\n")
+        context = render(records)
+
+        calls = []
+        for query in (None, "how is the invoice discount applied?"):
+            provider = FakeProvider(latency=0, tokens_per_second=1e9)
+            core.set_provider(provider)
+            core.generate_content(f"Answer: {query}", context=context, query=query)
+            calls.append(provider.calls)
+        assert calls[1] * 5 < calls[0]
@@ -0,0 +1,126 @@
+import subprocess
+
+import pytest
+
+from src.scanner import GitignoreMatcher, ScanStats, iter_codebase, list_source_files, read_source, scan_codebase, walk_files
+from src.telemetry import get_tracer
+from src.utils import iter_codebase_files
+
+
+def git(root, *args):
+    subprocess.run(["git", *args], cwd=root, check=True, capture_output=True)
+
+
+@pytest.fixture
+def tree(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.log\ngenerated/\n/top.py\n!keep.log\n")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "app.py").write_text("print('app')\n")
+    (tmp_path / "src" / "top.py").write_text("x = 1\n")
+    (tmp_path / "top.py").write_text("x = 2\n")
+    (tmp_path / "generated").mkdir()
+    (tmp_path / "generated" / "out.py").write_text("x = 3\n")
+    (tmp_path / "debug.log").write_text("noise\n")
+    (tmp_path / "keep.log").write_text("kept\n")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "lib.js").write_text("module.exports = 1\n")
+    return tmp_path
+
+
+class TestGitignoreMatcher:
+    def test_patterns(self):
+        matcher = GitignoreMatcher()
+        matcher.add_patterns(["# comment", "*.pyc", "build/", "/root_only.py", "docs/**/*.md", "!docs/keep.md", "a?c.txt"])
+        assert matcher.ignored("pkg/mod.pyc")
+        assert matcher.ignored("build", is_dir=True)
+        assert not matcher.ignored("build")  # directory-only rule, plain file
+        assert matcher.ignored("root_only.py")
+        assert not matcher.ignored("pkg/root_only.py")
+        assert matcher.ignored("docs/a/b/page.md")
+        assert matcher.ignored("docs/page.md")
+        assert not matcher.ignored("docs/keep.md")
+        assert matcher.ignored("abc.txt")
+        assert not matcher.ignored("ab/c.txt")
+
+    def test_nested_gitignore_is_relative_to_its_directory(self):
+        matcher = GitignoreMatcher()
+        matcher.add_patterns(["/local.py"], base="pkg")
+        assert matcher.ignored("pkg/local.py")
+        assert not matcher.ignored("local.py")
+        assert not matcher.ignored("other/local.py")
+
+
+class TestListing:
+    def test_walk_fallback_honours_gitignore(self, tree):
+        assert walk_files(str(tree)) == [".gitignore", "keep.log", "node_modules/lib.js", "src/app.py", "src/top.py"]
+
+    def test_git_listing_matches_walk(self, tree):
+        git(tree, "init", "-q")
+        git(tree, "add", "src/app.py")
+        paths, source = list_source_files(str(tree))
+        assert source == "git"
+        assert paths == ["src/app.py", "src/top.py"]
+        assert list_source_files(str(tree))[0] == paths
+
+    def test_outside_git_uses_walk(self, tree):
+        paths, source = list_source_files(str(tree))
+        assert source == "walk"
+        assert paths == ["src/app.py", "src/top.py"]
+
+
+class TestReadSource:
+    def test_skip_reasons(self, tmp_path):
+        (tmp_path / "ok.py").write_bytes(b"a = 1\r\nb = 2\r\n")
+        (tmp_path / "blob.json").write_bytes(b"{\x00\x01}")
+        (tmp_path / "latin.py").write_bytes(b"caf\xe9 = 1\n")
+        (tmp_path / "bundle.js").write_text("var a=1;" * 2000)
+        (tmp_path / "big.py").write_text("x = 1\n" * 1000)
+        assert read_source(str(tmp_path / "ok.py"), 1024) == ("a = 1\nb = 2\n", "", 14)
+        assert read_source(str(tmp_path / "blob.json"), 1024)[1] == "binary"
+        assert read_source(str(tmp_path / "latin.py"), 1024)[1] == "binary"
+        assert read_source(str(tmp_path / "bundle.js"), 1 << 20)[1] == "minified"
+        assert read_source(str(tmp_path / "big.py"), 1024)[1] == "too large"
+        assert read_source(str(tmp_path / "missing.py"), 1024)[1] == "unreadable"
+
+
+class TestScanCodebase:
+    def test_records_and_stats(self, tree):
+        (tree / "src" / "data.json").write_bytes(b"\x00" * 10)
+        (tree / "src" / "huge.py").write_text("y = 2\n" * 200)
+        records, stats = scan_codebase(str(tree), max_bytes=1000, workers=4)
+        assert [r.path for r in records] == [f"{tree}/src/app.py", f"{tree}/src/top.py"]
+        assert records[0].content == "print('app')\n"
+        assert stats.source == "walk"
+        assert stats.files == 2
+        assert stats.bytes == len("print('app')\n") + len("x = 1\n")
+        assert stats.skipped == {"binary": 1, "too large": 1}
+        assert "skipped 1 binary, 1 too large" in stats.summary()
+
+    def test_max_file_size_from_env(self, tree, monkeypatch):
+        (tree / "src" / "mid.py").write_text("z = 3\n" * 400)
+        monkeypatch.setenv("ALCHEMIST_SCAN_MAX_KB", "1")
+        _, stats = scan_codebase(str(tree))
+        assert stats.skipped == {"too large": 1}
+
+    def test_iter_codebase_is_lazy(self, tree):
+        for i in range(300):
+            (tree / "src" / f"m{i:03}.py").write_text(f"m = {i}\n")
+        stats = ScanStats()
+        records = iter_codebase(str(tree), workers=2, stats=stats)
+        first = next(records)
+        assert first.path.endswith("src/app.py")
+        assert stats.files == 1
+        rest = list(records)
+        assert len(rest) == 301
+        assert stats.files == 302
+
+    def test_iter_codebase_files_records_the_scan(self, tree, monkeypatch):
+        seen = []
+        get_tracer().listeners.append(seen.append)
+        monkeypatch.chdir(tree)
+        records = list(iter_codebase_files())
+        assert [r.path for r in records] == ["./src/app.py", "./src/top.py"]
+        scans = [e for e in seen if e["kind"] == "phase" and e["name"] == "context scan"]
+        assert len(scans) == 1
+        assert scans[0]["streamed"] is True
+        assert scans[0]["files"] == 2
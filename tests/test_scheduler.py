@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from src.scheduler import TokenBucket, RequestScheduler, ModelLimits
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTokenBucket:
+    def test_starts_full_and_refills(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=2, clock=clock)
+        assert bucket.wait_time(2) == 0
+        bucket.take(2)
+        assert bucket.wait_time(1) == 1.0
+        clock.now = 1.0
+        assert bucket.wait_time(1) == 0
+
+    def test_oversized_request_waits_for_full_bucket(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10.0, capacity=100, clock=clock)
+        bucket.take(100)
+        assert bucket.wait_time(500) == 10.0
+
+
+class TestRequestScheduler:
+    def _scheduler(self, clock, **kwargs):
+        limits = {"m": ModelLimits(rpm=2, tpm=1000)}
+        return RequestScheduler(limits=limits, clock=clock, **kwargs)
+
+    def test_rpm_budget_limits_admission(self):
+        clock = FakeClock()
+        scheduler = self._scheduler(clock, max_concurrency=10)
+        assert scheduler.try_admit("m", 10) == 0
+        assert scheduler.try_admit("m", 10) == 0
+        assert scheduler.try_admit("m", 10) == 30.0  # 2 RPM -> one request per 30s
+
+    def test_tpm_budget_limits_admission(self):
+        clock = FakeClock()
+        scheduler = self._scheduler(clock, max_concurrency=10)
+        assert scheduler.try_admit("m", 900) == 0
+        assert scheduler.try_admit("m", 200) > 0
+
+    def test_concurrency_cap(self):
+        scheduler = self._scheduler(FakeClock(), max_concurrency=1)
+        assert scheduler.try_admit("m", 1) == 0
+        assert scheduler.try_admit("m", 1) > 0
+        scheduler.release("m")
+        assert scheduler.in_flight == 0
+
+    def test_throttle_halves_concurrency_and_success_recovers(self):
+        scheduler = self._scheduler(FakeClock(), max_concurrency=8)
+        scheduler.in_flight = 1
+        scheduler.release("m", throttled=True)
+        assert scheduler.concurrency == 4
+        for _ in range(50):
+            scheduler.in_flight = 1
+            scheduler.release("m")
+        assert scheduler.concurrency == 8
+
+    def test_slot_marks_throttle(self):
+        scheduler = self._scheduler(FakeClock(), max_concurrency=4)
+        with scheduler.slot("m", 1) as ticket:
+            assert scheduler.in_flight == 1
+            ticket.throttled = True
+        assert scheduler.in_flight == 0
+        assert scheduler.throttle_count == 1
+
+    def test_acquire_any_skips_an_exhausted_model(self):
+        clock = FakeClock()
+        limits = {"a": ModelLimits(rpm=600, tpm=60000), "b": ModelLimits(rpm=600, tpm=60000)}
+        scheduler = RequestScheduler(limits=limits, clock=clock)
+        assert scheduler.try_admit("a", 60000) == 0
+        waits = []
+        assert asyncio.run(scheduler.acquire_any_async(["a", "b"], 50000, on_wait=waits.append)) == "b"
+        assert waits == []
+
+    def test_acquire_any_waits_for_the_first_model_to_refill(self):
+        clock = FakeClock()
+        limits = {"a": ModelLimits(rpm=600, tpm=60000), "b": ModelLimits(rpm=600, tpm=60000)}
+        scheduler = RequestScheduler(limits=limits, clock=clock)
+        scheduler.try_admit("a", 60000)
+        clock.now = 0.005
+        scheduler.try_admit("b", 60000)  # drained 5 ms after a, so a refills first
+
+        def on_wait(delay):
+            waits.append(delay)
+            clock.now += delay
+
+        waits: list[float] = []
+        assert asyncio.run(scheduler.acquire_any_async(["b", "a"], 10, on_wait=on_wait)) == "a"
+        assert waits == [pytest.approx(0.005)]
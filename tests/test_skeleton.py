@@ -0,0 +1,104 @@
+from src.core import SAFE_TOKEN_LIMIT_FAST, estimate_tokens
+from src.models import FileRecord
+from src.skeleton import defined_symbols, fit_skeleton, mentioned_symbols, skeleton_records, skeletonize
+
+SOURCE = '''"""Billing helpers."""
+import os
+from typing import Any
+
+RATE = 0.2
+TABLE = {"a": 1, "b": 2, "c": 3, "d": 4, "e": 5, "f": 6, "g": 7, "h": 8, "i": 9, "j": 10, "k": 11}
+
+
+def total(items: list[float], rate: float = RATE) -> float:
+    """
+    Sums items and applies the rate.
+
+    Rounding is left to the caller.
+    """
+    subtotal = sum(items)
+    return subtotal * (1 + rate)
+
+
+def _round(value: float) -> float:
+    return round(value, 2)
+
+
+class Invoice(Base):
+    """An invoice."""
+    currency: str = "EUR"
+
+    @property
+    def amount(self) -> float:
+        return total(self.items)
+
+    async def send(self, to: str) -> None:
+        """Emails the invoice."""
+        await mail(to, self)
+
+
+if __name__ == "__main__":
+    print(total([1.0]))
+'''
+
+
+class TestSkeletonize:
+    def test_keeps_structure_and_drops_bodies(self):
+        skeleton = skeletonize(SOURCE)
+        assert '"""Billing helpers."""' in skeleton
+        assert "from typing import Any" in skeleton
+        assert "RATE = 0.2" in skeleton
+        assert "TABLE = ..." in skeleton
+        assert "def total(items: list[float], rate: float=RATE) -> float:" in skeleton
+        assert '"""Sums items and applies the rate."""' in skeleton
+        assert "Rounding" not in skeleton
+        assert "_round" not in skeleton
+        assert "class Invoice(Base):" in skeleton
+        assert "currency: str = 'EUR'" in skeleton
+        assert "@property" in skeleton
+        assert "async def send(self, to: str) -> None:" in skeleton
+        assert "subtotal" not in skeleton
+        assert "await mail" not in skeleton
+        assert "__main__" not in skeleton
+
+    def test_expanded_symbols_keep_their_bodies(self):
+        skeleton = skeletonize(SOURCE, expand={"total", "Invoice.send"})
+        assert "subtotal = sum(items)" in skeleton
+        assert "await mail(to, self)" in skeleton
+        assert "return total(self.items)" not in skeleton
+
+    def test_invalid_source_is_kept(self):
+        records = [FileRecord("./bad.py", "def broken(:\n"), FileRecord("./notes.md", "def x(): pass\n")]
+        assert skeletonize("def broken(:\n") is None
+        assert skeleton_records(records) == records
+
+
+class TestSymbols:
+    def test_defined_symbols(self):
+        assert defined_symbols([FileRecord("./billing.py", SOURCE)]) == {"total", "_round", "Invoice", "Invoice.amount", "Invoice.send"}
+
+    def test_only_code_like_mentions_expand(self):
+        symbols = {"total", "Invoice", "Invoice.send", "run", "split_context"}
+        assert mentioned_symbols("How is the total run?", symbols) == set()
+        assert mentioned_symbols("Where does split_context call `total`?", symbols) == {"split_context", "total"}
+        assert mentioned_symbols("What does Invoice.send() do?", symbols) == {"Invoice.send"}
+
+
+class TestRepositorySkeleton:
+    def test_levels_trade_detail_for_size(self):
+        skeleton = skeletonize(SOURCE, level="signatures")
+        assert "import os" not in skeleton
+        assert "Sums items" not in skeleton
+        assert '"""An invoice."""' in skeleton
+        records = [FileRecord("./src/billing.py", SOURCE), FileRecord("./tests/test_billing.py", "def test_total():\n    pass\n")]
+        assert [r.path for r in skeleton_records(records, level="no tests")] == ["./src/billing.py"]
+
+    def test_whole_repo_fits_one_fast_request(self):
+        records = [FileRecord(f"./pkg/mod{i}.py", SOURCE.replace("total", f"total_{i}")) for i in range(60)]
+        full = "\n".join(r.render() for r in records)
+        assert estimate_tokens(full) > SAFE_TOKEN_LIMIT_FAST
+        context, level = fit_skeleton(records, SAFE_TOKEN_LIMIT_FAST, estimate_tokens)
+        assert estimate_tokens(context) <= SAFE_TOKEN_LIMIT_FAST
+        assert "def total_7(" in context
+        # The most detailed level that fits is used
+        assert fit_skeleton(records, 10**6, estimate_tokens)[1] == "docstrings"
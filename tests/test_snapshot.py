@@ -0,0 +1,115 @@
+import os
+import subprocess
+import time
+
+import pytest
+
+from src import core, snapshot, utils
+from src.scanner import scan_codebase
+from src.snapshot import Snapshot, get_snapshot
+from src.tokens import HeuristicEstimator
+
+
+def write(path, text, age=100):
+    """Writes a file with an mtime in the past, outside the racy window."""
+    path.write_text(text)
+    past = time.time() - age
+    os.utime(path, (past, past))
+
+
+@pytest.fixture
+def repo(tmp_path):
+    # Kept apart from the snapshot directory conftest puts under tmp_path
+    (tmp_path / "repo").mkdir()
+    return tmp_path / "repo"
+
+
+def rescan(root):
+    snapshot.reset_snapshot()
+    return scan_codebase(str(root), snapshot=get_snapshot())
+
+
+class TestSnapshot:
+    def test_rescan_reuses_unchanged_files(self, repo):
+        write(repo / "a.py", "a = 1\n")
+        write(repo / "b.py", "b = 2\n")
+        write(repo / "blob.json", "\0\0")
+        first, stats = rescan(repo)
+        assert stats.reused == 0
+
+        second, stats = rescan(repo)
+        assert stats.reused == 3
+        assert stats.skipped == {"binary": 1}
+        assert [(r.path, r.content) for r in second] == [(r.path, r.content) for r in first]
+        assert "3 unchanged since the last scan" in stats.summary()
+
+    def test_changed_and_deleted_files(self, repo):
+        write(repo / "a.py", "a = 1\n")
+        write(repo / "b.py", "b = 2\n")
+        rescan(repo)
+        write(repo / "a.py", "a = 100\n", age=50)
+        os.remove(repo / "b.py")
+        records, stats = rescan(repo)
+        assert stats.reused == 0
+        assert [r.content for r in records] == ["a = 100\n"]
+        assert list(get_snapshot()._files) == ["a.py"]
+
+    def test_recently_modified_files_are_not_trusted(self, repo):
+        (repo / "hot.py").write_text("x = 1\n")
+        rescan(repo)
+        _, stats = rescan(repo)
+        assert stats.reused == 0
+
+    def test_missing_blob_starts_empty(self, repo):
+        write(repo / "a.py", "a = 1\n")
+        rescan(repo)
+        directory = os.path.dirname(get_snapshot().path)
+        for name in os.listdir(directory):
+            if name.endswith(".bin"):
+                os.remove(os.path.join(directory, name))
+        records, stats = rescan(repo)
+        assert stats.reused == 0
+        assert records[0].content == "a = 1\n"
+
+    def test_snapshot_dir_stays_out_of_git_status(self, repo, monkeypatch):
+        subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+        write(repo / "a.py", "a = 1\n")
+        subprocess.run(["git", "add", "a.py"], cwd=repo, check=True)
+        subprocess.run(["git", "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"], cwd=repo, check=True)
+        monkeypatch.delenv("ALCHEMIST_SNAPSHOT_DIR")
+        monkeypatch.chdir(repo)
+        assert "a = 1" in utils.get_codebase_context()
+        assert os.path.exists(repo / snapshot.SNAPSHOT_DIR / "snapshot.json")
+        status = subprocess.run(["git", "status", "--porcelain"], cwd=repo, check=True, capture_output=True, text=True)
+        assert status.stdout == ""
+
+    def test_token_counts_persist_per_signature(self, tmp_path):
+        calls = []
+
+        def estimate(text):
+            calls.append(text)
+            return len(text)
+
+        path = str(tmp_path / "snap" / "snapshot.json")
+        first = Snapshot(path)
+        memo = first.memo_estimate(estimate, "sig-a")
+        assert memo("hello") == 5
+        assert memo("hello") == 5
+        first.save()
+        assert calls == ["hello"]
+
+        reloaded = Snapshot(path)
+        assert reloaded.memo_estimate(estimate, "sig-a")("hello") == 5
+        assert calls == ["hello"]
+        assert reloaded.memo_estimate(estimate, "sig-b")("hello") == 5
+        assert calls == ["hello", "hello"]
+
+    def test_split_context_memoizes_token_counts(self):
+        core.set_provider(None)
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\nx = {i}\n" for i in range(5))
+        chunks = core.split_context(context, 1000)
+        signature = HeuristicEstimator().signature
+        snapshot.reset_snapshot()
+        counts = get_snapshot()._tokens[signature]
+        assert len(counts) == 5
+        assert core.split_context(context, 1000) == chunks
@@ -0,0 +1,50 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from src.core import generate_content_stream, stream_with_fallback
+from src.providers import GeminiProvider
+
+
+def streaming_provider(streams):
+    """streams maps model name -> list of text chunks, or an Exception to raise."""
+    client = MagicMock()
+
+    def generate_content_stream(model, contents):
+        outcome = streams[model]
+        for item in outcome:
+            if isinstance(item, Exception):
+                raise item
+            yield SimpleNamespace(text=item, usage_metadata=None)
+
+    client.models.generate_content_stream.side_effect = generate_content_stream
+    return GeminiProvider(client)
+
+
+class TestStreamWithFallback:
+    def test_joins_streamed_chunks(self, capsys):
+        provider = streaming_provider({"m": ["Hel", "lo"]})
+        assert stream_with_fallback(provider, "p", ["m"], title="TITLE") == "Hello"
+        out = capsys.readouterr().out
+        assert out.index("TITLE") < out.index("Hello")
+        assert "Time to first token" in out
+
+    def test_falls_back_before_first_token(self):
+        provider = streaming_provider({"a": [Exception("429 RESOURCE_EXHAUSTED")], "b": ["ok"]})
+        assert stream_with_fallback(provider, "p", ["a", "b"]) == "ok"
+
+    def test_keeps_partial_output_after_midstream_failure(self):
+        provider = streaming_provider({"a": ["part", Exception("connection reset")], "b": ["never"]})
+        assert stream_with_fallback(provider, "p", ["a", "b"]) == "part"
+
+    def test_complete_answers_are_cached(self):
+        provider = streaming_provider({"m": ["cached answer"]})
+        stream_with_fallback(provider, "p", ["m"])
+        stream_with_fallback(provider, "p", ["m"])
+        assert provider.client.models.generate_content_stream.call_count == 1
+
+
+def test_generate_content_stream_reports_failure(capsys):
+    provider = streaming_provider({m: [Exception("boom")] for m in ("gemma-3-27b-it", "gemma-3-12b-it", "gemma-3-4b-it")})
+    with patch("src.core.get_provider", return_value=provider):
+        result = generate_content_stream("question")
+    assert result == "No relevant information found in the provided context."
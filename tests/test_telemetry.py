@@ -0,0 +1,102 @@
+import pytest
+
+from src import core, telemetry
+from src.providers import FakeProvider
+from src.telemetry import Tracer, percentile, summarize
+from src.utils import run_shell
+
+
+def spans_of(kind):
+    return [s for s in telemetry.get_tracer().load() if s["kind"] == kind]
+
+
+class TestTracer:
+    def test_span_records_latency_outcome_and_attrs(self, tmp_path):
+        tracer = Tracer(str(tmp_path / "trace.jsonl"))
+        tracer.command = "sage"
+        with tracer.span("model", model="m") as span:
+            span.set(output_tokens=5, prompt_tokens=None)
+        [entry] = tracer.load()
+        assert entry["kind"] == "model" and entry["command"] == "sage"
+        assert entry["outcome"] == "ok" and entry["output_tokens"] == 5
+        assert "prompt_tokens" not in entry and entry["latency_ms"] >= 0
+
+    def test_exception_marks_span_as_error(self, tmp_path):
+        tracer = Tracer(str(tmp_path / "trace.jsonl"))
+        with pytest.raises(ValueError):
+            with tracer.span("chunk"):
+                raise ValueError("boom")
+        assert tracer.load()[0]["outcome"] == "error"
+
+    def test_rotation_keeps_bounded_backups(self, tmp_path):
+        tracer = Tracer(str(tmp_path / "trace.jsonl"), max_bytes=400, backups=2)
+        for i in range(50):
+            tracer.record("cache", 0.001, index=i)
+        assert len(tracer.files()) == 3
+        assert all((tmp_path / name).stat().st_size <= 400 for name in ("trace.jsonl", "trace.jsonl.1"))
+        assert tracer.load()[-1]["index"] == 49
+
+    def test_disabled_by_env(self, monkeypatch):
+        monkeypatch.setenv("ALCHEMIST_NO_TRACE", "1")
+        telemetry.reset_tracer()
+        with telemetry.span("model"):
+            pass
+        assert telemetry.get_tracer().load() == []
+
+
+class TestSummary:
+    def test_percentile_nearest_rank(self):
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 95) == 95.0
+        assert percentile([], 95) == 0.0
+
+    def test_aggregates_per_command(self):
+        spans = [
+            {"run": "a", "command": "sage", "kind": "model", "latency_ms": 100, "outcome": "quota", "attempt": 0, "est_tokens": 10},
+            {"run": "a", "command": "sage", "kind": "model", "latency_ms": 300, "outcome": "ok", "attempt": 1,
+             "est_tokens": 10, "prompt_tokens": 12, "output_tokens": 40},
+            {"run": "b", "command": "sage", "kind": "cache", "latency_ms": 1, "outcome": "hit"},
+            {"run": "c", "command": "commit", "kind": "subprocess", "latency_ms": 20, "outcome": "ok"},
+        ]
+        summary = summarize(spans)
+        assert summary["sage"]["runs"] == 2
+        assert summary["sage"]["calls"] == 2 and summary["sage"]["p95_ms"] == 300
+        assert summary["sage"]["fallbacks"] == 1 and summary["sage"]["quota_failures"] == 1
+        assert summary["sage"]["estimated_tokens"] == 20 and summary["sage"]["output_tokens"] == 40
+        assert summary["sage"]["cache_hits"] == 1
+        assert summary["commit"]["subprocesses"] == 1
+
+
+class TestInstrumentation:
+    def test_fallback_hops_are_traced(self):
+        class FirstModelThrottled(FakeProvider):
+            def generate(self, model, prompt):
+                if model == core.FAST_MODELS[0]:
+                    raise RuntimeError("429 RESOURCE_EXHAUSTED")
+                return super().generate(model, prompt)
+
+        result = core.generate_with_fallback(FirstModelThrottled(latency=0, tokens_per_second=1e9), "p", core.FAST_MODELS, silent=True)
+        assert result
+        calls = spans_of("model")
+        assert [(c["model"], c["attempt"], c["outcome"]) for c in calls] == [
+            (core.FAST_MODELS[0], 0, "quota"),
+            (core.FAST_MODELS[1], 1, "ok"),
+        ]
+        assert calls[1]["output_tokens"] > 0
+        assert [c["outcome"] for c in spans_of("cache")] == ["miss"]
+
+    def test_chunks_are_traced(self):
+        core.set_provider(FakeProvider(latency=0, tokens_per_second=1e9))
+        context = "\n".join(f"--- FILE: ./f{i}.py ---\n" + "x = 1\n" * 2000 + "\n" for i in range(4))
+        core.generate_content("question", context=context)
+        assert len(spans_of("chunk")) == len(core.split_context(context, core.SAFE_TOKEN_LIMIT_FAST))
+
+    def test_subprocess_spans_omit_arguments(self):
+        run_shell("echo secret-token")
+        run_shell("git --version")
+        echo, git = spans_of("subprocess")
+        assert echo["tool"] == "echo" and "secret-token" not in str(echo)
+        assert (git["tool"], git["subcommand"]) == ("git", "--version")
+        run_shell("false", suppress_errors=True)
+        assert spans_of("subprocess")[-1]["outcome"] == "error"
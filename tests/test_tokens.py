@@ -0,0 +1,91 @@
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from src import tokens
+from src.tokens import (
+    ApiTokenCounter,
+    HeuristicEstimator,
+    MIN_CALIBRATION_SAMPLES,
+    calibration_report,
+    classify_content,
+    load_calibrated_ratios,
+    record_usage,
+)
+
+CODE = "def f(x):\n    return {k: v for k, v in x.items() if v > 0}\n" * 20
+JSON = '{"name": "repo", "topics": ["a", "b"], "stars": 3}' * 20
+PROSE = "The quick brown fox jumps over the lazy dog and keeps running. " * 20
+CJK = "这是一个用于测试的中文句子。" * 20
+
+
+class TestClassifyContent:
+    @pytest.mark.parametrize("text, expected", [
+        (CODE, "code"),
+        (JSON, "json"),
+        (PROSE, "prose"),
+        (CJK, "cjk"),
+        ("   ", "prose"),
+    ])
+    def test_classify(self, text, expected):
+        assert classify_content(text) == expected
+
+
+class TestHeuristicEstimator:
+    def test_denser_types_yield_more_tokens(self):
+        estimator = HeuristicEstimator()
+        per_char = {name: estimator.estimate(text) / len(text) for name, text in
+                    [("prose", PROSE), ("code", CODE), ("json", JSON), ("cjk", CJK)]}
+        assert per_char["prose"] < per_char["code"] < per_char["json"] < per_char["cjk"]
+
+    def test_custom_ratio(self):
+        assert HeuristicEstimator({"prose": 2.0}).estimate("A" * 10) == 5
+
+
+class TestApiTokenCounter:
+    def test_memoizes_by_content(self):
+        provider = MagicMock()
+        provider.count_tokens.return_value = 7
+        counter = ApiTokenCounter(provider, "model")
+        assert counter.estimate("hello") == 7
+        assert counter.estimate("hello") == 7
+        assert provider.count_tokens.call_count == 1
+
+    def test_falls_back_on_error(self):
+        provider = MagicMock()
+        provider.count_tokens.side_effect = Exception("offline")
+        assert ApiTokenCounter(provider, "model").estimate("A" * 40) == 10
+
+
+class TestCalibration:
+    def test_report_compares_estimates_with_actuals(self):
+        record_usage(PROSE, 200)
+        record_usage(PROSE, 200)
+        row = calibration_report()["prose"]
+        assert row["samples"] == 2
+        assert row["actual"] == 400
+        assert row["chars_per_token"] == pytest.approx(len(PROSE) / 200)
+
+    def test_ratios_need_enough_samples(self):
+        for _ in range(MIN_CALIBRATION_SAMPLES - 1):
+            record_usage(CODE, 500)
+        assert "code" not in load_calibrated_ratios()
+        record_usage(CODE, 500)
+        assert load_calibrated_ratios()["code"] == pytest.approx(len(CODE) / 500)
+
+    def test_calibration_file_is_rotated(self, monkeypatch):
+        monkeypatch.setattr(tokens, "CALIBRATION_MAX_BYTES", 1000)
+        monkeypatch.setattr(tokens, "MAX_CALIBRATION_SAMPLES", 20)
+        for i in range(100):
+            record_usage(CODE, 500 + i)
+        path = tokens._calibration_path()
+        assert os.path.getsize(path) <= 1000
+        assert os.path.exists(path + ".1") and not os.path.exists(path + ".2")
+        assert [s["actual"] for s in tokens.load_samples()] == list(range(580, 600))
+
+    def test_estimator_uses_calibration(self):
+        for _ in range(MIN_CALIBRATION_SAMPLES):
+            record_usage(CODE, 500)
+        tokens.set_estimator(None)
+        assert tokens.get_estimator().estimate(CODE) == 500
@@ -42,3 +42,9 @@ def test_repometadata_default_values():
     assert repo.isArchived is False
     assert repo.stargazerCount == 0
     assert repo.repositoryTopics is None
+    assert repo.readme is None
+
+def test_repometadata_readme():
+    assert RepoMetadata.from_dict({"name": "docs", "readme": "# Docs\n"}).readme == "# Docs\n"
+    with pytest.raises(TypeError, match="'readme' must be a string"):
+        RepoMetadata.from_dict({"name": "docs", "readme": {"text": "x"}})
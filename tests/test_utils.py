@@ -1,6 +1,5 @@
 import json
 import subprocess
-from unittest.mock import patch, MagicMock
 
 from src.utils import run_shell, parse_json_response, check_gh_auth, get_user_email
 
@@ -66,29 +65,24 @@ class TestParseJsonResponse:
 
 
 class TestCheckGhAuth:
-    @patch("src.utils.run_shell")
-    def test_authenticated(self, mock_run):
-        mock_run.return_value = "testuser"
+    def test_authenticated(self, fake_github):
+        fake_github.login = "testuser"
         assert check_gh_auth() == "testuser"
 
-    @patch("src.utils.run_shell")
-    def test_not_authenticated(self, mock_run):
-        mock_run.return_value = None
+    def test_not_authenticated(self, fake_github):
+        fake_github.token = "other-token"
         assert check_gh_auth() is None
 
 
 class TestGetUserEmail:
-    @patch("src.utils.run_shell")
-    def test_returns_email(self, mock_run):
-        mock_run.return_value = "user@example.com"
+    def test_returns_email(self, fake_github):
+        fake_github.email = "user@example.com"
         assert get_user_email() == "user@example.com"
 
-    @patch("src.utils.run_shell")
-    def test_returns_none_when_empty(self, mock_run):
-        mock_run.return_value = ""
+    def test_returns_none_when_private(self, fake_github):
+        fake_github.email = None
         assert get_user_email() is None
 
-    @patch("src.utils.run_shell")
-    def test_returns_none_on_failure(self, mock_run):
-        mock_run.return_value = None
+    def test_returns_none_on_failure(self, fake_github):
+        fake_github.token = "other-token"
         assert get_user_email() is None